@@ -1,159 +1,1016 @@
-from flask import Flask, jsonify, request
-from collections import defaultdict
+from flask import Flask, g, jsonify, request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from operator import itemgetter
 import os
+import base64
+import binascii
+import gc
 import glob
+import gzip
+import hashlib
+import json
+import pickle
+import posixpath
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from xml.etree import ElementTree
 import openpyxl
 from flask_caching import Cache
 
+from busca import IndiceBusca
+from cache_respostas import CacheRespostas
+from dados_colunares import IESColunar
+from logs import configurar_logs
+from metricas import LIMITES_BYTES, RegistroMetricas
+from mudancas import HistoricoVersoes, normalizar_etag
+from qualidade import PREFIXOS_URL, RelatorioQualidade
+from registro_ies import RegistroIES, VisaoRegistro
+from respostas_mapeadas import abrir_arquivo_respostas, gravar_arquivo_respostas
+
+# Brotli é opcional: sem o pacote as respostas são oferecidas só em gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 
+# Logs da API, com nível e formato configuráveis (ver logs.py)
+logger = configurar_logs()
+
+# Páginas HTML (templates/): o Jinja compila cada template uma única vez, com
+# autoescape dos nomes vindos da planilha. As páginas das IES são renderizadas
+# junto com as respostas JSON (ver preparar_ies), não a cada requisição.
+app.jinja_env.trim_blocks = True
+app.jinja_env.lstrip_blocks = True
+
+# Backends de cache disponíveis em CACHE_TYPE (ver backends_cache.py); também
+# aceita o caminho de importação de outro backend do Flask-Caching
+BACKENDS_CACHE = {
+    'simple': 'backends_cache.SimpleCacheInstrumentado',
+    'filesystem': 'backends_cache.FileSystemCacheInstrumentado',
+    'redis': 'backends_cache.RedisCacheInstrumentado',
+}
+
+def configuracao_cache():
+    """Monta a configuração do Flask-Caching a partir das variáveis de ambiente"""
+    tipo = os.environ.get('CACHE_TYPE', 'simple')
+    config = {
+        'CACHE_TYPE': BACKENDS_CACHE.get(tipo, tipo),
+        'CACHE_DEFAULT_TIMEOUT': 300,
+    }
+    
+    if tipo == 'filesystem':
+        # /dev/shm é memória compartilhada entre os processos da máquina
+        base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        config['CACHE_DIR'] = os.environ.get('CACHE_DIR', os.path.join(base, 'api_guias_cache'))
+    elif tipo == 'redis':
+        config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+        config['CACHE_KEY_PREFIX'] = os.environ.get('CACHE_KEY_PREFIX', 'api_guias:')
+    
+    return config
+
 # Configuração de cache
-cache = Cache(app, config={'CACHE_TYPE': 'simple'})
+cache = Cache(app, config=configuracao_cache())
 
-# Estrutura global para armazenar os dados processados
-dados_ies = {}
+# Métricas expostas em /metrics (ver metricas.py)
+metricas = RegistroMetricas()
+HISTOGRAMA_REQUISICOES = metricas.histograma(
+    'api_guias_requisicao_duracao_segundos', 'Duração das requisições por rota', ('rota', 'metodo', 'status'),
+)
+HISTOGRAMA_TAMANHO_RESPOSTAS = metricas.histograma(
+    'api_guias_resposta_bytes', 'Tamanho do corpo das respostas por rota', ('rota',), limites=LIMITES_BYTES,
+)
+HISTOGRAMA_ETAPAS_CARGA = metricas.histograma(
+    'api_guias_carga_etapa_duracao_segundos',
+    'Duração de cada etapa da carga dos dados (abertura da planilha, leitura de cada aba, '
+    'formatação, serialização, páginas e índices de cada IES...)', ('etapa',),
+)
+HISTOGRAMA_RECARGAS = metricas.histograma(
+    'api_guias_recarga_duracao_segundos', 'Duração total das cargas e recargas dos dados', ('resultado',),
+)
 
-def encontrar_arquivo_excel():
-    """Encontra o arquivo Excel no diretório atual"""
+# Versão publicada dos dados (ver montar_dataset). Cada recarga monta um
+# dataset novo e troca a referência de uma só vez; um dataset publicado nunca é
+# alterado, e cada requisição fixa o seu em g.dataset, então nenhuma leitura
+# vê um estado parcial ou vazio durante a recarga.
+dataset_atual = None
+
+# Recargas em segundo plano, por id, para consulta em /recarregar-dados/<id>
+trabalhos_recarga = OrderedDict()
+MAX_TRABALHOS_RECARGA = 20
+trava_recarga = threading.Lock()
+# Recarga pedida enquanto outra executava: (arquivo_excel, propagar), iniciada
+# quando a atual termina (ver iniciar_recarga)
+recarga_pendente = None
+
+# Versões anteriores dos dados mantidas para /<nome_ies>/mudancas (ver
+# mudancas.py). 0 desativa.
+HISTORICO_VERSOES = int(os.environ.get('HISTORICO_VERSOES', '5'))
+historico_versoes = HistoricoVersoes(HISTORICO_VERSOES)
+
+# Respostas montadas a cada requisição (consultas parciais e /buscar), em
+# cache com cálculo único por chave e revalidação em segundo plano (ver
+# cache_respostas.py). CACHE_RESPOSTAS_MB=0 desativa.
+cache_respostas = CacheRespostas(
+    int(float(os.environ.get('CACHE_RESPOSTAS_MB', '64')) * 1024 * 1024),
+    float(os.environ.get('CACHE_RESPOSTAS_TTL', '300')),
+    janela_revalidacao=float(os.environ.get('CACHE_RESPOSTAS_REVALIDACAO', '60')),
+)
+
+# Carga inicial dos dados, feita uma única vez por processo (ver criar_app).
+# Servido sem a fábrica, o app faz a carga nesta thread (ver fixar_dataset)
+trava_carga_inicial = threading.Lock()
+thread_carga_inicial = None
+
+# Geração dos dados compartilhada entre os workers do gunicorn: um arquivo com
+# um número que cada recarga concluída incrementa. Os demais processos
+# verificam o arquivo a cada INTERVALO_VERIFICACAO_GERACAO segundos (durante as
+# requisições) e recarregam quando a geração passa da que já aplicaram. Vazio
+# desativa; o gunicorn.conf.py define um arquivo por instância do servidor.
+ARQUIVO_GERACAO_DADOS = os.environ.get('ARQUIVO_GERACAO_DADOS', '')
+INTERVALO_VERIFICACAO_GERACAO = float(os.environ.get('INTERVALO_VERIFICACAO_GERACAO', '1'))
+geracao_dados = 0
+proxima_verificacao_geracao = 0.0
+
+def contar_operacoes_cache():
+    """Acertos, falhas e gravações do backend de cache, se ele as conta"""
+    backend = cache.cache
+    if not hasattr(backend, 'estatisticas'):
+        return None
+    estatisticas = backend.estatisticas()
+    return {
+        ('acerto',): estatisticas['acertos'],
+        ('falha',): estatisticas['falhas'],
+        ('gravacao',): estatisticas['gravacoes'],
+    }
+
+def contar_operacoes_cache_respostas():
+    """Resultados das consultas ao cache de respostas montadas por requisição"""
+    estatisticas = cache_respostas.estatisticas()
+    return {(resultado,): estatisticas[resultado] for resultado in cache_respostas.contagens}
+
+def medir_dados_publicados():
+    """
+    Número de IES e de aulas e bytes das respostas JSON (sem compressão) do
+    dataset atual; na carga sob demanda, das IES em memória
+    """
+    dataset = dataset_atual
+    if dataset is None:
+        return None
+    if dataset['registro']:
+        preparadas = dataset['registro'].preparadas()
+        respostas = [preparada['respostas'] for preparada in preparadas]
+        buscas = [preparada['busca'] for preparada in preparadas]
+    else:
+        respostas = list(dataset['respostas'].values())
+        buscas = list(dataset['buscas'].values())
+    return {
+        ('ies',): len(respostas),
+        ('aulas',): sum(len(busca.aulas) for busca in buscas),
+        ('bytes_respostas',): sum(len(payload['corpo']) for respostas_ies in respostas for payload in respostas_ies.values()),
+    }
+
+def contar_problemas_dados():
+    """Problemas dos relatórios de qualidade do dataset atual, por tipo"""
+    dataset = dataset_atual
+    if dataset is None:
+        return None
+    if dataset['registro']:
+        relatorios = [preparada['relatorio'] for preparada in dataset['registro'].preparadas()]
+    else:
+        relatorios = list(dataset['relatorios'].values())
+    problemas = {}
+    for relatorio in relatorios:
+        for (tipo, _), (total, _) in relatorio.problemas.items():
+            problemas[(tipo,)] = problemas.get((tipo,), 0) + total
+    return problemas
+
+metricas.contador(
+    'api_guias_cache_operacoes_total', 'Consultas e gravações no cache do Flask-Caching', ('resultado',),
+    funcao=contar_operacoes_cache,
+)
+metricas.contador(
+    'api_guias_cache_respostas_total',
+    'Consultas ao cache das consultas parciais e buscas: acerto, desatualizado (servida enquanto revalida), '
+    'agrupado (esperou o cálculo de outra requisição), falha, descarte (LRU) e erro_revalidacao '
+    '(recálculo em segundo plano que falhou; ver o log)', ('resultado',),
+    funcao=contar_operacoes_cache_respostas,
+)
+metricas.medidor(
+    'api_guias_cache_respostas', 'Entradas e bytes guardados no cache das consultas parciais e buscas', ('medida',),
+    funcao=lambda: {(medida,): valor for medida, valor in cache_respostas.estatisticas().items() if medida in ('entradas', 'bytes')},
+)
+metricas.medidor(
+    'api_guias_dados', 'Tamanho dos dados publicados (na carga sob demanda, das IES em memória)', ('medida',),
+    funcao=medir_dados_publicados,
+)
+metricas.medidor(
+    'api_guias_dados_versao', 'Versão dos dados publicada neste processo',
+    funcao=lambda: dataset_atual['versao'] if dataset_atual else 0,
+)
+metricas.medidor(
+    'api_guias_dados_geracao', 'Geração dos dados compartilhada entre os workers (ARQUIVO_GERACAO_DADOS)',
+    funcao=lambda: geracao_dados,
+)
+metricas.medidor(
+    'api_guias_ies_catalogadas', 'IES disponíveis na carga sob demanda, carregadas ou não',
+    funcao=lambda: len(dataset_atual['registro'].catalogo) if dataset_atual and dataset_atual['registro'] else None,
+)
+metricas.medidor(
+    'api_guias_problemas_dados', 'Problemas encontrados na planilha pela validação da ingestão (ver /relatorio-dados)', ('tipo',),
+    funcao=contar_problemas_dados,
+)
+metricas.medidor('api_guias_info', 'Processo que respondeu a coleta', ('processo',), funcao=lambda: {(os.getpid(),): 1})
+
+def concluir_etapa(etapa, inicio, mensagem=None, *argumentos):
+    """
+    Registra a duração de uma etapa da carga dos dados iniciada em inicio
+    (time.perf_counter) e, com uma mensagem, também no log; a duração em ms é
+    o último argumento da mensagem
+    """
+    duracao = time.perf_counter() - inicio
+    HISTOGRAMA_ETAPAS_CARGA.observar(etapa, valor=duracao)
+    if mensagem:
+        logger.info(mensagem, *argumentos, duracao * 1000, extra={'etapa': etapa, 'duracao_ms': round(duracao * 1000, 1)})
+    return duracao
+
+def reiniciar_estado_apos_fork():
+    """
+    No processo filho (ex.: worker do gunicorn em modo preload) só continua a
+    thread que chamou o fork: as travas podem ter sido copiadas fechadas e as
+    recargas em andamento no processo pai nunca terminam no filho
+    """
+    global trava_recarga, trava_carga_inicial, recarga_pendente, thread_carga_inicial
+    trava_recarga = threading.Lock()
+    trava_carga_inicial = threading.Lock()
+    recarga_pendente = None
+    if dataset_atual is None:
+        thread_carga_inicial = None
+    for job_id in [job_id for job_id, trabalho in trabalhos_recarga.items() if trabalho['status'] == 'executando']:
+        del trabalhos_recarga[job_id]
+    if dataset_atual and dataset_atual['registro']:
+        dataset_atual['registro'].reiniciar_travas()
+    historico_versoes.reiniciar_trava()
+    cache_respostas.reiniciar_trava()
+    metricas.reiniciar_travas()
+
+os.register_at_fork(after_in_child=reiniciar_estado_apos_fork)
+
+# Cache-Control das respostas de conteúdo, para que navegadores e CDNs possam
+# guardá-las (a revalidação usa o ETag)
+CACHE_CONTROL = os.environ.get('CACHE_CONTROL', 'public, max-age=300')
+
+# Codificações das variantes comprimidas, em ordem de preferência do servidor
+CODIFICACOES_SUPORTADAS = ['br', 'gzip']
+
+# Diretório onde ficam os arquivos Excel (vazio = diretório atual)
+DIRETORIO_DADOS = os.environ.get('DIRETORIO_DADOS', '')
+
+# Observação dos arquivos Excel: com OBSERVAR_ARQUIVOS=1 uma thread verifica o
+# diretório de dados a cada INTERVALO_OBSERVACAO segundos e recarrega os dados
+# quando os arquivos ficam ESPERA_ESTABILIZACAO segundos sem mudar
+OBSERVAR_ARQUIVOS = os.environ.get('OBSERVAR_ARQUIVOS', '0') == '1'
+INTERVALO_OBSERVACAO = float(os.environ.get('INTERVALO_OBSERVACAO', '2'))
+ESPERA_ESTABILIZACAO = float(os.environ.get('ESPERA_ESTABILIZACAO', '2'))
+
+# Modo de leitura do Excel: 'streaming' (somente leitura, uma passada por aba)
+# ou 'completo' (carrega a planilha inteira em memória)
+MODO_LEITURA_EXCEL = os.environ.get('MODO_LEITURA_EXCEL', 'streaming')
+
+# Armazenamento dos dados de cada IES em memória: 'dicionarios' (dicionários
+# aninhados) ou 'colunar' (textos deduplicados e colunas de inteiros, ver
+# dados_colunares.py). As respostas da API são as mesmas nos dois modos.
+ARMAZENAMENTO_DADOS = os.environ.get('ARMAZENAMENTO_DADOS', 'dicionarios')
+
+# Célula de texto compartilhado no XML de uma aba: <c r="A1" t="s"><v>12</v></c>
+RE_CELULA_TEXTO_COMPARTILHADO = re.compile(rb'<(?:\w+:)?c\b[^>]*\bt="s"[^>]*>\s*<(?:\w+:)?v>(\d+)</')
+
+# Consultas parciais nas rotas de conteúdo: paginação das matérias
+# (offset/limit ou cursor), projeção dos campos das aulas (fields) e
+# profundidade da hierarquia (depth: 1 = matérias ... 4 = aulas)
+PARAMETROS_CONSULTA_PARCIAL = ('offset', 'limit', 'cursor', 'fields', 'depth')
+LIMITE_PAGINA_PADRAO = 50
+LIMITE_PAGINA_MAXIMO = 500
+PROFUNDIDADE_MAXIMA = 4
+
+# Número de resultados retornados por /buscar (parâmetro limit)
+LIMITE_BUSCA_PADRAO = 20
+LIMITE_BUSCA_MAXIMO = 100
+
+# Número máximo de consultas (IES e semestre) em uma requisição a /lote
+LIMITE_LOTE = 200
+
+# Número de processos usados para processar as abas em paralelo (uma aba por
+# IES). Com 0 ou 1 as abas são processadas em série no processo atual.
+WORKERS_INGESTAO = int(os.environ.get('WORKERS_INGESTAO', '0'))
+
+# Diretório onde o resultado do processamento da planilha é gravado para que
+# as próximas inicializações não precisem processar o Excel de novo. Vazio
+# desativa o snapshot.
+DIRETORIO_SNAPSHOT = os.environ.get('DIRETORIO_SNAPSHOT', '.snapshot')
+
+# Diretório do arquivo com as respostas pré-serializadas de todas as IES, que
+# cada worker mapeia em memória em vez de manter a sua própria cópia (ver
+# respostas_mapeadas.py). Em /dev/shm o arquivo fica em memória compartilhada.
+# Vazio desativa.
+DIRETORIO_RESPOSTAS_MAPEADAS = os.environ.get('DIRETORIO_RESPOSTAS_MAPEADAS', '')
+
+# Arquivo JSON com a lista das planilhas a usar (ex.: ["grupo_a.xlsx",
+# "grupo_b.xlsx"] ou {"planilhas": [...]}, caminhos relativos ao manifesto), no
+# lugar dos arquivos Excel do diretório de dados. Vazio usa o diretório.
+MANIFESTO_PLANILHAS = os.environ.get('MANIFESTO_PLANILHAS', '')
+
+# Carga sob demanda (ver registro_ies.py): com CARGA_SOB_DEMANDA=1 as abas de
+# todas as planilhas são catalogadas na inicialização, mas cada IES só é
+# processada no primeiro pedido. No máximo MAX_IES_CARREGADAS IES ficam em
+# memória (0 = sem limite); as de IES_PRE_CARREGADAS (separadas por vírgula)
+# são carregadas já na inicialização.
+CARGA_SOB_DEMANDA = os.environ.get('CARGA_SOB_DEMANDA', '0') == '1'
+MAX_IES_CARREGADAS = int(os.environ.get('MAX_IES_CARREGADAS', '50'))
+IES_PRE_CARREGADAS = [ies.strip() for ies in os.environ.get('IES_PRE_CARREGADAS', '').split(',') if ies.strip()]
+
+# Incrementar quando a estrutura de dados_ies mudar, invalidando snapshots antigos
+VERSAO_SNAPSHOT = 3
+
+# Campos que toda linha precisa ter para virar uma aula
+CAMPOS_OBRIGATORIOS = ['semestre', 'materia', 'tema', 'subtema', 'aula']
+
+# Mapeamento dos campos de saída para os cabeçalhos da planilha. Uma string
+# exige cabeçalho igual (sem diferenciar maiúsculas) e uma lista exige que todas
+# as palavras apareçam no cabeçalho. Campos além dos obrigatórios entram no
+# objeto da aula; novas colunas de link podem ser adicionadas pela variável de
+# ambiente MAPEAMENTO_COLUNAS, ex.: '{"link_resumo": ["link", "resumo"]}'
+MAPEAMENTO_COLUNAS_PADRAO = {
+    'semestre': 'Semestre',
+    'materia': 'Materia',
+    'tema': 'Tema',
+    'subtema': 'Subtema',
+    'aula': 'Aula',
+    'link_aula': ['link', 'aula'],
+    'link_pdf': ['link', 'pdf'],
+    'link_quiz': ['link', 'quiz'],
+}
+
+def ler_manifesto_planilhas():
+    """Caminhos das planilhas listadas em MANIFESTO_PLANILHAS"""
+    try:
+        with open(MANIFESTO_PLANILHAS, encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error("Erro ao ler o manifesto de planilhas %s: %s", MANIFESTO_PLANILHAS, e)
+        return []
+    if isinstance(manifesto, dict):
+        manifesto = manifesto.get('planilhas', [])
+    base = os.path.dirname(os.path.abspath(MANIFESTO_PLANILHAS))
+    return [os.path.join(base, caminho) for caminho in manifesto]
+
+def listar_arquivos_excel():
+    """
+    Lista os arquivos Excel do manifesto, na ordem em que aparecem nele, ou os
+    do diretório de dados, por extensão e nome
+    """
+    if MANIFESTO_PLANILHAS:
+        return ler_manifesto_planilhas()
+    arquivos_excel = []
     # Procurar por arquivos Excel com várias extensões possíveis
     extensoes = ['*.xlsx', '*.xls']
     for extensao in extensoes:
-        arquivos = glob.glob(extensao)
-        if arquivos:
-            return arquivos[0]
-    return None
+        arquivos = sorted(glob.glob(os.path.join(DIRETORIO_DADOS, extensao)))
+        # Ignorar os arquivos temporários que o Excel cria enquanto edita (~$nome.xlsx)
+        arquivos_excel.extend(a for a in arquivos if not os.path.basename(a).startswith('~$'))
+    return arquivos_excel
+
+def encontrar_arquivo_excel():
+    """Encontra o arquivo Excel no diretório de dados (por padrão, o atual)"""
+    arquivos = listar_arquivos_excel()
+    return arquivos[0] if arquivos else None
+
+def assinatura_arquivos_excel():
+    """Identifica o estado atual dos arquivos Excel pelo nome, data e tamanho"""
+    assinatura = []
+    # Editar o manifesto também muda o conjunto de planilhas
+    arquivos = [MANIFESTO_PLANILHAS] if MANIFESTO_PLANILHAS else []
+    for arquivo in arquivos + listar_arquivos_excel():
+        try:
+            estat = os.stat(arquivo)
+        except OSError:
+            continue
+        assinatura.append((arquivo, estat.st_mtime_ns, estat.st_size))
+    return tuple(assinatura)
+
+def observar_arquivos_excel():
+    """
+    Verifica periodicamente os arquivos Excel do diretório de dados e inicia uma
+    recarga quando eles mudam. Só recarrega depois que o arquivo fica
+    ESPERA_ESTABILIZACAO segundos sem mudar, para que uma cópia ou um salvamento
+    em várias escritas gere uma única recarga.
+    """
+    assinatura = assinatura_arquivos_excel()
+    while True:
+        time.sleep(INTERVALO_OBSERVACAO)
+        atual = assinatura_arquivos_excel()
+        if atual == assinatura:
+            continue
+        
+        estavel_desde = time.monotonic()
+        while time.monotonic() - estavel_desde < ESPERA_ESTABILIZACAO:
+            time.sleep(min(INTERVALO_OBSERVACAO, ESPERA_ESTABILIZACAO))
+            nova = assinatura_arquivos_excel()
+            if nova != atual:
+                atual = nova
+                estavel_desde = time.monotonic()
+        
+        assinatura = atual
+        arquivo_excel = encontrar_arquivo_excel()
+        if arquivo_excel:
+            logger.info("Mudança detectada nos arquivos Excel, recarregando: %s", arquivo_excel)
+            iniciar_recarga(arquivo_excel)
+
+def iniciar_observador_arquivos():
+    """Inicia a verificação dos arquivos Excel em uma thread em segundo plano"""
+    thread = threading.Thread(target=observar_arquivos_excel, name='observador-excel', daemon=True)
+    thread.start()
+    logger.info("Observando mudanças nos arquivos Excel a cada %ss", INTERVALO_OBSERVACAO)
+    return thread
 
-def processar_arquivo_excel(nome_arquivo):
+def carregar_mapeamento_colunas():
+    """
+    Retorna o mapeamento de colunas padrão combinado com o configurado na
+    variável de ambiente MAPEAMENTO_COLUNAS (JSON no mesmo formato)
+    """
+    mapeamento = dict(MAPEAMENTO_COLUNAS_PADRAO)
+    configurado = os.environ.get('MAPEAMENTO_COLUNAS')
+    if configurado:
+        try:
+            mapeamento.update(json.loads(configurado))
+        except ValueError as e:
+            logger.warning("MAPEAMENTO_COLUNAS inválido, usando o padrão: %s", e)
+    return mapeamento
+
+def cabecalho_corresponde(header_lower, regra):
+    """Verifica se um cabeçalho (em minúsculas) atende à regra de um campo"""
+    if isinstance(regra, str):
+        return header_lower == regra.lower()
+    return all(palavra.lower() in header_lower for palavra in regra)
+
+def compilar_plano_colunas(ies, headers, mapeamento=None):
+    """
+    Resolve uma única vez por aba o índice da coluna de cada campo de saída.
+    Campos sem coluna correspondente apontam para len(headers), posição que as
+    linhas sempre têm vazia depois de completadas em processar_linhas_ies.
+    """
+    mapeamento = mapeamento or carregar_mapeamento_colunas()
+    headers_lower = [header.lower() for header in headers]
+    coluna_vazia = len(headers)
+    plano = {}
+    usadas = set()
+    
+    # Cada coluna é atribuída a um único campo, respeitando a ordem do
+    # mapeamento (ex.: "Link Aula PDF" vira link_aula e não link_pdf)
+    for campo, regra in mapeamento.items():
+        plano[campo] = coluna_vazia
+        for idx, header_lower in enumerate(headers_lower):
+            if idx not in usadas and cabecalho_corresponde(header_lower, regra):
+                plano[campo] = idx
+                usadas.add(idx)
+                break
+        if plano[campo] == coluna_vazia and campo in CAMPOS_OBRIGATORIOS:
+            logger.warning("Coluna '%s' não encontrada na IES %s", campo, ies, extra={'ies': ies})
+    
+    return plano
+
+def processar_arquivo_excel(nome_arquivo, modo_leitura=None, workers=None, abas_reaproveitadas=None, relatorios=None):
     """
     Processa o arquivo Excel e retorna um dicionário com os dados de todas as IES
-    usando openpyxl em vez de pandas
+    usando openpyxl em vez de pandas.
+    
+    No modo 'streaming' (padrão) a planilha é aberta somente para leitura e cada
+    aba é percorrida uma única vez com iter_rows(values_only=True), com memória
+    de leitura constante. No modo 'completo' a planilha inteira é carregada.
+    Com workers > 1 as abas são distribuídas entre processos.
+    
+    As IES presentes em abas_reaproveitadas (dados de abas que não mudaram desde
+    a carga anterior) entram no resultado sem que suas abas sejam processadas.
+    Com o dicionário relatorios, o relatório de qualidade de cada aba
+    processada é guardado nele.
     """
+    modo = modo_leitura or MODO_LEITURA_EXCEL
+    workers = WORKERS_INGESTAO if workers is None else workers
+    abas_reaproveitadas = abas_reaproveitadas or {}
     try:
-        print(f"Processando arquivo: {nome_arquivo}")
-        # Carregar o arquivo Excel
-        wb = openpyxl.load_workbook(nome_arquivo, data_only=True)
-        ies_abas = wb.sheetnames
+        logger.info("Processando arquivo (%s): %s", modo, nome_arquivo)
+        mapeamento = carregar_mapeamento_colunas()
         
-        print(f"Abas encontradas: {ies_abas}")
-        dados_processados = {}
+        if workers > 1:
+            return processar_abas_em_paralelo(nome_arquivo, modo, mapeamento, workers, abas_reaproveitadas, relatorios)
         
-        for ies in ies_abas:
-            print(f"Processando IES: {ies}")
-            # Obter a aba
-            sheet = wb[ies]
+        inicio = time.perf_counter()
+        wb = openpyxl.load_workbook(nome_arquivo, read_only=(modo != 'completo'), data_only=True)
+        concluir_etapa('abertura_planilha', inicio)
+        try:
+            ies_abas = wb.sheetnames
+            logger.debug("Abas encontradas: %s", ies_abas)
+            dados_processados = {}
             
-            # Encontrar os cabeçalhos
-            headers = []
-            for col in range(1, sheet.max_column + 1):
-                cell_value = sheet.cell(row=1, column=col).value
-                headers.append(str(cell_value).strip() if cell_value is not None else f"Coluna{col}")
+            for ies in ies_abas:
+                if ies in abas_reaproveitadas:
+                    dados_processados[ies] = abas_reaproveitadas[ies]
+                    continue
+                logger.debug("Processando IES: %s", ies)
+                inicio = time.perf_counter()
+                linhas = wb[ies].iter_rows(values_only=True)
+                dados_processados[ies] = processar_linhas_ies(ies, linhas, mapeamento, relatorios)
+                concluir_etapa('aba', inicio)
             
-            print(f"Cabeçalhos encontrados: {headers}")
+            return dados_processados
+        finally:
+            # No modo somente leitura o arquivo fica aberto até o close
+            wb.close()
+        
+    except Exception as e:
+        logger.exception("Erro ao processar arquivo Excel: %s", e)
+        return {}
+
+def processar_abas_em_paralelo(nome_arquivo, modo, mapeamento, workers, abas_reaproveitadas, relatorios=None):
+    """
+    Distribui as abas (uma por IES) entre um pool de processos, cada um abrindo
+    a planilha e processando uma única aba. O resultado mantém a ordem das abas,
+    sendo idêntico ao do processamento serial.
+    """
+    inicio = time.perf_counter()
+    wb = openpyxl.load_workbook(nome_arquivo, read_only=True)
+    ies_abas = wb.sheetnames
+    wb.close()
+    concluir_etapa('abertura_planilha', inicio)
+    logger.debug("Abas encontradas: %s", ies_abas)
+    
+    abas_processar = [ies for ies in ies_abas if ies not in abas_reaproveitadas]
+    processadas = {}
+    if abas_processar:
+        max_workers = min(workers, len(abas_processar))
+        logger.info("Processando %d abas com %d processos", len(abas_processar), max_workers)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=inicializar_processo_ingestao,
+            initargs=(nome_arquivo, modo, mapeamento),
+        ) as executor:
+            for ies, (dados_ies, duracao, relatorio) in zip(abas_processar, executor.map(processar_aba_excel, abas_processar)):
+                processadas[ies] = dados_ies
+                if relatorios is not None:
+                    relatorios[ies] = relatorio
+                # Medida no processo do pool, registrada aqui
+                HISTOGRAMA_ETAPAS_CARGA.observar('aba', valor=duracao)
+    
+    return {
+        ies: abas_reaproveitadas[ies] if ies in abas_reaproveitadas else processadas[ies]
+        for ies in ies_abas
+    }
+
+# Planilha aberta uma única vez por processo do pool de ingestão, evitando
+# reler a tabela de textos compartilhados do arquivo a cada aba
+_planilha_processo = None
+_mapeamento_processo = None
+
+def inicializar_processo_ingestao(nome_arquivo, modo, mapeamento):
+    """Abre a planilha no processo do pool antes de receber as abas"""
+    global _planilha_processo, _mapeamento_processo
+    _planilha_processo = openpyxl.load_workbook(nome_arquivo, read_only=(modo != 'completo'), data_only=True)
+    _mapeamento_processo = mapeamento
+
+def processar_aba_excel(ies):
+    """
+    Processa uma única aba do arquivo Excel (executada nos processos do pool)
+    e retorna os dados, a duração do processamento e o relatório de qualidade
+    """
+    logger.debug("Processando IES: %s", ies)
+    inicio = time.perf_counter()
+    linhas = _planilha_processo[ies].iter_rows(values_only=True)
+    relatorios = {}
+    dados = processar_linhas_ies(ies, linhas, _mapeamento_processo, relatorios)
+    return dados, time.perf_counter() - inicio, relatorios[ies]
+
+@contextmanager
+def coletor_ciclos_pausado():
+    """
+    Pausa o coletor de ciclos enquanto uma estrutura grande e sem ciclos é
+    montada: cada dicionário ou lista alocado conta para disparar uma coleta,
+    e as coletas percorreriam de novo os objetos já criados.
+    
+    O gc.disable vale para o processo inteiro, então a pausa só acontece na
+    carga inicial, antes de haver dados publicados (e requisições sendo
+    atendidas). Nas recargas em segundo plano e na carga sob demanda o coletor
+    continua ativo para as threads das requisições. O estado anterior do
+    coletor é restaurado.
+    """
+    pausar = dataset_atual is None and gc.isenabled()
+    if pausar:
+        gc.disable()
+    try:
+        yield
+    finally:
+        if pausar:
+            gc.enable()
+
+@coletor_ciclos_pausado()
+def processar_linhas_ies(ies, linhas, mapeamento=None, relatorios=None):
+    """
+    Monta a estrutura hierárquica de uma IES a partir de um iterador de linhas
+    (tuplas de valores), sendo a primeira linha a dos cabeçalhos, já no formato
+    das respostas da API: {semestre: [{'materia', 'temas': [{'tema',
+    'subtemas': [{'subtema', 'aulas': [aula]}]}]}]}. Na mesma
+    passada as linhas são validadas (campos obrigatórios vazios, links que não
+    são URLs, aulas duplicadas); com o dicionário relatorios, o relatório de
+    qualidade da IES é guardado nele (ver qualidade.py).
+    """
+    cabecalho = next(linhas, None) or ()
+    headers = []
+    for col, cell_value in enumerate(cabecalho, start=1):
+        headers.append(str(cell_value).strip() if cell_value is not None else f"Coluna{col}")
+    
+    logger.debug("Cabeçalhos encontrados na IES %s: %s", ies, headers)
+    
+    plano = compilar_plano_colunas(ies, headers, mapeamento)
+    campos_aula = [campo for campo in plano if campo not in CAMPOS_OBRIGATORIOS]
+    extrair_obrigatorios = itemgetter(*(plano[campo] for campo in CAMPOS_OBRIGATORIOS))
+    indices_aula = [plano[campo] for campo in campos_aula]
+    campos_link = [campo for campo in campos_aula if campo.startswith('link')]
+    
+    relatorio = RelatorioQualidade(campo for campo in CAMPOS_OBRIGATORIOS if plano[campo] == len(headers))
+    aulas_vistas = set()
+    
+    # Em modo somente leitura as abas podem não informar a dimensão, então as
+    # linhas são completadas até a largura do cabeçalho mais a coluna vazia
+    largura = len(headers) + 1
+    
+    # Estrutura hierárquica para os dados desta IES, montada em uma única
+    # passada; os dicionários auxiliares acham a lista de temas de cada matéria
+    # e a de subtemas de cada tema
+    ies_estruturada = {}
+    temas_materia = {}
+    subtemas_tema = {}
+    
+    # Processar cada linha (a primeira linha de dados é a linha 2 da planilha)
+    row = 1
+    for row, linha in enumerate(linhas, start=2):
+        try:
+            if len(linha) != largura:
+                linha = (tuple(linha) + (None,) * largura)[:largura]
             
-            # Verificar se as colunas necessárias existem
-            colunas_necessarias = ['Semestre', 'Materia', 'Tema', 'Subtema', 'Aula']
-            col_indices = {}
+            semestre_val, materia_val, tema_val, subtema_val, aula_val = extrair_obrigatorios(linha)
             
-            for col_name in colunas_necessarias:
-                found = False
-                for idx, header in enumerate(headers):
-                    if header.lower() == col_name.lower():
-                        col_indices[col_name] = idx
-                        found = True
-                        break
-                if not found:
-                    print(f"Aviso: Coluna '{col_name}' não encontrada na IES {ies}")
-                    col_indices[col_name] = -1
+            # Converter semestre para inteiro (remover .0)
+            try:
+                semestre = str(int(float(semestre_val))) if semestre_val else ""
+            except (ValueError, TypeError):
+                semestre = str(semestre_val or "").strip()
             
-            # Estrutura hierárquica para os dados desta IES
-            ies_estruturada = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+            materia = str(materia_val or "").strip()
+            tema = str(tema_val or "").strip()
+            subtema = str(subtema_val or "").strip()
+            aula = str(aula_val or "").strip()
             
-            # Processar cada linha (começando da linha 2)
-            for row in range(2, sheet.max_row + 1):
-                try:
-                    # Obter valores das células
-                    semestre_val = sheet.cell(row=row, column=col_indices['Semestre'] + 1).value
-                    materia_val = sheet.cell(row=row, column=col_indices['Materia'] + 1).value
-                    tema_val = sheet.cell(row=row, column=col_indices['Tema'] + 1).value
-                    subtema_val = sheet.cell(row=row, column=col_indices['Subtema'] + 1).value
-                    aula_val = sheet.cell(row=row, column=col_indices['Aula'] + 1).value
-                    
-                    # Converter semestre para inteiro (remover .0)
-                    try:
-                        semestre = str(int(float(semestre_val))) if semestre_val else ""
-                    except (ValueError, TypeError):
-                        semestre = str(semestre_val or "").strip()
-                    
-                    materia = str(materia_val or "").strip()
-                    tema = str(tema_val or "").strip()
-                    subtema = str(subtema_val or "").strip()
-                    aula = str(aula_val or "").strip()
-                    
-                    # Obter links se existirem
-                    link_aula = ""
-                    link_pdf = ""
-                    link_quiz = ""
-                    
-                    # Procurar por colunas de links
-                    for idx, header in enumerate(headers):
-                        cell_val = sheet.cell(row=row, column=idx + 1).value
-                        if cell_val is None:
-                            continue
-                            
-                        header_lower = header.lower()
-                        if "link" in header_lower and "aula" in header_lower:
-                            link_aula = str(cell_val or "").strip()
-                        elif "link" in header_lower and "pdf" in header_lower:
-                            link_pdf = str(cell_val or "").strip()
-                        elif "link" in header_lower and "quiz" in header_lower:
-                            link_quiz = str(cell_val or "").strip()
-                    
-                    # Pular linhas com dados essenciais faltantes
-                    if not all([semestre, materia, tema, subtema, aula]):
-                        continue
-                    
-                    # Criar objeto de aula
-                    aula_obj = {
-                        'nome': aula,
-                        'link_aula': link_aula if link_aula else None,
-                        'link_pdf': link_pdf if link_pdf else None,
-                        'link_quiz': link_quiz if link_quiz else None
-                    }
-                    
-                    # Adicionar à estrutura hierárquica
-                    ies_estruturada[semestre][materia][tema].append({
-                        'subtema': subtema,
-                        'aula': aula_obj
-                    })
-                    
-                except Exception as e:
-                    print(f"Erro ao processar linha {row} na IES {ies}: {e}")
-                    continue
+            obrigatorios = (semestre, materia, tema, subtema, aula)
             
-            # Converter defaultdict para dict regular e organizar a estrutura
-            ies_estruturada_final = {}
-            for semestre, materias in ies_estruturada.items():
-                semestre_dict = {}
-                for materia, temas in materias.items():
-                    materia_dict = {}
-                    for tema, subtemas in temas.items():
-                        materia_dict[tema] = subtemas
-                    semestre_dict[materia] = materia_dict
-                ies_estruturada_final[semestre] = semestre_dict
+            # Pular linhas com dados essenciais faltantes
+            if not all(obrigatorios):
+                if any(obrigatorios):
+                    relatorio.registrar('linhas_incompletas', row)
+                    for campo, valor in zip(CAMPOS_OBRIGATORIOS, obrigatorios):
+                        if not valor:
+                            relatorio.registrar('campos_vazios', row, campo)
+                else:
+                    relatorio.linhas_vazias += 1
+                continue
             
-            dados_processados[ies] = ies_estruturada_final
+            # Criar objeto de aula com os links e demais campos configurados
+            aula_obj = {'nome': aula}
+            for campo, idx in zip(campos_aula, indices_aula):
+                cell_val = linha[idx]
+                valor = str(cell_val).strip() if cell_val is not None else ""
+                aula_obj[campo] = valor if valor else None
             
-        return dados_processados
-        
+            # Links que não são URLs continuam na resposta, só entram no relatório
+            for campo in campos_link:
+                valor = aula_obj[campo]
+                if valor and not valor.startswith(PREFIXOS_URL):
+                    relatorio.registrar('links_invalidos', row, campo)
+            
+            # Só o hash das identidades já vistas: um int por aula em vez de uma
+            # tupla guardada (uma colisão só geraria um falso aviso no relatório)
+            chave_aula = hash(obrigatorios)
+            if chave_aula in aulas_vistas:
+                relatorio.registrar('aulas_duplicadas', row)
+            else:
+                aulas_vistas.add(chave_aula)
+            
+            # Adicionar à estrutura hierárquica (cada aula é um subtema com uma
+            # única aula, como nas respostas da API)
+            chave_tema = (semestre, materia, tema)
+            subtemas = subtemas_tema.get(chave_tema)
+            if subtemas is None:
+                temas = temas_materia.get((semestre, materia))
+                if temas is None:
+                    temas = temas_materia[(semestre, materia)] = []
+                    ies_estruturada.setdefault(semestre, []).append({'materia': materia, 'temas': temas})
+                subtemas = subtemas_tema[chave_tema] = []
+                temas.append({'tema': tema, 'subtemas': subtemas})
+            subtemas.append({'subtema': subtema, 'aulas': [aula_obj]})
+            relatorio.aulas += 1
+            
+        except Exception as e:
+            relatorio.registrar('erros', row)
+            logger.debug("Erro ao processar linha %s na IES %s: %s", row, ies, e, extra={'ies': ies})
+            continue
+    
+    relatorio.linhas = row - 1
+    if relatorio.problemas:
+        logger.warning(
+            "IES %s: %d linhas incompletas, %d links inválidos, %d aulas duplicadas e %d erros (ver /relatorio-dados)",
+            ies, relatorio.total('linhas_incompletas'), relatorio.total('links_invalidos'), relatorio.total('aulas_duplicadas'), relatorio.total('erros'),
+            extra={'ies': ies},
+        )
+    if relatorios is not None:
+        relatorios[ies] = relatorio
+    
+    if ARMAZENAMENTO_DADOS == 'colunar':
+        return IESColunar(ies_estruturada, campos_aula)
+    return ies_estruturada
+
+def chave_snapshot(nome_arquivo):
+    """
+    Identifica o conteúdo do arquivo Excel e a configuração usada para
+    processá-lo; o snapshot só é reaproveitado quando a chave é a mesma
+    """
+    sha256 = hashlib.sha256()
+    with open(nome_arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(bloco)
+    
+    return {
+        'versao': VERSAO_SNAPSHOT,
+        'sha256': sha256.hexdigest(),
+        'mtime': os.path.getmtime(nome_arquivo),
+        'mapeamento': carregar_mapeamento_colunas(),
+        'armazenamento': ARMAZENAMENTO_DADOS,
+    }
+
+def caminho_snapshot():
+    """Caminho do arquivo de snapshot compilado dos dados"""
+    return os.path.join(DIRETORIO_SNAPSHOT, 'dados_ies.pickle')
+
+def carregar_snapshot(chave):
+    """
+    Retorna os dados e os relatórios de qualidade do snapshot se ele
+    corresponder à chave, ou None
+    """
+    try:
+        with open(caminho_snapshot(), 'rb') as f:
+            # A chave é gravada antes dos dados para ser conferida sem carregá-los
+            if pickle.load(f) != chave:
+                return None
+            dados = pickle.load(f)
+            return dados, pickle.load(f)
+    except FileNotFoundError:
+        return None
     except Exception as e:
-        print(f"Erro ao processar arquivo Excel: {e}")
-        import traceback
-        traceback.print_exc()
-        return {}
+        logger.warning("Snapshot ignorado por erro de leitura: %s", e)
+        return None
+
+def salvar_snapshot(chave, dados, relatorios):
+    """Grava o snapshot de forma atômica (vários workers podem gravar ao mesmo tempo)"""
+    try:
+        os.makedirs(DIRETORIO_SNAPSHOT, exist_ok=True)
+        caminho = caminho_snapshot()
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, 'wb') as f:
+            pickle.dump(chave, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(dados, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(relatorios, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+    except Exception as e:
+        logger.warning("Não foi possível gravar o snapshot: %s", e)
+
+def caminho_respostas_mapeadas(chave):
+    """Caminho do arquivo de respostas correspondente à chave da planilha"""
+    # As variantes dependem de o brotli estar instalado no processo
+    identificador = hashlib.sha256(json.dumps([chave, brotli is not None], sort_keys=True).encode())
+    return os.path.join(DIRETORIO_RESPOSTAS_MAPEADAS, f"respostas-{identificador.hexdigest()[:16]}.bin")
+
+def abrir_respostas_mapeadas(chave):
+    """Retorna as respostas do arquivo mapeado da chave, se já existir, ou None"""
+    try:
+        return abrir_arquivo_respostas(caminho_respostas_mapeadas(chave))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Arquivo de respostas ignorado por erro de leitura: %s", e)
+        return None
+
+def mapear_respostas(chave, respostas):
+    """
+    Grava as respostas no arquivo compartilhado e retorna as respostas
+    mapeadas dele, que substituem as cópias deste processo. Em caso de erro
+    as respostas em memória continuam sendo usadas.
+    """
+    inicio = time.perf_counter()
+    caminho = caminho_respostas_mapeadas(chave)
+    try:
+        os.makedirs(DIRETORIO_RESPOSTAS_MAPEADAS, exist_ok=True)
+        gravar_arquivo_respostas(caminho, respostas)
+        mapeadas = abrir_arquivo_respostas(caminho)
+    except Exception as e:
+        logger.warning("Não foi possível mapear as respostas: %s", e)
+        return respostas
+    concluir_etapa('respostas_mapeadas', inicio, "Respostas gravadas e mapeadas em %.1f ms")
+    
+    # Remover o arquivo de outra versão não afeta quem já o mapeou
+    for antigo in glob.glob(os.path.join(DIRETORIO_RESPOSTAS_MAPEADAS, 'respostas-*.bin')):
+        if antigo != caminho:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+    return mapeadas
+
+def ler_textos_compartilhados(arquivo_zip, caminho):
+    """Lê a tabela de textos compartilhados do .xlsx como uma lista de bytes"""
+    textos = []
+    for _, elemento in ElementTree.iterparse(arquivo_zip.open(caminho)):
+        if elemento.tag.endswith('}si'):
+            # Textos com formatação vêm quebrados em vários <t>
+            textos.append(''.join(
+                filho.text or '' for filho in elemento.iter() if filho.tag.endswith('}t')
+            ).encode('utf-8'))
+            elemento.clear()
+    return textos
+
+def calcular_hashes_abas(nome_arquivo):
+    """
+    Calcula um hash do conteúdo de cada aba sem processar a planilha, a partir
+    das partes do .xlsx (um zip): o CRC do XML da aba, os textos compartilhados
+    que ela referencia, os CRCs das demais partes comuns (estilos, workbook) e
+    o mapeamento de colunas. Editar uma aba muda a tabela de textos do arquivo
+    inteiro, mas só muda o hash das abas que usam os textos alterados. Retorna
+    None se o arquivo não puder ser lido assim (ex.: .xls).
+    """
+    try:
+        with zipfile.ZipFile(nome_arquivo) as arquivo_zip:
+            partes = {info.filename: info for info in arquivo_zip.infolist()}
+            workbook = ElementTree.fromstring(arquivo_zip.read('xl/workbook.xml'))
+            relacoes = ElementTree.fromstring(arquivo_zip.read('xl/_rels/workbook.xml.rels'))
+            
+            def caminho_parte(destino):
+                if destino.startswith('/'):
+                    return destino.lstrip('/')
+                return posixpath.normpath(posixpath.join('xl', destino))
+            
+            destinos = {relacao.get('Id'): caminho_parte(relacao.get('Target', '')) for relacao in relacoes}
+            caminho_textos = next((
+                caminho_parte(relacao.get('Target', '')) for relacao in relacoes
+                if relacao.get('Type', '').endswith('/sharedStrings')
+            ), None)
+            
+            # docProps guarda a data de salvamento, que muda mesmo sem mudar os dados
+            comum = hashlib.sha256(json.dumps(carregar_mapeamento_colunas(), sort_keys=True).encode())
+            for nome, info in sorted(partes.items()):
+                if nome != caminho_textos and not nome.startswith(('xl/worksheets/', 'docProps/')):
+                    comum.update(f"{nome}:{info.CRC}:{info.file_size};".encode())
+            
+            textos = None
+            hashes = {}
+            for aba in workbook.iter():
+                if not aba.tag.endswith('}sheet'):
+                    continue
+                id_relacao = next((valor for chave, valor in aba.attrib.items() if chave.endswith('}id')), None)
+                caminho = destinos.get(id_relacao)
+                parte = partes.get(caminho)
+                if parte is None:
+                    return None
+                
+                hash_aba = comum.copy()
+                hash_aba.update(f"{caminho}:{parte.CRC}:{parte.file_size};".encode())
+                
+                if caminho_textos in partes:
+                    xml = arquivo_zip.read(caminho)
+                    indices = RE_CELULA_TEXTO_COMPARTILHADO.findall(xml)
+                    if len(indices) == xml.count(b't="s"'):
+                        if textos is None:
+                            textos = ler_textos_compartilhados(arquivo_zip, caminho_textos)
+                        hash_aba.update(b'\0'.join(textos[int(indice)] for indice in indices))
+                    else:
+                        # Células em um formato que a expressão não reconhece:
+                        # considera a tabela de textos inteira
+                        info = partes[caminho_textos]
+                        hash_aba.update(f"{caminho_textos}:{info.CRC}:{info.file_size}".encode())
+                
+                hashes[aba.get('name')] = hash_aba.hexdigest()
+            
+            return hashes
+    except (OSError, KeyError, IndexError, ValueError, zipfile.BadZipFile, ElementTree.ParseError):
+        return None
+
+def listar_abas_planilha(nome_arquivo):
+    """
+    Nomes das abas (IES) da planilha, lidos do workbook.xml do .xlsx sem
+    abrir as abas; outros formatos são abertos pelo openpyxl
+    """
+    try:
+        with zipfile.ZipFile(nome_arquivo) as arquivo_zip:
+            workbook = ElementTree.fromstring(arquivo_zip.read('xl/workbook.xml'))
+        return [aba.get('name') for aba in workbook.iter() if aba.tag.endswith('}sheet')]
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        wb = openpyxl.load_workbook(nome_arquivo, read_only=True)
+        try:
+            return wb.sheetnames
+        finally:
+            wb.close()
+
+def catalogar_planilhas():
+    """
+    Monta o catálogo {ies: (arquivo, identidade)} das abas de todas as
+    planilhas para a carga sob demanda. A identidade (data e tamanho do
+    arquivo) muda quando a planilha é alterada. Uma IES presente em mais de
+    uma planilha fica com a primeira.
+    """
+    catalogo = {}
+    for arquivo in listar_arquivos_excel():
+        try:
+            estat = os.stat(arquivo)
+            abas = listar_abas_planilha(arquivo)
+        except Exception as e:
+            logger.warning("Planilha %s ignorada: %s", arquivo, e)
+            continue
+        for ies in abas:
+            if ies in catalogo:
+                logger.warning("IES %s de %s ignorada, já encontrada em %s", ies, arquivo, catalogo[ies][0])
+                continue
+            catalogo[ies] = (arquivo, (estat.st_mtime_ns, estat.st_size))
+    return catalogo
+
+def carregar_ies_planilha(nome_ies, arquivo):
+    """Processa a aba de uma única IES e prepara as suas respostas (carga sob demanda)"""
+    inicio = time.perf_counter()
+    wb = openpyxl.load_workbook(arquivo, read_only=(MODO_LEITURA_EXCEL != 'completo'), data_only=True)
+    try:
+        linhas = wb[nome_ies].iter_rows(values_only=True)
+        relatorios = {}
+        dados = processar_linhas_ies(nome_ies, linhas, carregar_mapeamento_colunas(), relatorios)
+    finally:
+        wb.close()
+    preparada = dict(preparar_ies(nome_ies, dados), dados=dados, relatorio=relatorios[nome_ies])
+    concluir_etapa('ies_sob_demanda', inicio, "IES %s carregada em %.1f ms", nome_ies)
+    return preparada
+
+def carregar_dados_excel(nome_arquivo, abas_reaproveitadas=None, chave=None, relatorios=None):
+    """
+    Retorna os dados processados do arquivo Excel. Quando há um snapshot
+    compilado do mesmo arquivo ele é usado no lugar do processamento da
+    planilha; caso contrário a planilha é processada (exceto as abas em
+    abas_reaproveitadas) e o snapshot é gravado. A chave do snapshot pode ser
+    informada quando já foi calculada. Os relatórios de qualidade das abas
+    vão para o dicionário relatorios, que já pode ter os das abas
+    reaproveitadas.
+    """
+    inicio = time.perf_counter()
+    relatorios = {} if relatorios is None else relatorios
+    
+    if DIRETORIO_SNAPSHOT:
+        chave = chave or chave_snapshot(nome_arquivo)
+        snapshot = carregar_snapshot(chave)
+        if snapshot is not None:
+            dados, relatorios_snapshot = snapshot
+            relatorios.update(relatorios_snapshot)
+            concluir_etapa('snapshot_leitura', inicio, "Dados carregados do snapshot em %.1f ms")
+            return dados
+    
+    dados = processar_arquivo_excel(nome_arquivo, abas_reaproveitadas=abas_reaproveitadas, relatorios=relatorios)
+    concluir_etapa('planilha', inicio, "Planilha processada em %.1f ms")
+    
+    if dados and DIRETORIO_SNAPSHOT:
+        inicio_gravacao = time.perf_counter()
+        salvar_snapshot(chave, dados, relatorios)
+        concluir_etapa('snapshot_gravacao', inicio_gravacao, "Snapshot gravado em %.1f ms")
+    
+    return dados
 
 def formatar_resposta_api(dados_ies, especifica_ies=None, semestre=None):
     """
-    Formata os dados para a resposta da API conforme a hierarquia solicitada
+    Formata os dados para a resposta da API conforme a hierarquia solicitada.
+    Os dados já estão no formato da resposta (ver processar_linhas_ies), então
+    o resultado referencia as listas de matérias de cada semestre em vez de
+    copiá-las: a resposta da IES inteira e as de cada semestre compartilham os
+    mesmos objetos, que nunca são alterados depois da ingestão. A imutabilidade
+    é uma convenção: são dicionários e listas comuns, e não MappingProxyType ou
+    tuplas, porque json e pickle (snapshot, pool de processos) os tratam
+    diretamente e congelá-los custaria uma cópia de cada nível.
     """
     resultado = {}
     
@@ -161,170 +1018,735 @@ def formatar_resposta_api(dados_ies, especifica_ies=None, semestre=None):
     ies_para_processar = {especifica_ies: dados_ies[especifica_ies]} if especifica_ies and especifica_ies in dados_ies else dados_ies
     
     for ies_nome, ies_dados in ies_para_processar.items():
-        ies_resultado = {}
-        
         # Filtrar por semestre se fornecido
         if semestre and semestre in ies_dados:
-            semestres_para_processar = {semestre: ies_dados[semestre]}
+            resultado[ies_nome] = {semestre: ies_dados[semestre]}
         else:
-            semestres_para_processar = ies_dados
-        
-        for semestre_nome, semestre_dados in semestres_para_processar.items():
-            semestre_resultado = []
-            
-            for materia, temas in semestre_dados.items():
-                materia_dict = {
-                    'materia': materia,
-                    'temas': []
-                }
-                
-                for tema, subtemas in temas.items():
-                    tema_dict = {
-                        'tema': tema,
-                        'subtemas': []
-                    }
-                    
-                    for subtema_info in subtemas:
-                        subtema_dict = {
-                            'subtema': subtema_info['subtema'],
-                            'aulas': [subtema_info['aula']]
-                        }
-                        tema_dict['subtemas'].append(subtema_dict)
-                    
-                    materia_dict['temas'].append(tema_dict)
-                
-                semestre_resultado.append(materia_dict)
-            
-            ies_resultado[semestre_nome] = semestre_resultado
-        
-        resultado[ies_nome] = ies_resultado
+            resultado[ies_nome] = dict(ies_dados)
     
     return resultado
 
-# Endpoint raiz com informações da API
-@app.route('/')
-def home():
-    # Gerar HTML com links clicáveis para todas as IES
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>API de Conteúdos de IES</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 40px; }
-            h1 { color: #333; }
-            ul { list-style-type: none; padding: 0; }
-            li { margin: 10px 0; }
-            a { 
-                text-decoration: none; 
-                color: #0366d6; 
-                font-weight: bold; 
-                padding: 8px 12px;
-                border: 1px solid #0366d6;
-                border-radius: 4px;
-                display: inline-block;
-            }
-            a:hover { background-color: #f0f7ff; }
-            .endpoint { margin-top: 30px; }
-            .ies-list { margin-top: 20px; }
-            .warning { 
-                background-color: #fff3cd; 
-                border: 1px solid #ffeaa7; 
-                color: #856404; 
-                padding: 15px; 
-                border-radius: 5px; 
-                margin: 20px 0; 
-            }
-            .info {
-                background-color: #d1ecf1; 
-                border: 1px solid #bee5eb; 
-                color: #0c5460; 
-                padding: 15px; 
-                border-radius: 5px; 
-                margin: 20px 0; 
-            }
-            .success {
-                background-color: #d4edda; 
-                border: 1px solid #c3e6cb; 
-                color: #155724; 
-                padding: 15px; 
-                border-radius: 5px; 
-                margin: 20px 0; 
-            }
-        </style>
-    </head>
-    <body>
-        <h1>API de Conteúdos de IES</h1>
-        <p>API para acesso aos conteúdos das IES a partir de arquivo Excel.</p>
+def serializar_json(dados):
+    """Serializa os dados com as mesmas opções que o jsonify usa em produção"""
+    return (app.json.dumps(dados, separators=(",", ":")) + "\n").encode('utf-8')
+
+def criar_payload(corpo):
     """
+    Monta a resposta pré-serializada com o ETag forte derivado do conteúdo e as
+    variantes comprimidas (gzip e, se disponível, brotli), para que nenhuma
+    compressão aconteça durante as requisições
+    """
+    payload = {
+        'corpo': corpo,
+        'etag': hashlib.sha256(corpo).hexdigest()[:32],
+    }
     
-    # Verificar se há dados carregados
-    if not dados_ies:
+    # mtime=0 deixa o gzip determinístico para o mesmo conteúdo. Os níveis
+    # acima destes quase não reduzem o JSON e multiplicam o tempo de recarga.
+    variantes = {'gzip': gzip.compress(corpo, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        variantes['br'] = brotli.compress(corpo, quality=5)
+    
+    # Respostas pequenas podem ficar maiores comprimidas; nesse caso a variante
+    # é descartada e o corpo é sempre enviado sem compressão
+    for codificacao, comprimido in variantes.items():
+        if len(comprimido) < len(corpo):
+            payload[codificacao] = comprimido
+    
+    return payload
+
+def renderizar_pagina(template, **contexto):
+    """Renderiza um template HTML (ver templates/) como resposta pré-serializada"""
+    return criar_payload(app.jinja_env.get_template(template).render(**contexto).encode('utf-8'))
+
+def preparar_ies(nome_ies, dados, respostas=None):
+    """
+    Formata e serializa uma única vez as respostas JSON de uma IES (a da IES
+    inteira, chave None, e a de cada semestre) e as páginas HTML equivalentes,
+    e monta o índice de matérias usado pelas consultas paginadas e o índice de
+    busca das aulas. Respostas já serializadas (ex.: do arquivo mapeado) são
+    usadas sem serializar de novo.
+    """
+    inicio = time.perf_counter()
+    formatado = formatar_resposta_api({nome_ies: dados}, nome_ies)
+    concluir_etapa('formatacao', inicio)
+    
+    if respostas is None:
+        inicio = time.perf_counter()
+        respostas = {None: criar_payload(serializar_json(formatado))}
+        for semestre, materias in formatado[nome_ies].items():
+            respostas[semestre] = criar_payload(serializar_json({nome_ies: {semestre: materias}}))
+        concluir_etapa('serializacao', inicio)
+    
+    inicio = time.perf_counter()
+    paginas = {None: renderizar_pagina('ies.html', nome_ies=nome_ies, semestres=sorted(formatado[nome_ies]))}
+    for semestre, materias in formatado[nome_ies].items():
+        paginas[semestre] = renderizar_pagina('semestre.html', nome_ies=nome_ies, semestre=semestre, materias=materias)
+    concluir_etapa('paginas', inicio)
+    
+    inicio = time.perf_counter()
+    # Na representação colunar os índices guardam posições nas colunas, e não
+    # a árvore formatada aqui, que é descartada depois da serialização
+    aulas = dados.aulas_semestres(sorted(dados)) if isinstance(dados, IESColunar) else None
+    preparada = {
+        'respostas': respostas,
+        'paginas': paginas,
+        'indice': montar_indice_materias(dados),
+        'busca': IndiceBusca(formatado[nome_ies], aulas),
+    }
+    concluir_etapa('indices', inicio)
+    return preparada
+
+def montar_indice_materias(semestres):
+    """
+    Lista única com as matérias de todos os semestres (na ordem das respostas
+    JSON) e o intervalo de cada semestre nela, para paginar sem percorrer nem
+    filtrar a resposta completa. Na representação colunar a lista monta cada
+    matéria a partir das colunas quando uma página é lida.
+    """
+    if isinstance(semestres, IESColunar):
+        materias = semestres.materias_semestres(sorted(semestres))
+        return {'materias': materias, 'intervalos': materias.intervalos()}
+    materias = []
+    intervalos = {}
+    for semestre in sorted(semestres):
+        inicio = len(materias)
+        materias.extend((semestre, materia) for materia in semestres[semestre])
+        intervalos[semestre] = (inicio, len(materias))
+    return {'materias': materias, 'intervalos': intervalos}
+
+def montar_dataset(dados, arquivo_excel=None, versao=0, hashes_abas=None, anterior=None, respostas_prontas=None,
+                   relatorios=None):
+    """
+    Monta uma versão imutável dos dados com as respostas pré-serializadas:
+    respostas[nome_ies][None] é a da IES inteira e respostas[nome_ies][semestre]
+    a de cada semestre. As respostas e índices das IES iguais às do dataset
+    anterior são reaproveitados em vez de montados de novo, e as respostas em
+    respostas_prontas (do arquivo mapeado dos mesmos dados) têm preferência.
+    """
+    inicio = time.perf_counter()
+    respostas_prontas = respostas_prontas or {}
+    respostas = {}
+    paginas = {}
+    indices = {}
+    buscas = {}
+    for nome_ies, dados_ies in dados.items():
+        if anterior and anterior['dados'].get(nome_ies) == dados_ies:
+            respostas[nome_ies] = respostas_prontas.get(nome_ies, anterior['respostas'][nome_ies])
+            paginas[nome_ies] = anterior['paginas'][nome_ies]
+            indices[nome_ies] = anterior['indices'][nome_ies]
+            buscas[nome_ies] = anterior['buscas'][nome_ies]
+        else:
+            preparada = preparar_ies(nome_ies, dados_ies, respostas_prontas.get(nome_ies))
+            respostas[nome_ies] = preparada['respostas']
+            paginas[nome_ies] = preparada['paginas']
+            indices[nome_ies] = preparada['indice']
+            buscas[nome_ies] = preparada['busca']
+
+    if dados:
+        concluir_etapa('respostas', inicio, "Respostas pré-serializadas em %.1f ms")
+    
+    # Identifica o conteúdo publicado independente do processo que o carregou,
+    # para que workers com os mesmos dados compartilhem as entradas de cache
+    assinatura = hashlib.sha256()
+    for nome_ies, respostas_ies in respostas.items():
+        assinatura.update(f"{nome_ies}:{respostas_ies[None]['etag']};".encode())
+    
+    ultima_modificacao = None
+    if arquivo_excel and dados:
+        ultima_modificacao = datetime.fromtimestamp(os.path.getmtime(arquivo_excel), tz=timezone.utc)
+    
+    return {
+        'versao': versao,
+        'assinatura': assinatura.hexdigest()[:16],
+        'dados': dados,
+        'respostas': respostas,
+        # Páginas HTML (?format=html), com as mesmas chaves das respostas
+        'paginas': paginas,
+        # Página inicial com a lista das IES (None enquanto não há dados)
+        'pagina_inicial': renderizar_pagina('pagina_inicial.html', ies_disponiveis=sorted(dados)) if dados else None,
+        # Índice de matérias por IES para consultas paginadas e parciais
+        'indices': indices,
+        # Índice invertido das aulas por IES, usado em /buscar
+        'buscas': buscas,
+        'arquivo': arquivo_excel,
+        # Data de modificação da planilha, enviada em Last-Modified
+        'ultima_modificacao': ultima_modificacao,
+        # Hash do conteúdo de cada aba, usado na recarga incremental
+        'hashes_abas': hashes_abas or {},
+        # Relatório de qualidade de cada IES (ver qualidade.py), em /relatorio-dados
+        'relatorios': relatorios or {},
+        # Registro das IES na carga sob demanda (ver montar_dataset_sob_demanda)
+        'registro': None,
+    }
+
+def montar_dataset_sob_demanda(anterior=None):
+    """
+    Monta um dataset com as IES de todas as planilhas catalogadas, mas sem
+    processá-las: dados, respostas, indices e buscas são visões do registro,
+    que carrega cada IES no primeiro acesso. As IES já carregadas no dataset
+    anterior cuja planilha não mudou são reaproveitadas, e as de
+    IES_PRE_CARREGADAS são carregadas aqui.
+    """
+    catalogo = catalogar_planilhas()
+    if not catalogo:
+        raise ValueError("Nenhuma aba encontrada nos arquivos Excel. Verifique a estrutura dos arquivos.")
+    
+    carregadas = anterior['registro'].reaproveitaveis(catalogo) if anterior and anterior['registro'] else None
+    registro = RegistroIES(catalogo, carregar_ies_planilha, MAX_IES_CARREGADAS, carregadas)
+    logger.info("%d IES catalogadas em %d planilhas", len(catalogo), len(set(arquivo for arquivo, _ in catalogo.values())))
+    for nome_ies in IES_PRE_CARREGADAS:
+        if nome_ies not in registro:
+            logger.warning("IES %s de IES_PRE_CARREGADAS não encontrada nas planilhas", nome_ies)
+            continue
+        try:
+            registro.obter(nome_ies)
+        except Exception as e:
+            logger.warning("Não foi possível pré-carregar a IES %s: %s", nome_ies, e)
+    
+    # As respostas ainda não existem; a identidade das planilhas faz o papel
+    # dos ETags na assinatura
+    assinatura = hashlib.sha256()
+    for nome_ies, (arquivo, (mtime_ns, tamanho)) in catalogo.items():
+        assinatura.update(f"{nome_ies}:{arquivo}:{mtime_ns}:{tamanho};".encode())
+    ultima_modificacao = datetime.fromtimestamp(
+        max(mtime_ns for _, (mtime_ns, _) in catalogo.values()) / 1e9, tz=timezone.utc
+    )
+    
+    return {
+        'versao': 0,
+        'assinatura': assinatura.hexdigest()[:16],
+        'dados': VisaoRegistro(registro, 'dados'),
+        'respostas': VisaoRegistro(registro, 'respostas'),
+        'paginas': VisaoRegistro(registro, 'paginas'),
+        'pagina_inicial': renderizar_pagina('pagina_inicial.html', ies_disponiveis=sorted(catalogo)),
+        'indices': VisaoRegistro(registro, 'indice'),
+        'buscas': VisaoRegistro(registro, 'busca'),
+        'arquivo': None,
+        'ultima_modificacao': ultima_modificacao,
+        'hashes_abas': {},
+        'relatorios': VisaoRegistro(registro, 'relatorio'),
+        'registro': registro,
+    }
+
+def validar_dados(dados):
+    """Garante que o processamento gerou dados utilizáveis antes de publicá-los"""
+    if not dados:
+        raise ValueError("Erro ao processar o arquivo Excel. Verifique a estrutura do arquivo.")
+    if not any(dados_ies for dados_ies in dados.values()):
+        raise ValueError("Nenhuma aula válida encontrada no arquivo Excel. Verifique a estrutura do arquivo.")
+
+def conteudo_versao(dataset):
+    """
+    {ies: (etag, dados)} de um dataset para o histórico de versões; na carga
+    sob demanda, das IES em memória
+    """
+    if dataset['registro']:
+        return {
+            nome_ies: (preparada['respostas'][None]['etag'], preparada['dados'])
+            for nome_ies, preparada in dataset['registro'].preparadas_por_ies().items()
+        }
+    return {
+        nome_ies: (dataset['respostas'][nome_ies][None]['etag'], dados_ies)
+        for nome_ies, dados_ies in dataset['dados'].items()
+    }
+
+def publicar_dataset(dataset):
+    """
+    Torna o dataset a versão atual com uma única troca de referência e descarta
+    as entradas de cache da versão anterior, que passa ao histórico de versões
+    """
+    global dataset_atual
+    with trava_recarga:
+        anterior = dataset_atual
+        dataset['versao'] = (anterior['versao'] if anterior else 0) + 1
+        dataset_atual = dataset
+    if anterior and anterior['dados']:
+        historico_versoes.registrar(anterior['versao'], conteudo_versao(anterior))
+    # As chaves do cache já mudam com o conteúdo; limpar libera o espaço das
+    # entradas antigas (em backend compartilhado, também as dos outros workers)
+    cache.clear()
+    return dataset
+
+def carregar_dataset(arquivo_excel, anterior=None):
+    """
+    Processa a planilha e monta um dataset validado (sem publicá-lo). Com um
+    dataset anterior a recarga é incremental: as abas cujo hash de conteúdo não
+    mudou reaproveitam os dados e as respostas já prontos. Na carga sob demanda
+    as planilhas são apenas catalogadas (ver montar_dataset_sob_demanda).
+    """
+    if CARGA_SOB_DEMANDA:
+        return montar_dataset_sob_demanda(anterior)
+    
+    hashes_abas = calcular_hashes_abas(arquivo_excel)
+    abas_reaproveitadas = {}
+    relatorios = {}
+    if anterior and hashes_abas:
+        abas_reaproveitadas = {
+            ies: anterior['dados'][ies]
+            for ies, hash_aba in hashes_abas.items()
+            if ies in anterior['dados'] and anterior['hashes_abas'].get(ies) == hash_aba
+        }
+        relatorios = {ies: anterior['relatorios'][ies] for ies in abas_reaproveitadas if ies in anterior['relatorios']}
+        logger.info("Recarga incremental: %d de %d abas alteradas", len(hashes_abas) - len(abas_reaproveitadas), len(hashes_abas))
+    
+    chave = chave_snapshot(arquivo_excel) if DIRETORIO_SNAPSHOT or DIRETORIO_RESPOSTAS_MAPEADAS else None
+    dados = carregar_dados_excel(arquivo_excel, abas_reaproveitadas, chave, relatorios)
+    validar_dados(dados)
+    
+    # Outro worker (ou uma inicialização anterior) pode já ter gravado o
+    # arquivo de respostas destes dados; nesse caso nada é serializado
+    respostas_prontas = abrir_respostas_mapeadas(chave) if DIRETORIO_RESPOSTAS_MAPEADAS else None
+    dataset = montar_dataset(dados, arquivo_excel, hashes_abas=hashes_abas, anterior=anterior,
+                             respostas_prontas=respostas_prontas, relatorios=relatorios)
+    if DIRETORIO_RESPOSTAS_MAPEADAS and respostas_prontas is None:
+        dataset['respostas'] = mapear_respostas(chave, dataset['respostas'])
+    return dataset
+
+def ler_geracao_dados():
+    """Geração atual dos dados no arquivo compartilhado (0 se não existir)"""
+    try:
+        with open(ARQUIVO_GERACAO_DADOS) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def avancar_geracao_dados():
+    """Incrementa a geração compartilhada para que os outros processos recarreguem"""
+    global geracao_dados
+    geracao = ler_geracao_dados() + 1
+    temporario = f"{ARQUIVO_GERACAO_DADOS}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'w') as f:
+            f.write(str(geracao))
+        os.replace(temporario, ARQUIVO_GERACAO_DADOS)
+    except OSError as e:
+        logger.warning("Não foi possível avisar os outros processos da recarga: %s", e)
+        return
+    geracao_dados = geracao
+
+def diretorio_trabalhos_recarga():
+    """
+    Diretório com um JSON por trabalho de recarga, ao lado do arquivo de
+    geração, para que /recarregar-dados/<job_id> responda em qualquer worker
+    """
+    return f"{ARQUIVO_GERACAO_DADOS}.recargas"
+
+def gravar_trabalho_recarga(trabalho):
+    """Grava o estado do trabalho para os outros processos, mantendo os MAX_TRABALHOS_RECARGA mais recentes"""
+    if not ARQUIVO_GERACAO_DADOS:
+        return
+    diretorio = diretorio_trabalhos_recarga()
+    caminho = os.path.join(diretorio, f"{trabalho['job_id']}.json")
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        with open(temporario, 'w') as f:
+            json.dump(trabalho, f)
+        os.replace(temporario, caminho)
+        arquivos = sorted(glob.glob(os.path.join(diretorio, '*.json')), key=os.path.getmtime)
+        for antigo in arquivos[:-MAX_TRABALHOS_RECARGA]:
+            os.remove(antigo)
+    except OSError as e:
+        logger.warning("Não foi possível gravar o estado da recarga %s: %s", trabalho['job_id'], e)
+
+def ler_trabalho_recarga(job_id):
+    """Estado de um trabalho gravado por qualquer processo, ou None"""
+    if not ARQUIVO_GERACAO_DADOS or not re.fullmatch(r'[0-9a-f]{32}', job_id):
+        return None
+    try:
+        with open(os.path.join(diretorio_trabalhos_recarga(), f"{job_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def verificar_geracao_dados():
+    """
+    Inicia uma recarga neste processo se outro processo publicou uma geração
+    mais nova dos dados. O arquivo é lido no máximo uma vez a cada
+    INTERVALO_VERIFICACAO_GERACAO segundos.
+    """
+    global geracao_dados, proxima_verificacao_geracao
+    agora = time.monotonic()
+    if agora < proxima_verificacao_geracao:
+        return
+    proxima_verificacao_geracao = agora + INTERVALO_VERIFICACAO_GERACAO
+    
+    geracao = ler_geracao_dados()
+    if geracao > geracao_dados:
+        geracao_dados = geracao
         arquivo_excel = encontrar_arquivo_excel()
-        
         if arquivo_excel:
-            html += f"""
-            <div class="warning">
-                <h2>Arquivo Excel encontrado mas dados não carregados: {arquivo_excel}</h2>
-                <p>Os dados serão carregados automaticamente. Aguarde...</p>
-                <p><a href="/recarregar-dados" style="color: #fff; background-color: #28a745; padding: 10px 15px; border-radius: 4px;">Carregar Dados Agora</a></p>
-            </div>
-            """
-        else:
-            html += """
-            <div class="warning">
-                <h2>Atenção: Nenhum arquivo Excel encontrado</h2>
-                <p>Por favor, faça upload de um arquivo Excel (.xlsx ou .xls) com a estrutura correta no diretório do servidor.</p>
-                <p>Diretório atual: """ + os.getcwd() + """</p>
-            </div>
-            """
+            logger.info("Geração %d dos dados publicada por outro processo, recarregando: %s", geracao, arquivo_excel)
+            iniciar_recarga(arquivo_excel, propagar=False)
+
+def registrar_trabalho_recarga(arquivo_excel):
+    """Registra um trabalho de recarga em execução (chamada com trava_recarga)"""
+    trabalho = {
+        'job_id': uuid.uuid4().hex,
+        'status': 'executando',
+        'arquivo': arquivo_excel,
+        'iniciado_em': datetime.now(timezone.utc).isoformat(),
+    }
+    trabalhos_recarga[trabalho['job_id']] = trabalho
+    while len(trabalhos_recarga) > MAX_TRABALHOS_RECARGA:
+        trabalhos_recarga.popitem(last=False)
+    return trabalho
+
+def iniciar_recarga(arquivo_excel, propagar=True):
+    """
+    Inicia a recarga em segundo plano e retorna o trabalho correspondente. Se
+    já houver uma recarga em andamento, retorna a existente e agenda uma nova
+    para quando ela terminar: ela pode ter lido a planilha antes da mudança que
+    motivou o pedido. Vários pedidos durante a mesma recarga geram uma única
+    recarga seguinte. Com propagar, a recarga concluída é repassada aos outros
+    processos pela geração compartilhada.
+    """
+    global recarga_pendente
+    with trava_recarga:
+        for trabalho in trabalhos_recarga.values():
+            if trabalho['status'] == 'executando':
+                if recarga_pendente is not None:
+                    propagar = propagar or recarga_pendente[1]
+                recarga_pendente = (arquivo_excel, propagar)
+                return dict(trabalho)
+        trabalho = dict(registrar_trabalho_recarga(arquivo_excel))
+    
+    gravar_trabalho_recarga(trabalho)
+    threading.Thread(target=executar_recarga, args=(trabalho['job_id'], arquivo_excel, propagar), daemon=True).start()
+    return trabalho
+
+def executar_recarga(job_id, arquivo_excel, propagar=True):
+    """
+    Monta e valida o novo dataset; só o publica se tudo der certo. Ao terminar
+    inicia a recarga pedida durante a execução, se houver.
+    """
+    global recarga_pendente
+    inicio = time.perf_counter()
+    try:
+        dataset = publicar_dataset(carregar_dataset(arquivo_excel, anterior=dataset_atual))
+        HISTOGRAMA_RECARGAS.observar('sucesso', valor=time.perf_counter() - inicio)
+        if propagar and ARQUIVO_GERACAO_DADOS:
+            avancar_geracao_dados()
+        resultado = {
+            'status': 'concluido',
+            'versao': dataset['versao'],
+            'ies_carregadas': list(dataset['dados'].keys()),
+        }
+        logger.info("Recarga %s concluída: versão %d", job_id, dataset['versao'], extra={'job_id': job_id})
+    except Exception as e:
+        HISTOGRAMA_RECARGAS.observar('erro', valor=time.perf_counter() - inicio)
+        resultado = {'status': 'erro', 'erro': str(e)}
+        logger.error("Erro na recarga %s, os dados atuais foram mantidos: %s", job_id, e, extra={'job_id': job_id})
+    
+    resultado['concluido_em'] = datetime.now(timezone.utc).isoformat()
+    seguinte = None
+    with trava_recarga:
+        trabalhos_recarga[job_id].update(resultado)
+        concluido = dict(trabalhos_recarga[job_id])
+        if recarga_pendente is not None:
+            arquivo_seguinte, propagar_seguinte = recarga_pendente
+            recarga_pendente = None
+            seguinte = dict(registrar_trabalho_recarga(arquivo_seguinte))
+    
+    gravar_trabalho_recarga(concluido)
+    if seguinte:
+        gravar_trabalho_recarga(seguinte)
+        logger.info("Recarga %s pedida durante a recarga %s, iniciando", seguinte['job_id'], job_id, extra={'job_id': seguinte['job_id']})
+        threading.Thread(
+            target=executar_recarga, args=(seguinte['job_id'], arquivo_seguinte, propagar_seguinte), daemon=True,
+        ).start()
+
+def consultar_recarga(job_id):
+    """
+    Retorna uma cópia do estado do trabalho de recarga, ou None. Os trabalhos
+    de outros workers vêm do estado gravado ao lado do arquivo de geração.
+    """
+    with trava_recarga:
+        trabalho = trabalhos_recarga.get(job_id)
+        if trabalho:
+            return dict(trabalho)
+    return ler_trabalho_recarga(job_id)
+
+@app.before_request
+def iniciar_medicao_requisicao():
+    """Marca o início da requisição (antes da fixação do dataset)"""
+    g.inicio_requisicao = time.perf_counter()
+
+def rota_requisicao():
+    """Regra da rota da requisição (ex.: /<string:nome_ies>), para agrupar as métricas"""
+    return request.url_rule.rule if request.url_rule else 'desconhecida'
+
+@app.after_request
+def medir_requisicao(response):
+    """
+    Registra a duração e o tamanho da resposta. Registrada antes de
+    aplicar_get_condicional, roda depois dela e vê o status final (ex.: 304).
+    """
+    if 'inicio_requisicao' in g:
+        rota = rota_requisicao()
+        HISTOGRAMA_REQUISICOES.observar(rota, request.method, str(response.status_code),
+                                        valor=time.perf_counter() - g.inicio_requisicao)
+        # Nas respostas geradas à medida que são enviadas (ex.: /lote) o
+        # cálculo consumiria o gerador e acumularia o corpo inteiro
+        if not response.is_streamed:
+            tamanho = response.calculate_content_length()
+            if tamanho is not None:
+                HISTOGRAMA_TAMANHO_RESPOSTAS.observar(rota, valor=tamanho)
+    return response
+
+def iniciar_carga_inicial():
+    """Inicia criar_app em segundo plano, uma única vez por processo"""
+    global thread_carga_inicial
+    with trava_recarga:
+        if thread_carga_inicial is None:
+            thread_carga_inicial = threading.Thread(target=criar_app, name='carga-inicial', daemon=True)
+            thread_carga_inicial.start()
+
+@app.before_request
+def fixar_dataset():
+    """Fixa a versão dos dados usada durante toda a requisição"""
+    if dataset_atual is None:
+        # App servido sem a fábrica (ex.: gunicorn app:app): a primeira
+        # requisição de cada processo inicia a carga dos dados, e até ela
+        # terminar as requisições recebem 503 em vez de uma API sem dados.
+        # As métricas não dependem dos dados.
+        iniciar_carga_inicial()
+        if dataset_atual is None:
+            if request.endpoint == 'exportar_metricas':
+                return None
+            response = jsonify({"error": "Os dados estão sendo carregados; tente novamente em instantes"})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+    if ARQUIVO_GERACAO_DADOS:
+        verificar_geracao_dados()
+    g.dataset = dataset_atual
+    nome_ies = (request.view_args or {}).get('nome_ies')
+    g.ies = obter_ies(g.dataset, nome_ies) if nome_ies is not None else None
+
+def obter_ies(dataset, nome_ies):
+    """
+    Dados preparados de uma IES do dataset (dados, respostas, paginas e
+    indice), ou None se ela não existir. Na carga sob demanda a IES é obtida
+    do registro uma única vez: as partes usadas pela requisição vêm da mesma
+    carga, mesmo que o LRU descarte a IES no meio dela.
+    """
+    if nome_ies not in dataset['dados']:
+        return None
+    if dataset['registro']:
+        return dataset['registro'].obter(nome_ies)
+    return {
+        'dados': dataset['dados'][nome_ies],
+        'respostas': dataset['respostas'][nome_ies],
+        'paginas': dataset['paginas'][nome_ies],
+        'indice': dataset['indices'][nome_ies],
+    }
+
+def chave_cache():
+    """
+    Chave do cache das views, derivada do conteúdo do dataset da requisição:
+    com um backend compartilhado, workers com os mesmos dados reaproveitam as
+    entradas uns dos outros e dados novos nunca leem entradas antigas
+    """
+    return f"{g.dataset['assinatura']}:{request.path}"
+
+def responder_preparado(payload, mimetype='application/json'):
+    """
+    Responde com os bytes já serializados (JSON ou HTML; o Content-Length vem
+    do tamanho pronto), com ETag, Last-Modified e Cache-Control para GET
+    condicional. A variante comprimida é escolhida pelo Accept-Encoding do
+    cliente.
+    """
+    opcoes = [codificacao for codificacao in CODIFICACOES_SUPORTADAS if codificacao in payload]
+    codificacao = request.accept_encodings.best_match(opcoes + ['identity'], default='identity')
+    
+    # Em lista, os bytes são enviados como estão; o WSGI exige bytes (o worker
+    # síncrono do gunicorn recusa outros tipos), então um memoryview do
+    # arquivo mapeado é copiado aqui
+    if codificacao == 'identity':
+        response = app.response_class([bytes(payload['corpo'])], mimetype=mimetype)
+        response.set_etag(payload['etag'])
     else:
-        html += f"""
-        <div class="success">
-            <h2>Dados carregados com sucesso!</h2>
-            <p>Arquivo processado automaticamente. IES disponíveis: {len(dados_ies)}</p>
-        </div>
-        """
-    
-    html += """
-        <div class="endpoint">
-            <h2>Endpoints disponíveis:</h2>
-            <ul>
-                <li><a href="/listar-ies">/listar-ies</a> - Lista todas as IES disponíveis</li>
-                <li><code>/&lt;nome_ies&gt;</code> - Todos os conteúdos de uma IES</li>
-                <li><code>/&lt;nome_ies&gt;/&lt;semestre&gt;</code> - Conteúdos de uma IES por semestre</li>
-            </ul>
-        </div>
-    """
-    
-    # Adicionar lista de IES com links clicáveis se os dados foram carregados
-    if dados_ies:
-        html += """
-        <div class="ies-list">
-            <h2>IES Disponíveis (clique para acessar):</h2>
-            <ul>
-        """
-        
-        for ies in sorted(dados_ies.keys()):
-            html += f'<li><a href="/{ies}">{ies}</a></li>'
-        
-        html += """
-            </ul>
-        </div>
-        """
+        response = app.response_class([bytes(payload[codificacao])], mimetype=mimetype)
+        response.headers['Content-Encoding'] = codificacao
+        # Cada representação tem o seu próprio ETag forte
+        response.set_etag(f"{payload['etag']}-{codificacao}")
+    
+    response.vary.add('Accept-Encoding')
+    if g.dataset['ultima_modificacao']:
+        response.last_modified = g.dataset['ultima_modificacao']
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+@app.after_request
+def aplicar_get_condicional(response):
+    """
+    Responde 304 quando o cliente já tem a versão atual (If-None-Match ou
+    If-Modified-Since). Fica fora das views para valer também nas respostas
+    servidas pelo cache, que não passam pela view.
+    """
+    if request.method in ('GET', 'HEAD') and response.status_code == 200 and response.get_etag()[0]:
+        response.make_conditional(request)
+    
+    # Expõe a versão dos dados com que a resposta foi montada
+    if 'dataset' in g:
+        response.headers['X-Versao-Dados'] = str(g.dataset['versao'])
+    return response
+
+def consulta_parcial_solicitada():
+    """Indica se a requisição pede paginação, projeção de campos ou profundidade"""
+    return any(parametro in request.args for parametro in PARAMETROS_CONSULTA_PARCIAL)
+
+def codificar_cursor(offset, etag):
+    """Cursor opaco com a posição e a versão do conteúdo da IES"""
+    return base64.urlsafe_b64encode(f"{offset}:{etag}".encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor, etag):
+    """Retorna o offset do cursor; ValueError se for inválido ou de outra versão"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        offset, etag_cursor = texto.split(':', 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Cursor inválido")
+    if etag_cursor != etag:
+        raise ValueError("Os dados mudaram desde o início da paginação; recomece sem cursor")
+    return offset
+
+def ler_parametros_consulta_parcial(etag):
+    """Lê e valida offset/limit/cursor, fields e depth da query string"""
+    args = request.args
+    parametros = {'paginar': any(p in args for p in ('offset', 'limit', 'cursor'))}
+    
+    try:
+        parametros['limit'] = int(args.get('limit', LIMITE_PAGINA_PADRAO))
+        parametros['offset'] = int(args.get('offset', 0))
+        parametros['depth'] = int(args.get('depth', PROFUNDIDADE_MAXIMA))
+    except ValueError:
+        raise ValueError("offset, limit e depth devem ser números inteiros")
+    
+    if 'cursor' in args:
+        parametros['offset'] = decodificar_cursor(args['cursor'], etag)
+    if not 1 <= parametros['limit'] <= LIMITE_PAGINA_MAXIMO:
+        raise ValueError(f"limit deve estar entre 1 e {LIMITE_PAGINA_MAXIMO}")
+    if parametros['offset'] < 0:
+        raise ValueError("offset não pode ser negativo")
+    if not 1 <= parametros['depth'] <= PROFUNDIDADE_MAXIMA:
+        raise ValueError(f"depth deve estar entre 1 (matérias) e {PROFUNDIDADE_MAXIMA} (aulas)")
+    
+    parametros['fields'] = None
+    if args.get('fields'):
+        campos = [campo.strip() for campo in args['fields'].split(',') if campo.strip()]
+        disponiveis = ['nome'] + [c for c in carregar_mapeamento_colunas() if c not in CAMPOS_OBRIGATORIOS]
+        desconhecidos = [campo for campo in campos if campo not in disponiveis]
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos em fields: {', '.join(desconhecidos)}. Disponíveis: {', '.join(disponiveis)}")
+        parametros['fields'] = campos
     
-    html += """
-    </body>
-    </html>
+    return parametros
+
+def projetar_materia(materia, profundidade, campos):
+    """
+    Copia a matéria até a profundidade pedida (1 = matéria, 2 = temas,
+    3 = subtemas, 4 = aulas), mantendo nas aulas só os campos pedidos
+    """
+    resultado = {'materia': materia['materia']}
+    if profundidade < 2:
+        return resultado
+    
+    resultado['temas'] = []
+    for tema in materia['temas']:
+        tema_resultado = {'tema': tema['tema']}
+        if profundidade >= 3:
+            tema_resultado['subtemas'] = []
+            for subtema in tema['subtemas']:
+                subtema_resultado = {'subtema': subtema['subtema']}
+                if profundidade >= 4:
+                    subtema_resultado['aulas'] = [
+                        aula if campos is None else {campo: aula.get(campo) for campo in campos}
+                        for aula in subtema['aulas']
+                    ]
+                tema_resultado['subtemas'].append(subtema_resultado)
+        resultado['temas'].append(tema_resultado)
+    return resultado
+
+def montar_consulta_parcial(indice, nome_ies, semestre, parametros, etag_base):
     """
+    Resultado de uma consulta paginada e/ou com projeção a partir do índice de
+    matérias da IES, processando apenas as matérias da página
+    """
+    inicio, fim = indice['intervalos'][semestre] if semestre else (0, len(indice['materias']))
+    profundidade, campos = parametros['depth'], parametros['fields']
+    
+    if parametros['paginar']:
+        offset, limit = parametros['offset'], parametros['limit']
+        pagina = indice['materias'][inicio + offset:min(inicio + offset + limit, fim)]
+        proximo = offset + len(pagina)
+        return {
+            'ies': nome_ies,
+            'semestre': semestre,
+            'materias': [
+                dict(projetar_materia(materia, profundidade, campos), semestre=semestre_materia)
+                for semestre_materia, materia in pagina
+            ],
+            'paginacao': {
+                'offset': offset,
+                'limit': limit,
+                'total': fim - inicio,
+                'proximo_cursor': codificar_cursor(proximo, etag_base) if proximo < fim - inicio else None,
+            },
+        }
+    
+    semestres = {}
+    for semestre_materia, materia in indice['materias'][inicio:fim]:
+        semestres.setdefault(semestre_materia, []).append(projetar_materia(materia, profundidade, campos))
+    return {nome_ies: semestres}
+
+def responder_consulta_parcial(nome_ies, semestre=None):
+    """Responde a uma consulta parcial, montada uma única vez por conteúdo da IES e parâmetros"""
+    indice = g.ies['indice']
+    etag_base = g.ies['respostas'][None]['etag']
+    
+    try:
+        parametros = ler_parametros_consulta_parcial(etag_base)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # O resultado só depende do conteúdo da IES e dos parâmetros já validados
+    # (cursor e offset viram o mesmo offset), então a chave vale entre
+    # recargas enquanto a IES não muda
+    chave = (
+        'parcial', nome_ies, etag_base, semestre, parametros['paginar'], parametros['offset'],
+        parametros['limit'], parametros['depth'], tuple(parametros['fields'] or ()) or None,
+    )
+    corpo = cache_respostas.obter(
+        chave, lambda: serializar_json(montar_consulta_parcial(indice, nome_ies, semestre, parametros, etag_base)),
+    )
+    
+    response = app.response_class(corpo, mimetype='application/json')
+    response.set_etag(hashlib.sha256(f"{etag_base}:{request.full_path}".encode()).hexdigest()[:32])
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+# Endpoint raiz com informações da API
+@app.route('/')
+def home():
+    pagina = g.dataset['pagina_inicial']
+    if pagina is not None:
+        return responder_preparado(pagina, mimetype='text/html')
     
-    return html
+    # Sem dados carregados a página informa a planilha encontrada (ou a falta dela)
+    return app.jinja_env.get_template('pagina_inicial.html').render(
+        ies_disponiveis=[], arquivo_excel=encontrar_arquivo_excel(), diretorio=os.getcwd(),
+    )
 
 # Endpoint para listar todas las IES disponíveis
 @app.route('/listar-ies')
-@cache.cached(timeout=300)
+@cache.cached(timeout=300, key_prefix=chave_cache)
 def listar_ies():
     """Retorna a lista de todas as IES disponíveis na API"""
+    dados_ies = g.dataset['dados']
     if not dados_ies:
         return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
         
@@ -333,146 +1755,253 @@ def listar_ies():
 
 # Rota dinâmica para acessar conteúdos por IES
 @app.route('/<string:nome_ies>')
-@cache.cached(timeout=300)
 def get_conteudos_ies(nome_ies):
     """Retorna todos os conteúdos de uma IES específica"""
-    if not dados_ies:
+    if not g.dataset['dados']:
         return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
         
-    if nome_ies not in dados_ies:
+    if g.ies is None:
         return jsonify({"error": f"IES '{nome_ies}' não encontrada"}), 404
     
-    dados_formatados = formatar_resposta_api(dados_ies, nome_ies)
-    
-    # Adicionar links para semestres se quisermos uma visualização HTML
+    # Visualização HTML, renderizada junto com as respostas JSON
     if request.args.get('format') == 'html':
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Conteúdos da IES {nome_ies}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1 {{ color: #333; }}
-                ul {{ list-style-type: none; padding: 0; }}
-                li {{ margin: 10px 0; }}
-                a {{ 
-                    text-decoration: none; 
-                    color: #0366d6; 
-                    font-weight: bold; 
-                    padding: 8px 12px;
-                    border: 1px solid #0366d6;
-                    border-radius: 4px;
-                    display: inline-block;
-                }}
-                a:hover {{ background-color: #f0f7ff; }}
-                .back-link {{ margin-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <h1>Conteúdos da IES {nome_ies}</h1>
-            <p><a href="/">← Voltar para página inicial</a></p>
-            
-            <h2>Semestres disponíveis:</h2>
-            <ul>
-        """
-        
-        for semestre in sorted(dados_ies[nome_ies].keys()):
-            html += f'<li><a href="/{nome_ies}/{semestre}">Semestre {semestre}</a></li>'
-        
-        html += """
-            </ul>
-        </body>
-        </html>
-        """
-        return html
+        return responder_preparado(g.ies['paginas'][None], mimetype='text/html')
+    
+    if consulta_parcial_solicitada():
+        return responder_consulta_parcial(nome_ies)
     
-    return jsonify(dados_formatados)
+    return responder_preparado(g.ies['respostas'][None])
 
 # Rota dinâmica para acessar conteúdos por IES e semestre
 @app.route('/<string:nome_ies>/<string:semestre>')
-@cache.cached(timeout=300)
 def get_conteudos_ies_semestre(nome_ies, semestre):
     """Retorna os conteúdos de uma IES específica filtrados por semestre"""
-    if not dados_ies:
+    if not g.dataset['dados']:
         return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
         
-    if nome_ies not in dados_ies:
+    if g.ies is None:
         return jsonify({"error": f"IES '{nome_ies}' não encontrada"}), 404
     
-    if semestre not in dados_ies[nome_ies]:
+    if semestre not in g.ies['dados']:
         return jsonify({"error": f"Semestre '{semestre}' não encontrado para a IES '{nome_ies}'"}), 404
     
-    dados_formatados = formatar_resposta_api(dados_ies, nome_ies, semestre)
-    
-    # Adicionar visualização HTML se solicitado
+    # Visualização HTML, renderizada junto com as respostas JSON
     if request.args.get('format') == 'html':
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Conteúdos da IES {nome_ies} - Semestre {semestre}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1, h2 {{ color: #333; }}
-                .back-link {{ margin-bottom: 20px; }}
-                a {{ 
-                    text-decoration: none; 
-                    color: #0366d6; 
-                }}
-                a:hover {{ text-decoration: underline; }}
-                .materia {{ margin-top: 20px; border-left: 4px solid #0366d6; padding-left: 15px; }}
-                .tema {{ margin-left: 20px; }}
-                .subtema {{ margin-left: 40px; }}
-                .aula {{ margin-left: 60px; }}
-            </style>
-        </head>
-        <body>
-            <div class="back-link">
-                <a href="/{nome_ies}">← Voltar para {nome_ies}</a> | 
-                <a href="/">Página inicial</a>
-            </div>
-            
-            <h1>IES {nome_ies} - Semestre {semestre}</h1>
-        """
-        
-        for materia in dados_formatados[nome_ies][semestre]:
-            html += f'<div class="materia"><h2>{materia["materia"]}</h2></div>'
-            
-            for tema in materia["temas"]:
-                html += f'<div class="tema"><h3>{tema["tema"]}</h3></div>'
-                
-                for subtema in tema["subtemas"]:
-                    html += f'<div class="subtema"><h4>{subtema["subtema"]}</h4></div>'
-                    
-                    for aula in subtema["aulas"]:
-                        html += f'<div class="aula"><strong>{aula["nome"]}</strong>'
-                        if aula["link_aula"]:
-                            html += f' | <a href="{aula["link_aula"]}" target="_blank">Aula</a>'
-                        if aula["link_pdf"]:
-                            html += f' | <a href="{aula["link_pdf"]}" target="_blank">PDF</a>'
-                        if aula["link_quiz"]:
-                            html += f' | <a href="{aula["link_quiz"]}" target="_blank">Quiz</a>'
-                        html += '</div>'
-        
-        html += """
-        </body>
-        </html>
-        """
-        return html
+        return responder_preparado(g.ies['paginas'][semestre], mimetype='text/html')
+    
+    if consulta_parcial_solicitada():
+        return responder_consulta_parcial(nome_ies, semestre)
+    
+    return responder_preparado(g.ies['respostas'][semestre])
+
+# Aulas adicionadas, removidas e modificadas de uma IES desde uma versão anterior
+@app.route('/<string:nome_ies>/mudancas')
+def get_mudancas_ies(nome_ies):
+    """
+    Diferença entre as aulas da IES na versão desde (ETag da resposta de
+    /<nome_ies>, em qualquer codificação) e na versão atual, por semestre,
+    para clientes sincronizarem sem baixar a IES inteira. O ETag vem do
+    conteúdo e vale em qualquer worker, ao contrário do número da versão
+    (X-Versao-Dados), contado por processo. Responde 410 quando a versão já
+    saiu do histórico.
+    """
+    if not g.dataset['dados']:
+        return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
+    
+    if g.ies is None:
+        return jsonify({"error": f"IES '{nome_ies}' não encontrada"}), 404
+    
+    desde = request.args.get('desde', '').strip()
+    if not desde:
+        return jsonify({"error": "Informe no parâmetro desde o ETag da versão anterior da IES"}), 400
+    
+    versao = g.dataset['versao']
+    etag_atual = g.ies['respostas'][None]['etag']
+    # Aceita o ETag de qualquer representação (ex.: "<etag>-gzip")
+    etag_desde = normalizar_etag(desde, CODIFICACOES_SUPORTADAS)
+    if etag_desde == etag_atual:
+        mudancas = {}
+    else:
+        encontrada = historico_versoes.localizar(nome_ies, etag_desde)
+        if encontrada is None:
+            return jsonify({
+                "error": f"Versão '{desde}' indisponível para a IES '{nome_ies}'; baixe a IES completa em /{nome_ies}",
+                "versao": versao,
+                "etag": etag_atual,
+            }), 410
+        etag_anterior, dados_anteriores = encontrada
+        mudancas = historico_versoes.comparar(etag_anterior, dados_anteriores, etag_atual, g.ies['dados'])
+    
+    response = jsonify({
+        'ies': nome_ies,
+        'desde': etag_desde,
+        'versao': versao,
+        # Valor para o próximo desde, válido em qualquer worker
+        'etag': etag_atual,
+        'semestres': mudancas,
+    })
+    response.set_etag(hashlib.sha256(f"{etag_atual}:{etag_desde}".encode()).hexdigest()[:32])
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+def executar_busca(buscas, consulta, nome_ies, semestre, limite):
+    """Resultado de /buscar: os melhores resultados de cada IES, reunidos pela pontuação"""
+    total = 0
+    encontrados = []
+    for ies in ([nome_ies] if nome_ies else buscas):
+        total_ies, resultados_ies = buscas[ies].buscar(consulta, semestre, limite)
+        total += total_ies
+        encontrados.extend((pontuacao, ies, aula) for pontuacao, aula in resultados_ies)
+    
+    # Cada IES já devolve os seus melhores resultados; a ordem entre IES
+    # segue a pontuação e, no empate, a ordem em que foram encontrados
+    melhores = sorted(encontrados, key=lambda item: -item[0])[:limite]
+    return {
+        'q': consulta,
+        'total': total,
+        'resultados': [
+            {
+                'ies': ies,
+                'semestre': semestre_aula,
+                'materia': materia,
+                'tema': tema,
+                'subtema': subtema,
+                'aula': aula,
+                'pontuacao': pontuacao,
+            }
+            for pontuacao, ies, (semestre_aula, materia, tema, subtema, aula) in melhores
+        ],
+    }
+
+# Endpoint de busca de aulas por nome de matéria, tema, subtema ou aula
+@app.route('/buscar')
+def buscar():
+    """
+    Busca aulas cujos nomes (da aula ou dos grupos acima dela) contenham todos
+    os termos de q, sem diferenciar acentos e maiúsculas; o último termo também
+    casa como prefixo, para autocompletar. Filtros opcionais: ies e semestre.
+    """
+    buscas = g.dataset['buscas']
+    if not buscas:
+        return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
+    
+    consulta = request.args.get('q', '').strip()
+    if not consulta:
+        return jsonify({"error": "Informe os termos da busca no parâmetro q"}), 400
+    
+    try:
+        limite = int(request.args.get('limit', LIMITE_BUSCA_PADRAO))
+    except ValueError:
+        return jsonify({"error": "limit deve ser um número inteiro"}), 400
+    if not 1 <= limite <= LIMITE_BUSCA_MAXIMO:
+        return jsonify({"error": f"limit deve estar entre 1 e {LIMITE_BUSCA_MAXIMO}"}), 400
+    
+    nome_ies = request.args.get('ies')
+    semestre = request.args.get('semestre')
+    if nome_ies is not None and nome_ies not in buscas:
+        return jsonify({"error": f"IES '{nome_ies}' não encontrada"}), 404
+    if semestre is not None and nome_ies is None:
+        return jsonify({"error": "O filtro semestre exige o parâmetro ies"}), 400
+    registro = g.dataset['registro']
+    if nome_ies is None and registro and registro.max_carregadas and len(registro.catalogo) > registro.max_carregadas:
+        # Buscar em todas as IES descartaria e recarregaria as planilhas a cada busca
+        return jsonify({"error": "Na carga sob demanda a busca exige o parâmetro ies"}), 400
+    
+    # Buscas iguais na mesma versão dos dados são montadas uma única vez
+    chave = ('buscar', g.dataset['assinatura'], consulta, nome_ies, semestre, limite)
+    corpo = cache_respostas.obter(
+        chave, lambda: serializar_json(executar_busca(buscas, consulta, nome_ies, semestre, limite)),
+    )
+    return app.response_class(corpo, mimetype='application/json')
+
+def ler_consultas_lote(corpo):
+    """
+    Valida as consultas de /lote: uma lista (ou {"consultas": [...]}) de
+    {"ies": ..., "semestre": ...}, com o semestre opcional. Retorna a lista de
+    (ies, semestre) e a mensagem de erro, se houver.
+    """
+    consultas = corpo.get('consultas') if isinstance(corpo, dict) else corpo
+    if not isinstance(consultas, list) or not consultas:
+        return None, 'Envie um JSON com a lista de consultas: {"consultas": [{"ies": "...", "semestre": "..."}]}'
+    if len(consultas) > LIMITE_LOTE:
+        return None, f"No máximo {LIMITE_LOTE} consultas por lote"
+    
+    selecionados = []
+    for posicao, consulta in enumerate(consultas):
+        if not isinstance(consulta, dict) or not isinstance(consulta.get('ies'), str):
+            return None, f"Consulta {posicao}: informe a IES no campo ies"
+        semestre = consulta.get('semestre')
+        if isinstance(semestre, bool) or not isinstance(semestre, (str, int, type(None))):
+            return None, f"Consulta {posicao}: semestre inválido"
+        selecionados.append((consulta['ies'], None if semestre is None else str(semestre)))
+    return selecionados, None
+
+def fragmentos_lote(dataset, consultas, ndjson):
+    """
+    Gera a resposta de /lote concatenando as respostas pré-serializadas de
+    cada consulta, sem decodificá-las: em NDJSON uma por linha (elas já
+    terminam em quebra de linha), senão como um array JSON. Consultas sem
+    resultado entram no lugar como {"error": ..., "ies": ..., "semestre": ...}.
+    """
+    if not ndjson:
+        yield b'['
+    for posicao, (nome_ies, semestre) in enumerate(consultas):
+        if not ndjson and posicao:
+            yield b','
+        # Na carga sob demanda a IES é carregada aqui, à medida que o lote é enviado
+        ies = obter_ies(dataset, nome_ies)
+        if ies is None:
+            erro = f"IES '{nome_ies}' não encontrada"
+        elif semestre is not None and semestre not in ies['dados']:
+            erro = f"Semestre '{semestre}' não encontrado para a IES '{nome_ies}'"
+        else:
+            # O WSGI exige bytes; um memoryview do arquivo mapeado é copiado aqui
+            yield bytes(ies['respostas'][semestre]['corpo'])
+            continue
+        yield serializar_json({"error": erro, "ies": nome_ies, "semestre": semestre})
+    if not ndjson:
+        yield b']\n'
+
+# Endpoint para obter várias IES e semestres em uma única requisição
+@app.route('/lote', methods=['POST'])
+def lote():
+    """
+    Retorna as respostas de várias consultas (IES e, opcionalmente, semestre)
+    em uma única resposta, enviada à medida que é montada. Com format=ndjson
+    (ou Accept: application/x-ndjson) cada resposta vem em uma linha, para o
+    cliente processá-las antes do fim do lote.
+    """
+    if not g.dataset['dados']:
+        return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
     
-    return jsonify(dados_formatados)
+    consultas, erro = ler_consultas_lote(request.get_json(silent=True))
+    if erro:
+        return jsonify({"error": erro}), 400
+    
+    formato = request.args.get('format')
+    if formato is None:
+        ndjson = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+    elif formato in ('json', 'ndjson'):
+        ndjson = formato == 'ndjson'
+    else:
+        return jsonify({"error": "format deve ser json ou ndjson"}), 400
+    
+    # O gerador recebe o dataset fixado na requisição, que continua valendo
+    # até o fim do envio mesmo que uma recarga publique outro no meio
+    return app.response_class(
+        fragmentos_lote(g.dataset, consultas, ndjson),
+        mimetype='application/x-ndjson' if ndjson else 'application/json',
+    )
 
 # Endpoint para recarregar os dados sem reiniciar o servidor
 @app.route('/recarregar-dados', methods=['POST', 'GET'])
 def recarregar_dados():
     """Recarrega os dados do arquivo Excel sem precisar reiniciar o servidor"""
-    global dados_ies
     try:
         arquivo_excel = encontrar_arquivo_excel()
         if not arquivo_excel:
             error_msg = "Nenhum arquivo .xlsx ou .xls encontrado no diretório"
-            print(error_msg)
+            logger.warning(error_msg)
             
             if request.method == 'GET':
                 return f"""
@@ -506,42 +2035,10 @@ def recarregar_dados():
                 
             return jsonify({"error": error_msg}), 404
         
-        dados_ies = processar_arquivo_excel(arquivo_excel)
-        
-        if not dados_ies:
-            error_msg = "Erro ao processar o arquivo Excel. Verifique a estrutura do arquivo."
-            print(error_msg)
-            
-            if request.method == 'GET':
-                return f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Erro ao Processar</title>
-                    <meta http-equiv="refresh" content="5;url=/" />
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                        .error {{ 
-                            background-color: #f8d7da; 
-                            border: 1px solid #f5c6cb; 
-                            color: #721c24; 
-                            padding: 15px; 
-                            border-radius: 5px; 
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="error">
-                        <h2>Erro ao processar dados</h2>
-                        <p>{error_msg}</p>
-                        <p>Redirecionando para a página inicial em 5 segundos...</p>
-                        <p><a href="/">Clique aqui se não for redirecionado</a></p>
-                    </div>
-                </body>
-                </html>
-                """, 500
-                
-            return jsonify({"error": error_msg}), 500
+        # A planilha é processada em segundo plano; os dados atuais continuam
+        # sendo servidos até a nova versão ser validada e publicada
+        trabalho = iniciar_recarga(arquivo_excel)
+        status_url = f"/recarregar-dados/{trabalho['job_id']}"
         
         # Se for uma requisição GET, redirecionar para a página inicial
         if request.method == 'GET':
@@ -549,7 +2046,7 @@ def recarregar_dados():
             <!DOCTYPE html>
             <html>
             <head>
-                <title>Dados Recarregados</title>
+                <title>Recarga Iniciada</title>
                 <meta http-equiv="refresh" content="3;url=/" />
                 <style>
                     body {{ font-family: Arial, sans-serif; margin: 40px; }}
@@ -564,24 +2061,27 @@ def recarregar_dados():
             </head>
             <body>
                 <div class="success">
-                    <h2>Dados recarregados com sucesso!</h2>
+                    <h2>Recarga dos dados iniciada!</h2>
                     <p>Arquivo: {arquivo_excel}</p>
-                    <p>IES carregadas: {', '.join(list(dados_ies.keys()))}</p>
+                    <p>Os dados atuais continuam disponíveis até a nova versão ficar pronta.</p>
+                    <p>Acompanhe em: <a href="{status_url}">{status_url}</a></p>
                     <p>Redirecionando para a página inicial em 3 segundos...</p>
                     <p><a href="/">Clique aqui se não for redirecionado</a></p>
                 </div>
             </body>
             </html>
-            """
+            """, 202
         
         return jsonify({
-            "status": "dados_recarregados", 
+            "status": "recarga_iniciada",
+            "job_id": trabalho['job_id'],
+            "status_url": status_url,
             "arquivo": arquivo_excel,
-            "ies_carregadas": list(dados_ies.keys())
-        })
+            "versao_atual": g.dataset['versao']
+        }), 202
     except Exception as e:
         error_msg = f"Erro ao recarregar dados: {str(e)}"
-        print(error_msg)
+        logger.warning(error_msg)
         
         if request.method == 'GET':
             return f"""
@@ -614,6 +2114,68 @@ def recarregar_dados():
             
         return jsonify({"error": error_msg}), 500
 
+# Endpoint para acompanhar uma recarga iniciada em /recarregar-dados
+@app.route('/recarregar-dados/<string:job_id>')
+def status_recarga(job_id):
+    """Retorna o estado de uma recarga: executando, concluido ou erro"""
+    trabalho = consultar_recarga(job_id)
+    if not trabalho:
+        return jsonify({"error": f"Recarga '{job_id}' não encontrada"}), 404
+    return jsonify(trabalho)
+
+# Relatório de qualidade dos dados de cada IES, montado na ingestão
+@app.route('/relatorio-dados')
+def relatorio_dados():
+    """
+    Retorna, por IES, as linhas lidas, as aulas publicadas e os problemas
+    encontrados na planilha (campos obrigatórios vazios, links que não são
+    URLs, aulas duplicadas, erros), com os números de algumas das linhas.
+    Filtro opcional: ies. Na carga sob demanda, só das IES já carregadas.
+    """
+    dataset = g.dataset
+    if not dataset['dados']:
+        return jsonify({"error": "Nenhum arquivo Excel carregado."}), 404
+    
+    nome_ies = request.args.get('ies')
+    if nome_ies is not None and nome_ies not in dataset['dados']:
+        return jsonify({"error": f"IES '{nome_ies}' não encontrada"}), 404
+    
+    if dataset['registro']:
+        relatorios = {ies: preparada['relatorio'] for ies, preparada in dataset['registro'].preparadas_por_ies().items()}
+    else:
+        relatorios = dataset['relatorios']
+    if nome_ies is not None:
+        relatorios = {nome_ies: relatorios[nome_ies]} if nome_ies in relatorios else {}
+    
+    por_ies = {ies: relatorio.como_dicionario() for ies, relatorio in relatorios.items()}
+    totais = {'ies': len(por_ies), 'linhas': 0, 'aulas': 0, 'linhas_vazias': 0}
+    for relatorio in relatorios.values():
+        totais['linhas'] += relatorio.linhas
+        totais['aulas'] += relatorio.aulas
+        totais['linhas_vazias'] += relatorio.linhas_vazias
+        for (tipo, _), (total, _) in relatorio.problemas.items():
+            totais[tipo] = totais.get(tipo, 0) + total
+    
+    resultado = {'versao': dataset['versao'], 'totais': totais, 'ies': por_ies}
+    if dataset['registro']:
+        resultado['ies_nao_carregadas'] = len(dataset['registro'].catalogo) - len(por_ies) if nome_ies is None else int(not por_ies)
+    return jsonify(resultado)
+
+# Endpoint com as métricas do cache deste processo
+@app.route('/estatisticas-cache')
+def estatisticas_cache():
+    """Retorna acertos, falhas e gravações do backend de cache em uso"""
+    backend = cache.cache
+    if not hasattr(backend, 'estatisticas'):
+        return jsonify({"error": "O backend de cache configurado não coleta estatísticas"}), 404
+    return jsonify(backend.estatisticas())
+
+# Métricas no formato do Prometheus
+@app.route('/metrics')
+def exportar_metricas():
+    """Métricas deste processo no formato de texto do Prometheus"""
+    return app.response_class(metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
 # Handler para erros 404
 @app.errorhandler(404)
 def not_found(error):
@@ -626,28 +2188,49 @@ def internal_error(error):
 
 def carregar_dados_iniciais():
     """Carrega os dados iniciais ao iniciar o servidor"""
-    global dados_ies
+    global dataset_atual, geracao_dados
+    if ARQUIVO_GERACAO_DADOS:
+        geracao_dados = ler_geracao_dados()
     arquivo_excel = encontrar_arquivo_excel()
     
     if arquivo_excel:
-        print(f"Arquivo Excel encontrado: {arquivo_excel}")
-        print("Carregando dados automaticamente...")
-        dados_ies = processar_arquivo_excel(arquivo_excel)
-        
-        if dados_ies:
-            print(f"Dados carregados com sucesso para as IES: {list(dados_ies.keys())}")
-            print("API pronta para receber requisições.")
-        else:
-            print("Erro ao processar o arquivo Excel. Verifique a estrutura do arquivo.")
+        logger.info("Arquivo Excel encontrado: %s", arquivo_excel)
+        logger.info("Carregando dados automaticamente...")
+        inicio = time.perf_counter()
+        try:
+            dataset = publicar_dataset(carregar_dataset(arquivo_excel))
+            HISTOGRAMA_RECARGAS.observar('sucesso', valor=time.perf_counter() - inicio)
+            logger.info("Dados carregados com sucesso para as IES: %s", list(dataset['dados'].keys()))
+            logger.info("API pronta para receber requisições.")
+        except Exception as e:
+            HISTOGRAMA_RECARGAS.observar('erro', valor=time.perf_counter() - inicio)
+            logger.error("Erro ao carregar os dados: %s", e)
     else:
-        print("Nenhum arquivo .xlsx ou .xls encontrado no diretório atual.")
-        print("Por favor, coloque um arquivo Excel com a estrutura especificada na mesma pasta do script.")
-        print(f"Diretório atual: {os.getcwd()}")
+        logger.warning("Nenhum arquivo .xlsx ou .xls encontrado no diretório atual.")
+        logger.warning("Por favor, coloque um arquivo Excel com a estrutura especificada na mesma pasta do script.")
+        logger.warning("Diretório atual: %s", os.getcwd())
+    
+    # Sem planilha (ou se a carga falhou) a API serve a versão 0, sem dados,
+    # publicada só agora para que ninguém a veja enquanto a carga acontece
+    if dataset_atual is None:
+        dataset_atual = montar_dataset({})
+    
+    if OBSERVAR_ARQUIVOS:
+        iniciar_observador_arquivos()
 
-# Carregar dados automaticamente ao iniciar
-carregar_dados_iniciais()
+def criar_app():
+    """
+    Fábrica da aplicação: carrega os dados uma única vez por processo e
+    retorna o app. Com o gunicorn em modo preload (gunicorn.conf.py) ela roda
+    no processo mestre, e os workers herdam os dados já carregados.
+    """
+    with trava_carga_inicial:
+        if dataset_atual is None:
+            carregar_dados_iniciais()
+    return app
 
 if __name__ == '__main__':
+    criar_app()
     port = int(os.environ.get('PORT', 5000))
-    print(f"API pronta para receber requisições na porta {port}")
+    logger.info("API pronta para receber requisições na porta %d", port)
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
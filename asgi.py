@@ -0,0 +1,258 @@
+"""
+Ponto de entrada ASGI para tráfego de leitura com muitas conexões simultâneas:
+
+    uvicorn asgi:app --workers 4
+
+As rotas de conteúdo (/<nome_ies> e /<nome_ies>/<semestre>, sem parâmetros)
+são respondidas direto no loop de eventos com as respostas pré-serializadas
+do dataset, com os mesmos cabeçalhos, variantes comprimidas e GET condicional
+do app Flask. Um cliente lento ocupa só a sua conexão, não um worker. As
+demais rotas (HTML, consultas parciais, busca, recarga) são repassadas ao app
+Flask em um pool de threads, assim como a carga inicial dos dados; as
+recargas já rodam em threads próprias, então o loop nunca fica bloqueado.
+
+Requer um servidor ASGI (ex.: pip install uvicorn), que não faz parte das
+dependências do modo síncrono.
+"""
+import asyncio
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import http_date, is_resource_modified, parse_accept_header
+
+import app as aplicacao
+
+# Threads para as rotas repassadas ao app Flask (WSGI é bloqueante)
+THREADS_WSGI = int(os.environ.get('THREADS_WSGI', '16'))
+
+# Partes do corpo de uma resposta repassada que podem esperar o envio ao
+# cliente; com a fila cheia a thread do app Flask espera o cliente consumir
+PARTES_EM_ESPERA = 16
+
+# Endpoints do Flask respondidos direto no loop quando não há parâmetros
+ROTAS_CONTEUDO = {'get_conteudos_ies', 'get_conteudos_ies_semestre'}
+
+# Entregue ao loop no lugar do fim do corpo quando o app falha durante a resposta
+ERRO_WSGI = object()
+
+executor_wsgi = ThreadPoolExecutor(max_workers=THREADS_WSGI, thread_name_prefix='wsgi')
+rotas = aplicacao.app.url_map.bind('')
+
+
+def localizar_payload(dataset, caminho):
+    """
+    Payload pré-serializado da rota de conteúdo do caminho e a regra da rota
+    (para as métricas), ou (None, None)
+    """
+    try:
+        regra, argumentos = rotas.match(caminho, method='GET', return_rule=True)
+    except HTTPException:
+        return None, None
+    if regra.endpoint not in ROTAS_CONTEUDO:
+        return None, None
+    # IES ou semestre inexistentes ficam com o app Flask, que monta o erro, e
+    # também as IES ainda não carregadas, para que a carga não bloqueie o loop
+    registro = dataset['registro']
+    if registro and not registro.carregada(argumentos['nome_ies']):
+        return None, None
+    respostas_ies = dataset['respostas'].get(argumentos['nome_ies'])
+    if respostas_ies is None:
+        return None, None
+    return respostas_ies.get(argumentos.get('semestre')), regra.rule
+
+
+def responder_payload(dataset, payload, metodo, cabecalhos):
+    """
+    Retorna (status, cabeçalhos, corpo) da resposta pré-serializada, com as
+    mesmas regras de responder_preparado e aplicar_get_condicional
+    """
+    opcoes = [codificacao for codificacao in aplicacao.CODIFICACOES_SUPORTADAS if codificacao in payload]
+    aceitas = parse_accept_header(cabecalhos.get('accept-encoding'))
+    codificacao = aceitas.best_match(opcoes + ['identity'], default='identity')
+
+    if codificacao == 'identity':
+        corpo, etag = payload['corpo'], payload['etag']
+    else:
+        corpo, etag = payload[codificacao], f"{payload['etag']}-{codificacao}"
+
+    comuns = [
+        (b'etag', f'"{etag}"'.encode()),
+        (b'vary', b'Accept-Encoding'),
+        (b'cache-control', aplicacao.CACHE_CONTROL.encode()),
+        (b'x-versao-dados', str(dataset['versao']).encode()),
+    ]
+    condicional = {
+        'REQUEST_METHOD': metodo,
+        'HTTP_IF_NONE_MATCH': cabecalhos.get('if-none-match', ''),
+        'HTTP_IF_MODIFIED_SINCE': cabecalhos.get('if-modified-since', ''),
+    }
+    if not is_resource_modified(condicional, etag=etag, last_modified=dataset['ultima_modificacao']):
+        return 304, comuns, b''
+
+    resposta = comuns + [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(corpo)).encode()),
+    ]
+    if codificacao != 'identity':
+        resposta.append((b'content-encoding', codificacao.encode()))
+    if dataset['ultima_modificacao']:
+        resposta.append((b'last-modified', http_date(dataset['ultima_modificacao']).encode()))
+    # O ASGI exige bytes; um memoryview do arquivo mapeado é copiado aqui
+    return 200, resposta, b'' if metodo == 'HEAD' else bytes(corpo)
+
+
+def montar_environ(scope, corpo):
+    """Ambiente WSGI equivalente à requisição HTTP do ASGI"""
+    servidor = scope.get('server') or ('localhost', 80)
+    cliente = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': servidor[0],
+        'SERVER_PORT': str(servidor[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': cliente[0],
+        'REMOTE_PORT': str(cliente[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(corpo),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'CONTENT_LENGTH': str(len(corpo)),
+    }
+    for nome, valor in scope['headers']:
+        nome = nome.decode('latin-1').upper().replace('-', '_')
+        valor = valor.decode('latin-1')
+        if nome == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = valor
+        elif nome != 'CONTENT_LENGTH':
+            chave = f'HTTP_{nome}'
+            environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+    return environ
+
+
+def executar_wsgi(environ, entregar, cancelado):
+    """
+    Executa o app Flask (em uma thread do pool) e entrega ao loop o status e
+    os cabeçalhos e depois cada parte do corpo à medida que o app a produz
+    (ex.: cada item de POST /lote), terminando com None, ou com ERRO_WSGI se o
+    app falhar
+    """
+    resposta = {}
+
+    def start_response(status, cabecalhos, exc_info=None):
+        resposta['status'] = int(status.split(' ', 1)[0])
+        resposta['cabecalhos'] = [(nome.lower().encode('latin-1'), valor.encode('latin-1')) for nome, valor in cabecalhos]
+
+    try:
+        partes = aplicacao.app(environ, start_response)
+        try:
+            entregar((resposta['status'], resposta['cabecalhos']))
+            for parte in partes:
+                if cancelado.is_set():
+                    break
+                if parte:
+                    # O ASGI exige bytes; um memoryview do arquivo mapeado é copiado aqui
+                    entregar(bytes(parte))
+        finally:
+            if hasattr(partes, 'close'):
+                partes.close()
+    except BaseException:
+        entregar(ERRO_WSGI)
+        raise
+    entregar(None)
+
+
+async def repassar_wsgi(scope, receive, send):
+    """
+    Repassa a requisição ao app Flask sem bloquear o loop, enviando cada parte
+    do corpo assim que o app a produz em vez de esperar a resposta inteira
+    """
+    corpo = bytearray()
+    while True:
+        mensagem = await receive()
+        corpo += mensagem.get('body', b'')
+        if not mensagem.get('more_body'):
+            break
+
+    loop = asyncio.get_running_loop()
+    fila = asyncio.Queue(maxsize=PARTES_EM_ESPERA)
+    cancelado = threading.Event()
+
+    def entregar(item):
+        # Na thread do pool: espera espaço na fila, então um cliente lento
+        # segura a produção em vez de acumular o corpo em memória
+        if not cancelado.is_set():
+            asyncio.run_coroutine_threadsafe(fila.put(item), loop).result()
+
+    tarefa = loop.run_in_executor(executor_wsgi, executar_wsgi, montar_environ(scope, bytes(corpo)), entregar, cancelado)
+    try:
+        inicio = await fila.get()
+        if inicio is not ERRO_WSGI:
+            status, cabecalhos = inicio
+            await send({'type': 'http.response.start', 'status': status, 'headers': cabecalhos})
+            parte = await fila.get()
+            while parte is not None and parte is not ERRO_WSGI:
+                await send({'type': 'http.response.body', 'body': parte, 'more_body': True})
+                parte = await fila.get()
+            # Com um erro no meio do corpo a resposta não é encerrada: o erro
+            # propagado abaixo faz o servidor abortar a conexão, e o cliente
+            # não recebe um corpo truncado como se estivesse completo
+            if parte is None:
+                await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        # Cliente desconectado ou erro: a thread para de produzir, e esvaziar a
+        # fila libera uma entrega que esteja esperando espaço
+        cancelado.set()
+        while not fila.empty():
+            fila.get_nowait()
+    # Propaga um erro do app, ocorrido antes ou durante o envio do corpo
+    await tarefa
+
+
+async def tratar_lifespan(receive, send):
+    """Carrega os dados em uma thread antes de aceitar conexões"""
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'lifespan.startup':
+            await asyncio.get_running_loop().run_in_executor(executor_wsgi, aplicacao.criar_app)
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensagem['type'] == 'lifespan.shutdown':
+            executor_wsgi.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicação ASGI"""
+    if scope['type'] == 'lifespan':
+        await tratar_lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    dataset = aplicacao.dataset_atual
+    if dataset is not None and scope['method'] in ('GET', 'HEAD') and not scope['query_string']:
+        inicio = time.perf_counter()
+        if aplicacao.ARQUIVO_GERACAO_DADOS:
+            aplicacao.verificar_geracao_dados()
+        payload, rota = localizar_payload(dataset, scope['path'])
+        if payload is not None:
+            cabecalhos = {nome.decode('latin-1').lower(): valor.decode('latin-1') for nome, valor in scope['headers']}
+            status, cabecalhos_resposta, corpo = responder_payload(dataset, payload, scope['method'], cabecalhos)
+            await send({'type': 'http.response.start', 'status': status, 'headers': cabecalhos_resposta})
+            await send({'type': 'http.response.body', 'body': corpo})
+            # As mesmas métricas que o app Flask registra nas rotas que atende
+            aplicacao.HISTOGRAMA_REQUISICOES.observar(rota, scope['method'], str(status), valor=time.perf_counter() - inicio)
+            aplicacao.HISTOGRAMA_TAMANHO_RESPOSTAS.observar(rota, valor=len(corpo))
+            return
+
+    await repassar_wsgi(scope, receive, send)
@@ -0,0 +1,71 @@
+"""
+Backends do Flask-Caching com contagem de acertos e falhas, selecionados em
+app.py pela variável de ambiente CACHE_TYPE:
+
+- simple: memória do próprio processo (cada worker do gunicorn tem o seu)
+- filesystem: diretório compartilhado pelos workers da mesma máquina; em
+  /dev/shm fica em memória compartilhada, sem serviço externo
+- redis: servidor Redis compartilhado entre workers e máquinas, em
+  CACHE_REDIS_URL (requer pip install redis)
+
+As rotas de conteúdo servem respostas pré-serializadas na carga dos dados, e
+as consultas parciais e /buscar usam o cache de cada processo em
+cache_respostas.py; o Flask-Caching guarda apenas as views decoradas com
+@cache.cached (hoje, /listar-ies).
+"""
+import os
+import threading
+
+from flask_caching.backends import FileSystemCache, RedisCache, SimpleCache
+
+
+class MetricasCacheMixin:
+    """Conta acertos, falhas e gravações das operações do backend"""
+
+    nome_backend = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._trava_metricas = threading.Lock()
+        self._metricas = {'acertos': 0, 'falhas': 0, 'gravacoes': 0}
+
+    def _contar(self, metrica):
+        with self._trava_metricas:
+            self._metricas[metrica] += 1
+
+    def _chave_interna(self, key):
+        # O FileSystemCache guarda a contagem de arquivos como uma entrada própria
+        return key == getattr(self, '_fs_count_file', None)
+
+    def get(self, key):
+        valor = super().get(key)
+        if not self._chave_interna(key):
+            self._contar('acertos' if valor is not None else 'falhas')
+        return valor
+
+    def set(self, key, value, timeout=None, **kwargs):
+        if not self._chave_interna(key):
+            self._contar('gravacoes')
+        return super().set(key, value, timeout=timeout, **kwargs)
+
+    def estatisticas(self):
+        """Retorna as contagens deste processo e a taxa de acerto"""
+        with self._trava_metricas:
+            metricas = dict(self._metricas)
+        consultas = metricas['acertos'] + metricas['falhas']
+        metricas['taxa_acerto'] = round(metricas['acertos'] / consultas, 4) if consultas else None
+        metricas['backend'] = self.nome_backend
+        metricas['processo'] = os.getpid()
+        return metricas
+
+
+class SimpleCacheInstrumentado(MetricasCacheMixin, SimpleCache):
+    nome_backend = 'simple'
+
+
+class FileSystemCacheInstrumentado(MetricasCacheMixin, FileSystemCache):
+    nome_backend = 'filesystem'
+
+
+class RedisCacheInstrumentado(MetricasCacheMixin, RedisCache):
+    nome_backend = 'redis'
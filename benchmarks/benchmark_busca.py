@@ -0,0 +1,108 @@
+"""
+Mede o tempo de montagem do índice de busca e a latência das consultas em uma
+IES sintética com centenas de milhares de aulas. As linhas são geradas em
+memória (sem planilha) com nomes sorteados de um vocabulário de termos médicos
+e de milhares de termos artificiais, com frequências decrescentes (lei de
+Zipf), para que a seletividade dos termos se pareça com a dos dados reais.
+
+    python benchmarks/benchmark_busca.py --aulas 300000
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+VOCABULARIO = [
+    'Anatomia', 'Fisiologia', 'Bioquímica', 'Farmacologia', 'Patologia', 'Cardiologia',
+    'Pneumologia', 'Nefrologia', 'Neurologia', 'Pediatria', 'Obstetrícia', 'Ginecologia',
+    'Cirurgia', 'Infectologia', 'Endocrinologia', 'Hematologia', 'Imunologia', 'Genética',
+    'coração', 'pulmão', 'rim', 'fígado', 'cérebro', 'estômago', 'intestino', 'pâncreas',
+    'insuficiência', 'infecção', 'inflamação', 'diagnóstico', 'tratamento', 'exame',
+    'aguda', 'crônica', 'congênita', 'hipertensão', 'diabetes', 'anemia', 'sepse', 'choque',
+    'arritmia', 'asma', 'pneumonia', 'meningite', 'hepatite', 'cirrose', 'úlcera', 'trauma',
+]
+
+SILABAS = ['ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'xo', 'zu']
+
+CONSULTAS = [
+    ('termo comum', 'insuficiencia'),
+    ('termo raro', 'meningite'),
+    ('dois termos', 'cardiologia arritmia'),
+    ('acentuada', 'Insuficiência Cardíaca'),
+    ('prefixo curto', 'ca'),
+    ('prefixo longo', 'hepatite cirr'),
+    ('três termos', 'pediatria pneumonia aguda'),
+    ('sem resultado', 'oftalmologia'),
+]
+
+
+def gerar_linhas(aulas, semente=42):
+    """Linhas (cabeçalho + dados) no formato da planilha, com 8 semestres"""
+    aleatorio = random.Random(semente)
+    termos = VOCABULARIO + [a + b + c for a in SILABAS for b in SILABAS for c in SILABAS]
+    pesos = [1 / posicao for posicao in range(1, len(termos) + 1)]
+
+    def nome(quantidade):
+        return ' '.join(aleatorio.choices(termos, pesos, k=quantidade))
+
+    yield ('Semestre', 'Materia', 'Tema', 'Subtema', 'Aula', 'Link Aula', 'Link PDF', 'Link Quiz')
+    materia = tema = subtema = None
+    for linha in range(aulas):
+        if linha % 2000 == 0:
+            materia = f"{aleatorio.choice(VOCABULARIO[:18])} {linha // 2000 + 1}"
+        if linha % 100 == 0:
+            tema = nome(2)
+        if linha % 10 == 0:
+            subtema = nome(3)
+        semestre = 1 + (linha * 8) // aulas
+        yield (semestre, materia, tema, subtema, f"Aula {linha + 1}: {nome(4)}", f"https://exemplo/{linha}", None, None)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--aulas', type=int, default=300000)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    # Importar a partir de um diretório sem planilhas evita o carregamento automático
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+            from busca import IndiceBusca
+            dados = app.processar_linhas_ies('IES', gerar_linhas(args.aulas))
+
+    semestres = app.formatar_resposta_api({'IES': dados}, 'IES')['IES']
+    inicio = time.perf_counter()
+    indice = IndiceBusca(semestres)
+    duracao = time.perf_counter() - inicio
+    print(f"Índice de {len(indice.aulas):,} aulas e {len(indice.vocabulario):,} termos montado em {duracao:.2f}s")
+
+    # A primeira execução de cada consulta percorre o índice; as repetidas
+    # (o caso comum no autocompletar) vêm do cache de consultas do índice
+    for descricao, consulta in CONSULTAS:
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            total, _ = indice.buscar(consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        print(
+            f"{descricao:>14} {consulta!r:>28}: {total:>7,} aulas, primeira {tempos[0]:.3f} ms, "
+            f"repetidas p50 {percentil(tempos[1:], 0.5):.3f} ms, p99 {percentil(tempos[1:], 0.99):.3f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
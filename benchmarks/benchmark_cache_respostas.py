@@ -0,0 +1,67 @@
+"""
+Mede uma rajada de requisições simultâneas às mesmas buscas e consultas
+parciais, com o cache de respostas (cálculo único por chave) e sem ele:
+tempo total e quantas vezes cada resposta foi de fato montada.
+
+    python benchmarks/benchmark_cache_respostas.py --abas 4 --linhas 25000 --threads 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DIRETORIO_SNAPSHOT', '')
+os.environ.setdefault('NIVEL_LOG', 'WARNING')
+
+import app  # noqa: E402
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def rajada(urls, threads, repeticoes):
+    """Cada url pedida repeticoes vezes ao mesmo tempo; retorna a duração em ms"""
+    def pedir(url):
+        resposta = app.app.test_client().get(url)
+        assert resposta.status_code == 200, (url, resposta.status_code)
+        return resposta.get_data()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(pedir, [url for url in urls for _ in range(repeticoes)]))
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=4)
+    parser.add_argument('--linhas', type=int, default=25000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, 'sintetica.xlsx')
+        gerar_planilha(arquivo, args.abas, args.linhas)
+        app.publicar_dataset(app.carregar_dataset(arquivo))
+
+    nome_ies = next(iter(app.dataset_atual['dados']))
+    urls = ['/buscar?q=aula', f'/buscar?q=mat&ies={nome_ies}', f'/{nome_ies}?depth=2', f'/{nome_ies}?fields=nome']
+    print(f"{len(urls)} urls x {args.repeticoes} requisições simultâneas, {args.threads} threads")
+
+    max_bytes = app.cache_respostas.max_bytes
+    for rotulo, limite in (('sem cache', 0), ('com cache', max_bytes)):
+        app.cache_respostas.max_bytes = limite
+        app.cache_respostas.reiniciar_trava()
+        duracao = rajada(urls, args.threads, args.repeticoes)
+        estatisticas = app.cache_respostas.estatisticas()
+        montagens = estatisticas['falha'] if limite else len(urls) * args.repeticoes
+        print(f"{rotulo:>10}: {duracao:9.1f} ms  {montagens:>5} montagens  "
+              f"(agrupadas: {estatisticas['agrupado']}, acertos: {estatisticas['acerto']})")
+
+
+if __name__ == '__main__':
+    main()
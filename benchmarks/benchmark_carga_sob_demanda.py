@@ -0,0 +1,87 @@
+"""
+Compara a carga completa (todas as IES processadas na inicialização) com a
+carga sob demanda (CARGA_SOB_DEMANDA=1, ver registro_ies.py) em um conjunto
+de várias planilhas: tempo de inicialização, tempo da primeira e da segunda
+requisição a uma IES e memória máxima do processo.
+
+    python benchmarks/benchmark_carga_sob_demanda.py --planilhas 5 --abas 10 --linhas 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+# Executado em um subprocesso para medir a memória de cada modo separadamente
+MEDICAO = """
+import json, resource, sys, time
+inicio = time.perf_counter()
+import app
+app.criar_app()
+inicializacao = time.perf_counter() - inicio
+cliente = app.app.test_client()
+tempos = []
+for _ in range(2):
+    inicio = time.perf_counter()
+    resposta = cliente.get('/' + sys.argv[1], headers={'Accept': 'application/json'})
+    assert resposta.status_code == 200, resposta.status_code
+    tempos.append(time.perf_counter() - inicio)
+print(json.dumps({
+    'inicializacao': inicializacao,
+    'primeira': tempos[0],
+    'segunda': tempos[1],
+    'memoria': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def medir(diretorio, ambiente, ies):
+    saida = subprocess.run(
+        [sys.executable, '-c', MEDICAO, ies],
+        cwd=diretorio, env=dict(os.environ, PYTHONPATH=RAIZ, DIRETORIO_SNAPSHOT='', **ambiente),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--planilhas', type=int, default=5)
+    parser.add_argument('--abas', type=int, default=10)
+    parser.add_argument('--linhas', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivos = []
+        for numero in range(args.planilhas):
+            prefixo = f"G{numero + 1}_IES"
+            arquivos.append(f"grupo{numero + 1}.xlsx")
+            gerar_planilha(os.path.join(tmp, arquivos[-1]), args.abas, args.linhas, prefixo=prefixo)
+        # Um único arquivo com todas as IES para a carga completa, que só usa a primeira planilha
+        gerar_planilha(os.path.join(tmp, 'completa.xlsx'), args.planilhas * args.abas, args.linhas, prefixo='G1_IES')
+        with open(os.path.join(tmp, 'manifesto.json'), 'w') as f:
+            json.dump({'planilhas': arquivos}, f)
+        with open(os.path.join(tmp, 'completa.json'), 'w') as f:
+            json.dump({'planilhas': ['completa.xlsx']}, f)
+
+        print(f"{args.planilhas} planilhas x {args.abas} abas x {args.linhas} linhas")
+        modos = [
+            ('carga completa', {'MANIFESTO_PLANILHAS': 'completa.json'}),
+            ('carga sob demanda', {'MANIFESTO_PLANILHAS': 'manifesto.json', 'CARGA_SOB_DEMANDA': '1'}),
+        ]
+        for rotulo, ambiente in modos:
+            resultado = medir(tmp, ambiente, 'G1_IES001')
+            print(f"{rotulo:>18}: inicialização {resultado['inicializacao'] * 1000:8,.0f} ms, "
+                  f"1ª requisição {resultado['primeira'] * 1000:6,.1f} ms, "
+                  f"2ª {resultado['segunda'] * 1000:5,.1f} ms, "
+                  f"memória máxima {resultado['memoria'] / 1024:6,.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
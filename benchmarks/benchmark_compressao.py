@@ -0,0 +1,73 @@
+"""
+Compara tamanho e latência das respostas da IES inteira sem compressão, em
+gzip e em brotli (variantes pré-computadas no carregamento), e mostra quanto
+custaria comprimir a cada requisição.
+
+    python benchmarks/benchmark_compressao.py --abas 2 --linhas 20000
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def medir_requisicoes(client, url, cabecalhos, repeticoes):
+    """Retorna (tamanho do corpo, latência média em ms) da rota"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resposta = client.get(url, headers=cabecalhos)
+    return len(resposta.data), (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=2)
+    parser.add_argument('--linhas', type=int, default=20000)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = gerar_planilha(os.path.join(tmp, 'sintetica.xlsx'), args.abas, args.linhas)
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+            inicio = time.perf_counter()
+            dataset = app.publicar_dataset(app.montar_dataset(app.processar_arquivo_excel(caminho), caminho))
+            duracao_carga = time.perf_counter() - inicio
+
+        nome_ies = next(iter(dataset['dados']))
+        payload = dataset['respostas'][nome_ies][None]
+        client = app.app.test_client()
+        url = f'/{nome_ies}'
+
+        print(f"IES {nome_ies}: {args.linhas} linhas (carga + pré-compressão em {duracao_carga:.2f}s)")
+        variantes = [('identity', {}), ('gzip', {'Accept-Encoding': 'gzip'})]
+        if app.brotli is not None:
+            variantes.append(('br', {'Accept-Encoding': 'br'}))
+        else:
+            print("Pacote brotli não instalado: variante br não medida")
+
+        for nome, cabecalhos in variantes:
+            tamanho, latencia = medir_requisicoes(client, url, cabecalhos, args.repeticoes)
+            proporcao = tamanho / len(payload['corpo'])
+            print(f"{nome:>9}: {tamanho / 1024:10,.1f} KiB ({proporcao:6.1%}), {latencia:6.2f} ms/requisição")
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            gzip.compress(payload['corpo'], compresslevel=6)
+        custo = (time.perf_counter() - inicio) * 1000 / args.repeticoes
+        print(f"Comprimir em gzip a cada requisição custaria {custo:.2f} ms a mais")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Teste de carga local comparando o modo síncrono (gunicorn.conf.py, workers
+sync) com o modo ASGI (uvicorn asgi:app) com muitas conexões simultâneas.
+Mede requisições por segundo e latências p50/p99 de uma rota de conteúdo,
+incluindo o tempo de conexão quando o servidor fecha a conexão a cada
+resposta. Requer o uvicorn instalado.
+
+    python benchmarks/benchmark_concorrencia.py --conexoes 500 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import re
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+RE_TAMANHO = re.compile(rb'(?i)\r\ncontent-length:\s*(\d+)')
+RE_FECHAR = re.compile(rb'(?i)\r\nconnection:\s*close')
+
+
+def comandos(porta, workers):
+    return [
+        ('síncrono (gunicorn sync)', [sys.executable, '-m', 'gunicorn', '-c', os.path.join(RAIZ, 'gunicorn.conf.py'),
+                                      '--bind', f'127.0.0.1:{porta}', '--workers', str(workers)]),
+        ('ASGI (uvicorn)', [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(porta),
+                            '--workers', str(workers), '--log-level', 'warning', '--backlog', '4096']),
+    ]
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def cliente(porta, pedido, fim, latencias, erros):
+    """Uma conexão fazendo requisições em sequência até o fim do teste"""
+    leitor = escritor = None
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+            escritor.write(pedido)
+            cabecalho = await leitor.readuntil(b'\r\n\r\n')
+            await leitor.readexactly(int(RE_TAMANHO.search(cabecalho).group(1)))
+            latencias.append(time.perf_counter() - inicio)
+            if RE_FECHAR.search(cabecalho):
+                escritor.close()
+                escritor = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, AttributeError):
+            erros.append(1)
+            if escritor is not None:
+                escritor.close()
+            escritor = None
+            await asyncio.sleep(0.05)
+    if escritor is not None:
+        escritor.close()
+
+
+async def carga(porta, caminho, conexoes, duracao):
+    pedido = f"GET {caminho} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept-Encoding: gzip\r\n\r\n".encode()
+    latencias, erros = [], []
+    fim = time.perf_counter() + duracao
+    await asyncio.gather(*(cliente(porta, pedido, fim, latencias, erros) for _ in range(conexoes)))
+    return latencias, len(erros)
+
+
+def aguardar(porta, caminho, processo):
+    while True:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor terminou antes de ficar pronto")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{porta}{caminho}', timeout=5) as resposta:
+                resposta.read()
+                return
+        except OSError:
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=2)
+    parser.add_argument('--linhas', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--conexoes', type=int, default=500)
+    parser.add_argument('--duracao', type=float, default=10)
+    args = parser.parse_args()
+
+    # Cada conexão usa um descritor no cliente
+    _, maximo = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (maximo, maximo))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gerar_planilha(os.path.join(tmp, 'sintetica.xlsx'), args.abas, args.linhas)
+        caminho = '/IES001/1'
+        print(f"{args.conexoes} conexões por {args.duracao:.0f}s em {caminho}, {args.workers} workers")
+        porta = porta_livre()
+        for rotulo, comando in comandos(porta, args.workers):
+            ambiente = dict(os.environ, PYTHONPATH=RAIZ)
+            processo = subprocess.Popen(comando, cwd=tmp, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                aguardar(porta, caminho, processo)
+                latencias, erros = asyncio.run(carga(porta, caminho, args.conexoes, args.duracao))
+            finally:
+                processo.terminate()
+                processo.wait()
+            latencias.sort()
+            p50 = latencias[len(latencias) // 2] * 1000 if latencias else 0
+            p99 = latencias[int(len(latencias) * 0.99)] * 1000 if latencias else 0
+            print(f"{rotulo:>26}: {len(latencias) / args.duracao:8,.0f} req/s, "
+                  f"p50 {p50:7.1f} ms, p99 {p99:7.1f} ms, {erros} erros")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Mede, com tracemalloc, as alocações e o tempo da montagem das IES na ingestão
+(processar_linhas_ies) e de formatar_resposta_api por IES e por semestre, e o
+tempo das requisições às rotas de conteúdo.
+
+    python benchmarks/benchmark_formato.py --abas 4 --linhas 25000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DIRETORIO_SNAPSHOT', '')
+os.environ.setdefault('NIVEL_LOG', 'WARNING')
+
+import openpyxl  # noqa: E402
+
+import app  # noqa: E402
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def alocacoes(funcao):
+    """Número de blocos e bytes alocados (e ainda vivos) por uma execução"""
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    resultado = funcao()
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diferenca = depois.compare_to(antes, 'filename')
+    del resultado
+    return sum(estat.count_diff for estat in diferenca), sum(estat.size_diff for estat in diferenca)
+
+
+def cronometrar(funcao, repeticoes):
+    """Mediana, em ms, de várias execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=4)
+    parser.add_argument('--linhas', type=int, default=25000)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, 'sintetica.xlsx')
+        gerar_planilha(arquivo, args.abas, args.linhas)
+        wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+        abas = {ies: list(wb[ies].iter_rows(values_only=True)) for ies in wb.sheetnames}
+        wb.close()
+
+    def ingerir():
+        return {ies: app.processar_linhas_ies(ies, iter(linhas)) for ies, linhas in abas.items()}
+
+    dados = ingerir()
+    nome_ies = next(iter(dados))
+    semestre = next(iter(dados[nome_ies]))
+    app.publicar_dataset(app.montar_dataset(dados))
+    cliente = app.app.test_client()
+
+    print(f"{args.abas} abas x {args.linhas} linhas, armazenamento {app.ARMAZENAMENTO_DADOS}")
+    medidas = [
+        ('ingestão (todas as abas)', ingerir),
+        ('formatar_resposta_api, IES', lambda: app.formatar_resposta_api(dados, nome_ies)),
+        ('formatar_resposta_api, semestre', lambda: app.formatar_resposta_api(dados, nome_ies, semestre)),
+        ('requisição /<ies>', lambda: cliente.get(f'/{nome_ies}').get_data()),
+        ('requisição /<ies>/<semestre>', lambda: cliente.get(f'/{nome_ies}/{semestre}').get_data()),
+    ]
+    for rotulo, funcao in medidas:
+        blocos, tamanho = alocacoes(funcao)
+        tempo = cronometrar(funcao, args.repeticoes)
+        print(f"{rotulo:>34}: {tempo:9.2f} ms  {blocos:>9} blocos  {tamanho / 1024 / 1024:8.2f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Compara o carregador 'completo' (planilha inteira em memória) com o modo
+'streaming' (somente leitura + iter_rows) em linhas por segundo e pico de RSS.
+
+Cada medição roda em um subprocesso separado para que o pico de memória de um
+modo não contamine o outro.
+
+    python benchmarks/benchmark_ingestao.py --abas 10 --linhas 20000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def medir(caminho, modo):
+    """Executado no subprocesso: carrega a planilha e imprime as medidas em JSON"""
+    import contextlib
+    import io
+    import resource
+
+    # O diretório atual do subprocesso não tem planilhas, então o import do app
+    # não carrega dados por conta própria
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        rss_base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        inicio = time.perf_counter()
+        dados = app.processar_arquivo_excel(caminho, modo_leitura=modo)
+        duracao = time.perf_counter() - inicio
+    rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    aulas = sum(
+        len(tema['subtemas'])
+        for semestres in dados.values()
+        for materias in semestres.values()
+        for materia in materias
+        for tema in materia['temas']
+    )
+    print(json.dumps({
+        'modo': modo,
+        'segundos': duracao,
+        'aulas': aulas,
+        # ru_maxrss é informado em KiB no Linux
+        'rss_pico_mb': rss_pico / 1024,
+        'rss_carregamento_mb': (rss_pico - rss_base) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=5)
+    parser.add_argument('--linhas', type=int, default=10000)
+    parser.add_argument('--arquivo', help='usa uma planilha existente em vez de gerar uma')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = args.arquivo or gerar_planilha(os.path.join(tmp, 'sintetica.xlsx'), args.abas, args.linhas)
+        linhas_total = args.abas * args.linhas
+
+        print(f"Planilha: {caminho}")
+        for modo in ('completo', 'streaming'):
+            saida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--medir', modo, caminho],
+                cwd=tmp, capture_output=True, text=True, check=True,
+            )
+            resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+            linhas_s = (resultado['aulas'] if args.arquivo else linhas_total) / resultado['segundos']
+            print(
+                f"{modo:>10}: {resultado['segundos']:.2f}s, {linhas_s:,.0f} linhas/s, "
+                f"pico RSS {resultado['rss_pico_mb']:.1f} MB "
+                f"(+{resultado['rss_carregamento_mb']:.1f} MB no carregamento), "
+                f"{resultado['aulas']} aulas"
+            )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--medir':
+        medir(sys.argv[3], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,55 @@
+"""
+Compara o tempo de inicialização do app (criar_app, como faz cada
+worker do gunicorn sem preload) processando a planilha do zero e usando o
+snapshot compilado gravado na inicialização anterior.
+
+    python benchmarks/benchmark_inicializacao.py --abas 10 --linhas 5000
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def iniciar_app(diretorio, diretorio_snapshot):
+    """Importa o app em um subprocesso e retorna (segundos, linhas de saída relevantes)"""
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ, DIRETORIO_SNAPSHOT=diretorio_snapshot)
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, '-c', 'import app; app.criar_app()'],
+        cwd=diretorio, env=ambiente, capture_output=True, text=True, check=True,
+    )
+    duracao = time.perf_counter() - inicio
+    medidas = [linha for linha in saida.stdout.splitlines() if ' em ' in linha and ' ms' in linha]
+    return duracao, medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=10)
+    parser.add_argument('--linhas', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gerar_planilha(os.path.join(tmp, 'sintetica.xlsx'), args.abas, args.linhas)
+        snapshot = os.path.join(tmp, '.snapshot')
+        shutil.rmtree(snapshot, ignore_errors=True)
+
+        print(f"Planilha: {args.abas} abas x {args.linhas} linhas")
+        for rotulo in ('processamento da planilha', 'snapshot compilado'):
+            duracao, medidas = iniciar_app(tmp, snapshot)
+            print(f"{rotulo:>26}: inicialização total {duracao * 1000:,.0f} ms")
+            for medida in medidas:
+                print(f"{'':>28}{medida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Mede o tempo para obter todos os semestres de várias IES: uma requisição por
+semestre x uma única requisição a POST /lote (JSON e NDJSON).
+
+    python benchmarks/benchmark_lote.py --abas 10 --linhas 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DIRETORIO_SNAPSHOT', '')
+
+import app  # noqa: E402
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def cronometrar(funcao, repeticoes):
+    """Mediana, em ms, de várias execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=10)
+    parser.add_argument('--linhas', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, 'sintetica.xlsx')
+        gerar_planilha(arquivo, args.abas, args.linhas)
+        app.publicar_dataset(app.carregar_dataset(arquivo))
+
+    dados = app.dataset_atual['dados']
+    consultas = [{'ies': nome_ies, 'semestre': semestre} for nome_ies in dados for semestre in dados[nome_ies]]
+    cliente = app.app.test_client()
+
+    def uma_por_semestre():
+        for consulta in consultas:
+            cliente.get(f"/{consulta['ies']}/{consulta['semestre']}").get_data()
+
+    print(f"{len(consultas)} semestres em {len(dados)} IES")
+    medidas = [
+        ('uma requisição por semestre', uma_por_semestre),
+        ('POST /lote (JSON)', lambda: cliente.post('/lote', json=consultas).get_data()),
+        ('POST /lote (NDJSON)', lambda: cliente.post('/lote?format=ndjson', json=consultas).get_data()),
+    ]
+    for rotulo, funcao in medidas:
+        print(f"{rotulo:>28}: {cronometrar(funcao, args.repeticoes):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
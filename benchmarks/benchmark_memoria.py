@@ -0,0 +1,117 @@
+"""
+Compara a memória ocupada pelo dataset publicado (dados das IES, respostas e
+páginas pré-serializadas, índice de matérias e índice de busca) nos
+dicionários aninhados e na representação colunar (ARMAZENAMENTO_DADOS=colunar),
+em bytes por aula, e confere que as respostas da API, as consultas paginadas
+e as buscas são idênticas nos dois modos.
+
+As respostas pré-serializadas ocupam o mesmo nos dois modos e são mostradas à
+parte. As IES sintéticas compartilham os mesmos conteúdos e links, como
+acontece com IES que usam o mesmo material, para mostrar também a
+deduplicação dos textos entre IES.
+
+    python benchmarks/benchmark_memoria.py --abas 10 --linhas 20000
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import CABECALHOS, URL_BASE  # noqa: E402
+
+
+def gerar_linhas(linhas, semente):
+    """Linhas de uma aba (cabeçalho + dados); a semente define os links"""
+    aleatorio = random.Random(semente)
+    yield tuple(CABECALHOS)
+    for linha in range(linhas):
+        semestre = float(1 + (linha * 8) // max(linhas, 1))
+        yield (
+            semestre, f"Matéria {linha // 200 + 1}", f"Tema {linha // 25 + 1}", f"Subtema {linha // 5 + 1}",
+            f"Aula {linha + 1}",
+            f"{URL_BASE}/{aleatorio.getrandbits(64):016x}/video/{linha}",
+            f"{URL_BASE}/{aleatorio.getrandbits(64):016x}/pdf/{linha}" if linha % 3 else None,
+            f"{URL_BASE}/{aleatorio.getrandbits(64):016x}/quiz/{linha}" if linha % 4 else None,
+        )
+
+
+def medir(app, armazenamento, abas, linhas):
+    """Retorna (dataset, bytes alocados) do dataset montado no modo indicado"""
+    app.ARMAZENAMENTO_DADOS = armazenamento
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        dados = {f"IES{aba + 1:03d}": app.processar_linhas_ies(f"IES{aba + 1:03d}", gerar_linhas(linhas, 42))
+                 for aba in range(abas)}
+        dataset = app.montar_dataset(dados)
+    del dados
+    gc.collect()
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return dataset, memoria
+
+
+def bytes_pre_serializados(dataset):
+    """Bytes das respostas JSON e páginas HTML prontas, com as variantes comprimidas"""
+    return sum(
+        len(conteudo)
+        for chave in ('respostas', 'paginas')
+        for por_ies in dataset[chave].values()
+        for payload in por_ies.values()
+        for campo, conteudo in payload.items() if campo != 'etag'
+    )
+
+
+def resumo_respostas(dataset):
+    """Respostas completas, uma página de matérias e buscas de cada IES, para comparar os modos"""
+    resumo = {}
+    for nome_ies, busca in dataset['buscas'].items():
+        indice = dataset['indices'][nome_ies]
+        resumo[nome_ies] = (
+            [payload['corpo'] for payload in dataset['respostas'][nome_ies].values()],
+            indice['intervalos'],
+            indice['materias'][len(indice['materias']) // 2:len(indice['materias']) // 2 + 5],
+            [busca.buscar(consulta, limite=20) for consulta in ('aula 1', 'tema', 'materia 3 sub')],
+        )
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=10)
+    parser.add_argument('--linhas', type=int, default=20000)
+    args = parser.parse_args()
+
+    # Importar a partir de um diretório sem planilhas evita o carregamento automático
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+
+    aulas = args.abas * args.linhas
+    print(f"{args.abas} IES x {args.linhas} aulas, dataset publicado")
+    resultados = {}
+    for armazenamento in ('dicionarios', 'colunar'):
+        dataset, memoria = medir(app, armazenamento, args.abas, args.linhas)
+        prontas = bytes_pre_serializados(dataset)
+        resultados[armazenamento] = resumo_respostas(dataset)
+        print(f"{armazenamento:>12}: {memoria / 1024 ** 2:8.1f} MiB, {memoria / aulas:6.0f} bytes/aula "
+              f"(respostas prontas {prontas / 1024 ** 2:.1f} MiB; dados e índices "
+              f"{(memoria - prontas) / aulas:.0f} bytes/aula)")
+        del dataset
+
+    identico = resultados['dicionarios'] == resultados['colunar']
+    print(f"Respostas da API {'idênticas' if identico else 'DIFERENTES'} nos dois modos")
+
+
+if __name__ == '__main__':
+    main()
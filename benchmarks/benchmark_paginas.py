@@ -0,0 +1,91 @@
+"""
+Mede a geração da página HTML de um semestre (?format=html) com milhares de
+aulas: a montagem usada antes a cada requisição (formatação dos dados e
+html += f'...' nos laços), o template Jinja compilado (executado só na carga
+dos dados) e a página pré-renderizada servida pela rota.
+
+    python benchmarks/benchmark_paginas.py --linhas 40000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DIRETORIO_SNAPSHOT', '')
+
+import app  # noqa: E402
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def concatenar_pagina(nome_ies, semestre, materias):
+    """Montagem anterior da página do semestre, por concatenação (sem escape)"""
+    html = f"<!DOCTYPE html><html><head><title>Conteúdos da IES {nome_ies} - Semestre {semestre}</title></head><body>"
+    for materia in materias:
+        html += f'<div class="materia"><h2>{materia["materia"]}</h2></div>'
+        for tema in materia["temas"]:
+            html += f'<div class="tema"><h3>{tema["tema"]}</h3></div>'
+            for subtema in tema["subtemas"]:
+                html += f'<div class="subtema"><h4>{subtema["subtema"]}</h4></div>'
+                for aula in subtema["aulas"]:
+                    html += f'<div class="aula"><strong>{aula["nome"]}</strong>'
+                    if aula["link_aula"]:
+                        html += f' | <a href="{aula["link_aula"]}" target="_blank">Aula</a>'
+                    if aula["link_pdf"]:
+                        html += f' | <a href="{aula["link_pdf"]}" target="_blank">PDF</a>'
+                    if aula["link_quiz"]:
+                        html += f' | <a href="{aula["link_quiz"]}" target="_blank">Quiz</a>'
+                    html += '</div>'
+    html += "</body></html>"
+    return html
+
+
+def cronometrar(funcao, repeticoes):
+    """Mediana, em ms, de várias execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=40000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = os.path.join(tmp, 'sintetica.xlsx')
+        gerar_planilha(arquivo, 1, args.linhas)
+        dados = app.processar_arquivo_excel(arquivo)
+
+    nome_ies = next(iter(dados))
+    semestre = next(iter(dados[nome_ies]))
+    materias = app.formatar_resposta_api(dados, nome_ies, semestre)[nome_ies][semestre]
+    aulas = sum(len(subtema['aulas']) for materia in materias for tema in materia['temas'] for subtema in tema['subtemas'])
+    template = app.app.jinja_env.get_template('semestre.html')
+
+    app.publicar_dataset(app.montar_dataset(dados))
+    cliente = app.app.test_client()
+    caminho = f'/{nome_ies}/{semestre}?format=html'
+
+    print(f"Semestre {semestre} da {nome_ies}: {aulas} aulas")
+    medidas = [
+        ('montagem anterior', lambda: concatenar_pagina(
+            nome_ies, semestre, app.formatar_resposta_api(dados, nome_ies, semestre)[nome_ies][semestre])),
+        ('template Jinja', lambda: template.render(nome_ies=nome_ies, semestre=semestre, materias=materias)),
+        ('rota, página pronta', lambda: cliente.get(caminho).get_data()),
+        ('rota, página pronta gzip', lambda: cliente.get(caminho, headers={'Accept-Encoding': 'gzip'}).get_data()),
+    ]
+    for rotulo, funcao in medidas:
+        print(f"{rotulo:>26}: {cronometrar(funcao, args.repeticoes):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
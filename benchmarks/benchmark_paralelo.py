@@ -0,0 +1,62 @@
+"""
+Mede como o carregamento paralelo por IES escala com o número de processos,
+usando uma planilha sintética com 50 abas. Confere também que o resultado de
+cada configuração é idêntico ao do processamento serial.
+
+    python benchmarks/benchmark_paralelo.py --abas 50 --linhas 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=50)
+    parser.add_argument('--linhas', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='*',
+                        help='quantidades de processos a medir (padrão: 1, 2, 4... até o número de CPUs)')
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or sorted({1, cpus} | {2 ** i for i in range(1, 8) if 2 ** i <= cpus})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = gerar_planilha(os.path.join(tmp, 'sintetica.xlsx'), args.abas, args.linhas)
+
+        # Importar a partir de um diretório sem planilhas evita o carregamento automático
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+
+        print(f"Planilha: {args.abas} abas x {args.linhas} linhas, {cpus} CPUs")
+        referencia = None
+        tempo_serial = None
+        for n in workers:
+            with contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                dados = app.processar_arquivo_excel(caminho, workers=n)
+                duracao = time.perf_counter() - inicio
+            if referencia is None:
+                referencia = dados
+                tempo_serial = duracao
+            identico = 'idêntico' if dados == referencia else 'DIFERENTE'
+            print(
+                f"{n:>3} processos: {duracao:6.2f}s, "
+                f"{args.abas * args.linhas / duracao:,.0f} linhas/s, "
+                f"speedup {tempo_serial / duracao:.2f}x ({identico})"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Suíte de benchmarks para acompanhar regressões de desempenho: gera uma
+planilha sintética na escala pedida e mede, com o resultado em JSON,
+
+- ingestão: tempo de processar_arquivo_excel, aulas por segundo e pico de
+  memória (em um subprocesso, para o pico não incluir o resto da suíte)
+- formatação: tempo de formatar_resposta_api por IES e por semestre
+- carga: tempo de montar o dataset (respostas, páginas e índices)
+- rotas: requisições por segundo e latências p50/p99 de cada rota pelo
+  cliente de teste do Flask
+
+    python benchmarks/benchmark_suite.py --abas 5 --linhas 10000 --saida base.json
+    python benchmarks/benchmark_suite.py --abas 5 --linhas 10000 --comparar base.json
+
+Com --comparar, a diferença de cada medida para a execução anterior é
+mostrada ao final (mesmos parâmetros de geração, para a comparação valer).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha, mapeamento_colunas_extras  # noqa: E402
+
+VERSAO_RESULTADO = 1
+
+# Medidas em que um valor maior é melhor (nas demais, menor é melhor)
+MAIOR_MELHOR = ('por_segundo',)
+
+
+def medir_ingestao(caminho):
+    """Executado no subprocesso: processa a planilha e imprime as medidas em JSON"""
+    import resource
+
+    with contextlib.redirect_stdout(sys.stderr):
+        import app
+
+        inicio = time.perf_counter()
+        dados = app.processar_arquivo_excel(caminho)
+        duracao = time.perf_counter() - inicio
+    aulas = sum(
+        len(tema['subtemas'])
+        for semestres in dados.values()
+        for materias in semestres.values()
+        for materia in materias
+        for tema in materia['temas']
+    )
+    print(json.dumps({
+        'segundos': duracao,
+        'aulas': aulas,
+        'aulas_por_segundo': aulas / duracao if duracao else None,
+        # ru_maxrss é informado em KiB no Linux
+        'rss_pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def cronometrar(funcao, repeticoes):
+    """Latências, em segundos, de várias execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def resumir(tempos):
+    tempos = sorted(tempos)
+    return {
+        'p50_ms': tempos[len(tempos) // 2] * 1000,
+        'p99_ms': tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))] * 1000,
+        'media_ms': statistics.fmean(tempos) * 1000,
+    }
+
+
+def medir_formatacao(app, dados, repeticoes):
+    por_ies = []
+    por_semestre = []
+    for nome_ies, semestres in dados.items():
+        por_ies.extend(cronometrar(lambda: app.formatar_resposta_api(dados, nome_ies), repeticoes))
+        for semestre in semestres:
+            por_semestre.extend(cronometrar(lambda: app.formatar_resposta_api(dados, nome_ies, semestre), repeticoes))
+    return {'ies': resumir(por_ies), 'semestre': resumir(por_semestre)}
+
+
+def rotas_medidas(dados):
+    """Caminhos de cada rota, com a primeira IES e o seu primeiro semestre"""
+    nome_ies = next(iter(dados))
+    semestre = next(iter(dados[nome_ies]))
+    return {
+        'pagina_inicial': '/',
+        'listar_ies': '/listar-ies',
+        'ies': f'/{nome_ies}',
+        'ies_gzip': (f'/{nome_ies}', {'Accept-Encoding': 'gzip'}),
+        'ies_304': (f'/{nome_ies}', 'etag'),
+        'semestre': f'/{nome_ies}/{semestre}',
+        'ies_html': f'/{nome_ies}?format=html',
+        'semestre_html': f'/{nome_ies}/{semestre}?format=html',
+        'consulta_parcial': f'/{nome_ies}?limit=20&depth=2',
+        'consulta_campos': f'/{nome_ies}/{semestre}?fields=nome,link_pdf',
+        'buscar': '/buscar?q=aula 1',
+        'buscar_ies': f'/buscar?q=tema&ies={nome_ies}',
+        'metrics': '/metrics',
+    }
+
+
+def medir_rotas(app, dados, requisicoes):
+    cliente = app.app.test_client()
+    resultados = {}
+    for nome, rota in rotas_medidas(dados).items():
+        cabecalhos = {}
+        if isinstance(rota, tuple):
+            rota, cabecalhos = rota
+            if cabecalhos == 'etag':
+                cabecalhos = {'If-None-Match': cliente.get(rota).headers['ETag']}
+        resposta = cliente.get(rota, headers=cabecalhos)
+        tempos = cronometrar(lambda: cliente.get(rota, headers=cabecalhos).get_data(), requisicoes)
+        resultados[nome] = dict(
+            resumir(tempos),
+            rota=rota,
+            status=resposta.status_code,
+            bytes=len(resposta.get_data()),
+            requisicoes_por_segundo=len(tempos) / sum(tempos),
+        )
+    return resultados
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medidas_numericas(resultado, prefixo=''):
+    """Achata o resultado em {caminho.da.medida: valor} para a comparação"""
+    medidas = {}
+    for chave, valor in resultado.items():
+        caminho = f'{prefixo}{chave}'
+        if isinstance(valor, dict):
+            medidas.update(medidas_numericas(valor, f'{caminho}.'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool) and chave not in ('status', 'aulas'):
+            medidas[caminho] = valor
+    return medidas
+
+
+def comparar(anterior, atual):
+    """Mostra a variação de cada medida em relação à execução anterior"""
+    if anterior.get('parametros') != atual['parametros']:
+        print("Aviso: parâmetros de geração diferentes da execução anterior", file=sys.stderr)
+    antes = medidas_numericas(anterior['resultados'])
+    depois = medidas_numericas(atual['resultados'])
+    print(f"Comparação com {anterior.get('codigo') or 'execução anterior'} ({anterior.get('data')}):", file=sys.stderr)
+    for caminho, valor in depois.items():
+        if not antes.get(caminho):
+            continue
+        variacao = (valor - antes[caminho]) / antes[caminho] * 100
+        melhor = variacao > 0 if caminho.endswith(MAIOR_MELHOR) else variacao < 0
+        marca = '' if abs(variacao) < 5 else (' melhor' if melhor else ' PIOR')
+        print(f"  {caminho:<55} {antes[caminho]:>12.3f} -> {valor:>12.3f} ({variacao:+6.1f}%){marca}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=5)
+    parser.add_argument('--linhas', type=int, default=10000)
+    parser.add_argument('--colunas-link', type=int, default=3)
+    parser.add_argument('--esparsidade', type=float, default=None)
+    parser.add_argument('--sujeira', type=float, default=0.0)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=5, help='execuções de formatar_resposta_api por IES/semestre')
+    parser.add_argument('--requisicoes', type=int, default=200, help='requisições por rota')
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: saída padrão)')
+    parser.add_argument('--comparar', help='resultado JSON de uma execução anterior')
+    parser.add_argument('--medir-ingestao', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_ingestao:
+        medir_ingestao(args.medir_ingestao)
+        return
+
+    parametros = {
+        'abas': args.abas, 'linhas': args.linhas, 'colunas_link': args.colunas_link,
+        'esparsidade': args.esparsidade, 'sujeira': args.sujeira, 'semente': args.semente,
+    }
+    # Sem snapshot, para medir o processamento de verdade. Os logs do app
+    # (a partir de WARNING, ex.: linhas sujas) vão para a saída de erros,
+    # deixando a saída padrão só com o JSON.
+    os.environ['DIRETORIO_SNAPSHOT'] = ''
+    os.environ.setdefault('NIVEL_LOG', 'WARNING')
+    if args.colunas_link > 3:
+        os.environ['MAPEAMENTO_COLUNAS'] = json.dumps(mapeamento_colunas_extras(args.colunas_link))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'sintetica.xlsx')
+        inicio = time.perf_counter()
+        gerar_planilha(caminho, args.abas, args.linhas, args.semente, 'IES',
+                       args.colunas_link, args.esparsidade, args.sujeira)
+        print(f"Planilha gerada em {time.perf_counter() - inicio:.1f}s, medindo...", file=sys.stderr)
+
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--medir-ingestao', caminho],
+            cwd=tmp, capture_output=True, text=True, check=True,
+        )
+        ingestao = json.loads(saida.stdout.strip().splitlines()[-1])
+
+        with contextlib.redirect_stdout(sys.stderr):
+            import app
+            dados = app.processar_arquivo_excel(caminho)
+            formatacao = medir_formatacao(app, dados, args.repeticoes)
+            inicio = time.perf_counter()
+            app.publicar_dataset(app.carregar_dataset(caminho))
+            carga = {'segundos': time.perf_counter() - inicio}
+            rotas = medir_rotas(app, dados, args.requisicoes)
+
+    resultado = {
+        'versao': VERSAO_RESULTADO,
+        'data': datetime.now(timezone.utc).isoformat(),
+        'codigo': versao_codigo(),
+        'ambiente': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'parametros': parametros,
+        'resultados': {'ingestao': ingestao, 'formatacao': formatacao, 'carga': carga, 'rotas': rotas},
+    }
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(json.load(f), resultado)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Mede a memória dos workers do gunicorn com a carga dos dados em cada worker
+(sem preload) e com a carga única no processo mestre (gunicorn.conf.py, com
+preload e gc.freeze). Mostra o RSS de cada worker e o PSS, que divide as
+páginas compartilhadas entre os processos que as usam e por isso mostra a
+memória realmente ocupada. Usa /proc, então só funciona no Linux.
+
+    python benchmarks/benchmark_workers.py --abas 10 --linhas 5000 --workers 4
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gerador_planilhas import gerar_planilha  # noqa: E402
+
+CONFIGURACOES = [
+    ('sem preload', ['app:criar_app()']),
+    ('preload + gc.freeze', ['-c', os.path.join(RAIZ, 'gunicorn.conf.py')]),
+]
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def memoria_processo(pid):
+    """Retorna (RSS, PSS) do processo em KiB"""
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if partes[0] in ('Rss:', 'Pss:'):
+                valores[partes[0]] = int(partes[1])
+    return valores['Rss:'], valores['Pss:']
+
+
+def filhos(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(filho) for filho in f.read().split()]
+
+
+def medir(rotulo, argumentos, diretorio, workers, requisicoes):
+    porta = porta_livre()
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ, PORT=str(porta), WEB_CONCURRENCY=str(workers))
+    mestre = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{porta}', '--workers', str(workers), *argumentos],
+        cwd=diretorio, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        inicio = time.perf_counter()
+        while len(filhos(mestre.pid)) < workers:
+            time.sleep(0.1)
+        # As requisições se espalham entre os workers e tocam os dados de todos
+        respondidas = 0
+        while respondidas < requisicoes:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{porta}/IES001/1', timeout=30) as resposta:
+                    resposta.read()
+                respondidas += 1
+            except OSError:
+                time.sleep(0.2)
+        duracao = time.perf_counter() - inicio
+
+        rss_mestre, pss_mestre = memoria_processo(mestre.pid)
+        memorias = [memoria_processo(pid) for pid in filhos(mestre.pid)]
+        pss_total = pss_mestre + sum(pss for _, pss in memorias)
+        print(f"{rotulo}: pronto em {duracao:.1f}s")
+        print(f"  mestre RSS {rss_mestre / 1024:7.1f} MiB")
+        for numero, (rss, pss) in enumerate(memorias, start=1):
+            print(f"  worker {numero} RSS {rss / 1024:7.1f} MiB, PSS {pss / 1024:7.1f} MiB")
+        print(f"  PSS total {pss_total / 1024:7.1f} MiB")
+    finally:
+        mestre.terminate()
+        mestre.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--abas', type=int, default=10)
+    parser.add_argument('--linhas', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requisicoes', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gerar_planilha(os.path.join(tmp, 'sintetica.xlsx'), args.abas, args.linhas)
+        print(f"Planilha: {args.abas} abas x {args.linhas} linhas, {args.workers} workers")
+        for rotulo, argumentos in CONFIGURACOES:
+            medir(rotulo, argumentos, tmp, args.workers, args.requisicoes)
+
+
+if __name__ == '__main__':
+    main()
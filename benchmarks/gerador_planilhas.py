@@ -0,0 +1,112 @@
+"""
+Gerador de planilhas sintéticas no formato do Guia de Estudos, usado pelos
+benchmarks para simular arquivos com muitas IES e muitas linhas.
+
+Além do tamanho (abas e linhas), é possível variar o número de colunas de
+link (as três do formato padrão e colunas extras "Link Extra N", que entram
+na API com o MAPEAMENTO_COLUNAS de mapeamento_colunas_extras), a fração de
+links vazios e a fração de linhas sujas, como as que aparecem em planilhas
+editadas à mão.
+"""
+import argparse
+import random
+
+import openpyxl
+
+CABECALHOS = ['Semestre', 'Materia', 'Tema', 'Subtema', 'Aula', 'Link Aula', 'Link PDF', 'Link Quiz']
+
+# Colunas de link do formato padrão, na ordem de CABECALHOS
+LINKS_PADRAO = ['video', 'pdf', 'quiz']
+
+# Tipos de linha suja gerados com sujeira > 0
+SUJEIRAS = ('espacos', 'semestre_texto', 'campo_vazio', 'linha_vazia', 'duplicada', 'celula_numerica')
+
+URL_BASE = 'https://sanarflix.sanar.com.br/aluno/#/portal/sala-de-aula'
+
+
+def mapeamento_colunas_extras(colunas_link):
+    """Valor de MAPEAMENTO_COLUNAS que inclui as colunas extras de link na API"""
+    return {f'link_extra_{numero}': ['link', 'extra', str(numero)] for numero in range(4, colunas_link + 1)}
+
+
+def sujar_linha(valores, tipo, aleatorio):
+    """Aplica um tipo de sujeira (ver SUJEIRAS) à linha; retorna as linhas a gravar"""
+    if tipo == 'espacos':
+        # Espaços e quebras de linha em volta dos nomes
+        return [[f"  {valor}\n" if isinstance(valor, str) else valor for valor in valores]]
+    if tipo == 'semestre_texto':
+        return [[str(int(valores[0]))] + valores[1:]]
+    if tipo == 'campo_vazio':
+        # Um campo obrigatório (semestre, matéria, tema, subtema ou aula) vazio
+        valores = list(valores)
+        valores[aleatorio.randrange(5)] = None
+        return [valores]
+    if tipo == 'linha_vazia':
+        return [[None] * len(valores), valores]
+    if tipo == 'duplicada':
+        return [valores, list(valores)]
+    # celula_numerica: nome de aula numérico, como quando o Excel converte o texto
+    return [valores[:4] + [aleatorio.randrange(1, 1000)] + valores[5:]]
+
+
+def gerar_planilha(caminho, abas=2, linhas=1000, semente=42, prefixo='IES',
+                   colunas_link=3, esparsidade=None, sujeira=0.0):
+    """
+    Gera um arquivo .xlsx com `abas` IES e `linhas` linhas de dados por aba,
+    com abas nomeadas `prefixo`001, `prefixo`002...
+
+    colunas_link: número de colunas de link (0 a 3 do formato padrão, e acima
+    de 3 colunas "Link Extra N")
+    esparsidade: probabilidade de cada link ficar vazio; None mantém o padrão
+    fixo (o PDF falta em 1 de cada 3 linhas e o quiz em 1 de cada 4)
+    sujeira: fração das linhas com algum dos problemas de SUJEIRAS
+    """
+    aleatorio = random.Random(semente)
+    # write_only evita manter a planilha inteira em memória durante a geração
+    wb = openpyxl.Workbook(write_only=True)
+    tipos_link = LINKS_PADRAO[:colunas_link] + [f'extra{numero}' for numero in range(4, colunas_link + 1)]
+    cabecalhos = CABECALHOS[:5 + min(colunas_link, 3)] + [f'Link Extra {numero}' for numero in range(4, colunas_link + 1)]
+    
+    for numero_aba in range(abas):
+        sheet = wb.create_sheet(title=f"{prefixo}{numero_aba + 1:03d}")
+        sheet.append(cabecalhos)
+        
+        for linha in range(linhas):
+            semestre = float(1 + (linha * 8) // max(linhas, 1))
+            materia = f"Matéria {linha // 200 + 1}"
+            tema = f"Tema {linha // 25 + 1}"
+            subtema = f"Subtema {linha // 5 + 1}"
+            aula = f"Aula {linha + 1}"
+            links = []
+            for numero, tipo in enumerate(tipos_link):
+                if esparsidade is None:
+                    presente = numero == 0 or (numero == 1 and linha % 3) or (numero == 2 and linha % 4) or numero > 2
+                else:
+                    presente = aleatorio.random() >= esparsidade
+                links.append(f"{URL_BASE}/{aleatorio.getrandbits(64):016x}/{tipo}/{linha}" if presente else None)
+            valores = [semestre, materia, tema, subtema, aula] + links
+            
+            if sujeira and aleatorio.random() < sujeira:
+                for valores_sujos in sujar_linha(valores, aleatorio.choice(SUJEIRAS), aleatorio):
+                    sheet.append(valores_sujos)
+            else:
+                sheet.append(valores)
+    
+    wb.save(caminho)
+    return caminho
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('caminho')
+    parser.add_argument('--abas', type=int, default=2)
+    parser.add_argument('--linhas', type=int, default=1000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--prefixo', default='IES')
+    parser.add_argument('--colunas-link', type=int, default=3)
+    parser.add_argument('--esparsidade', type=float, default=None)
+    parser.add_argument('--sujeira', type=float, default=0.0)
+    args = parser.parse_args()
+    gerar_planilha(args.caminho, args.abas, args.linhas, args.semente, args.prefixo,
+                   args.colunas_link, args.esparsidade, args.sujeira)
+    print(f"Planilha gerada: {args.caminho}")
@@ -0,0 +1,364 @@
+"""
+Índice invertido para a busca de aulas por nome de matéria, tema, subtema e
+aula, montado uma vez por IES quando os dados são carregados.
+
+As aulas recebem ids na ordem da resposta da API (semestre > matéria > tema >
+subtema > aula), então cada matéria, tema ou subtema ocupa um intervalo
+contínuo de ids. Na montagem cada termo vira uma lista de intervalos
+(inicio, fim, peso) e, se for frequente, uma máscara de bits por peso (um int
+do Python com um bit por aula). A consulta combina as máscaras dos termos
+com & e |, feitos em C sobre muitas aulas por vez, e só as aulas devolvidas
+são percorridas em Python; os termos raros guardam só os intervalos, que
+ocupam menos, e viram máscaras na consulta.
+"""
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import islice
+
+# Peso de cada nível em que o termo aparece; uma aula pontua pelo nível mais
+# específico que casou com cada termo da consulta
+PESO_MATERIA = 1.0
+PESO_TEMA = 2.0
+PESO_SUBTEMA = 3.0
+PESO_AULA = 4.0
+
+# Termos que casam só como prefixo (autocompletar) valem menos que os exatos
+FATOR_PREFIXO = 0.5
+
+# Limites de termos do vocabulário e de intervalos reunidos ao expandir um
+# prefixo curto; com eles o custo de uma consulta fora do cache não cresce
+# com o vocabulário (o total informado para um prefixo muito curto considera
+# só as expansões reunidas até o limite)
+MAX_EXPANSOES_PREFIXO = 200
+MAX_INTERVALOS_PREFIXO = 1024
+
+# Termos com ao menos este número de intervalos guardam máscaras de bits em
+# vez dos intervalos; os demais são convertidos a cada consulta, com custo
+# proporcional aos seus intervalos
+LIMIAR_MASCARA = 256
+
+# Prefixos já expandidos e resultados de consultas guardados por índice; o
+# autocompletar repete as mesmas consultas e os mesmos prefixos curtos, que são
+# os mais caros de expandir
+MAX_PREFIXOS_EM_CACHE = 1024
+MAX_CONSULTAS_EM_CACHE = 4096
+
+RE_TERMO = re.compile(r'\w+')
+# Tabela de bytes.translate que marca com 1 os bytes com algum bit ligado
+BYTES_OCUPADOS = bytes([0] + [1] * 255)
+
+# Posições dos bits ligados de cada valor de byte, do menos significativo
+BITS_DO_BYTE = tuple(tuple(bit for bit in range(8) if valor >> bit & 1) for valor in range(256))
+
+if hasattr(int, 'bit_count'):
+    contar_aulas = int.bit_count
+else:
+    # Python < 3.10: bem mais lento, por isso é chamado uma vez por consulta
+    def contar_aulas(mascara):
+        return bin(mascara).count('1')
+
+
+@lru_cache(maxsize=65536)
+def normalizar(termo):
+    """Remove acentos e diferenças de maiúsculas (ex.: 'Técnica' -> 'tecnica')"""
+    if termo.isascii():
+        return termo.casefold()
+    decomposto = unicodedata.normalize('NFKD', termo)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def extrair_termos(texto):
+    """Termos normalizados de um texto, na ordem em que aparecem"""
+    # Acentos como caracteres separados (texto decomposto) quebrariam os termos
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFC', texto)
+    return [normalizar(termo) for termo in RE_TERMO.findall(texto)]
+
+
+def achatar_intervalos(intervalos):
+    """
+    Converte intervalos (inicio, fim, peso) ordenados pelo início, que podem se
+    sobrepor, em intervalos disjuntos com o maior peso de cada trecho; trechos
+    vizinhos com o mesmo peso viram um só intervalo
+    """
+    if len(intervalos) < 2:
+        return list(intervalos)
+    resultado = [intervalos[0]]
+    for intervalo in islice(intervalos, 1, None):
+        inicio_anterior, fim_anterior, peso_anterior = resultado[-1]
+        if intervalo[0] < fim_anterior:
+            break
+        if intervalo[0] == fim_anterior and intervalo[2] == peso_anterior:
+            resultado[-1] = (inicio_anterior, intervalo[1], peso_anterior)
+        else:
+            resultado.append(intervalo)
+    else:
+        return resultado
+
+    pontos = sorted({ponto for inicio, fim, _ in intervalos for ponto in (inicio, fim)})
+    resultado = []
+    ativos = []
+    proximo = 0
+    for inicio, fim in zip(pontos, pontos[1:]):
+        while proximo < len(intervalos) and intervalos[proximo][0] <= inicio:
+            heapq.heappush(ativos, (-intervalos[proximo][2], intervalos[proximo][1]))
+            proximo += 1
+        while ativos and ativos[0][1] <= inicio:
+            heapq.heappop(ativos)
+        if not ativos:
+            continue
+        peso = -ativos[0][0]
+        if resultado and resultado[-1][1] == inicio and resultado[-1][2] == peso:
+            resultado[-1] = (resultado[-1][0], fim, peso)
+        else:
+            resultado.append((inicio, fim, peso))
+    return resultado
+
+
+def marcar_intervalos(bits, intervalos, tamanho, fator=1.0):
+    """
+    Liga o bit de cada aula dos intervalos disjuntos (inicio, fim, peso) em
+    bits, {peso: bytearray de tamanho bytes}, no peso multiplicado pelo fator
+    """
+    for inicio, fim, peso in intervalos:
+        peso *= fator
+        dados = bits.get(peso)
+        if dados is None:
+            dados = bits[peso] = bytearray(tamanho)
+        if fim - inicio == 1:
+            dados[inicio >> 3] |= 1 << (inicio & 7)
+            continue
+        # Bits soltos nas pontas e os bytes inteiros do meio de uma vez
+        while inicio < fim and (inicio & 7 or fim - inicio < 8):
+            dados[inicio >> 3] |= 1 << (inicio & 7)
+            inicio += 1
+        if inicio < fim:
+            cheios = (fim - inicio) >> 3
+            dados[inicio >> 3:(inicio >> 3) + cheios] = b'\xff' * cheios
+            inicio += cheios << 3
+            while inicio < fim:
+                dados[inicio >> 3] |= 1 << (inicio & 7)
+                inicio += 1
+
+
+def mascaras_de_intervalos(intervalos):
+    """{peso: máscara} das aulas de intervalos disjuntos (inicio, fim, peso)"""
+    if not intervalos:
+        return {}
+    bits = {}
+    marcar_intervalos(bits, intervalos, (intervalos[-1][1] + 7) // 8)
+    return {peso: int.from_bytes(dados, 'little') for peso, dados in bits.items()}
+
+
+def combinar(parciais, mascaras):
+    """
+    Acrescenta um termo às pontuações parciais: {pontuação: aulas} das aulas
+    que também casam com o termo, somando o peso com que casam (aulas None
+    são todas as aulas)
+    """
+    combinadas = {}
+    for pontuacao, aulas in parciais.items():
+        for peso, mascara in mascaras.items():
+            comuns = mascara if aulas is None else aulas & mascara
+            if comuns:
+                chave = pontuacao + peso
+                combinadas[chave] = combinadas[chave] | comuns if chave in combinadas else comuns
+    return combinadas
+
+
+def primeiras_aulas(mascara, quantidade):
+    """Ids das primeiras aulas (menores ids) ligadas na máscara, até quantidade"""
+    dados = mascara.to_bytes((mascara.bit_length() + 7) // 8, 'little')
+    # find em C pula os bytes vazios, que são quase todos em uma máscara esparsa
+    ocupados = dados.translate(BYTES_OCUPADOS)
+    ids = []
+    posicao = ocupados.find(1)
+    while posicao >= 0:
+        for bit in BITS_DO_BYTE[dados[posicao]]:
+            ids.append((posicao << 3) + bit)
+            if len(ids) >= quantidade:
+                return ids
+        posicao = ocupados.find(1, posicao + 1)
+    return ids
+
+
+class IndiceBusca:
+    """Índice invertido das aulas de uma IES"""
+
+    __slots__ = ('aulas', 'postings', 'mascaras', 'vocabulario', 'intervalos_semestres', 'prefixos', 'consultas')
+
+    def __init__(self, semestres, aulas=None):
+        """
+        semestres: {semestre: [matérias]} no formato de formatar_resposta_api
+        aulas: sequência com a tupla de cada aula na ordem dos ids, montada
+        na leitura (ver dados_colunares.py); sem ela o índice guarda as
+        tuplas com os objetos das aulas
+        """
+        self.aulas = [] if aulas is None else aulas
+        self.intervalos_semestres = {}
+        postings = {}
+        proxima = 0
+
+        def indexar(nome, inicio, fim, peso):
+            for termo in set(extrair_termos(nome)):
+                postings.setdefault(termo, []).append((inicio, fim, peso))
+
+        for semestre in sorted(semestres):
+            inicio_semestre = proxima
+            for materia in semestres[semestre]:
+                inicio_materia = proxima
+                for tema in materia['temas']:
+                    inicio_tema = proxima
+                    for subtema in tema['subtemas']:
+                        inicio_subtema = proxima
+                        for aula in subtema['aulas']:
+                            indexar(aula['nome'], proxima, proxima + 1, PESO_AULA)
+                            if aulas is None:
+                                self.aulas.append((semestre, materia['materia'], tema['tema'], subtema['subtema'], aula))
+                            proxima += 1
+                        indexar(subtema['subtema'], inicio_subtema, proxima, PESO_SUBTEMA)
+                    indexar(tema['tema'], inicio_tema, proxima, PESO_TEMA)
+                indexar(materia['materia'], inicio_materia, proxima, PESO_MATERIA)
+            self.intervalos_semestres[semestre] = (inicio_semestre, proxima)
+
+        # Os grupos são indexados ao terminar, então a ordem precisa ser refeita;
+        # os intervalos ficam disjuntos, com o maior peso de cada trecho
+        self.postings = {}
+        self.mascaras = {}
+        for termo, intervalos in postings.items():
+            intervalos = achatar_intervalos(sorted(intervalos))
+            if len(intervalos) >= LIMIAR_MASCARA:
+                self.mascaras[termo] = mascaras_de_intervalos(intervalos)
+            else:
+                self.postings[termo] = intervalos
+        self.vocabulario = sorted(postings)
+        self.prefixos = {}
+        self.consultas = {}
+
+    def expansoes(self, termo):
+        """Termos do vocabulário que começam com o termo (sem ele mesmo), até MAX_EXPANSOES_PREFIXO"""
+        posicao = bisect_left(self.vocabulario, termo)
+        if posicao < len(self.vocabulario) and self.vocabulario[posicao] == termo:
+            posicao += 1
+        fim = min(posicao + MAX_EXPANSOES_PREFIXO, len(self.vocabulario))
+        while posicao < fim and self.vocabulario[posicao].startswith(termo):
+            yield self.vocabulario[posicao]
+            posicao += 1
+
+    def mascaras_do_termo(self, termo):
+        """{peso: máscara} das aulas em que o termo aparece, pelo nível mais específico"""
+        mascaras = self.mascaras.get(termo)
+        if mascaras is None:
+            mascaras = mascaras_de_intervalos(self.postings.get(termo, ()))
+        return mascaras
+
+    def custo_termo(self, termo):
+        """Custo de obter as máscaras do termo, em intervalos convertidos"""
+        if termo in self.mascaras:
+            return LIMIAR_MASCARA
+        return len(self.postings.get(termo, ()))
+
+    def mascaras_do_prefixo(self, termo):
+        """
+        {peso: máscara} das aulas que casam com o termo, exato ou como prefixo,
+        com o maior peso de cada aula. As expansões são reunidas em ordem
+        alfabética até MAX_EXPANSOES_PREFIXO termos ou MAX_INTERVALOS_PREFIXO
+        de custo, e o resultado fica em cache: a consulta usa sempre as mesmas
+        expansões, com o prefixo em cache ou não.
+        """
+        em_cache = self.prefixos.get(termo)
+        if em_cache is not None:
+            return em_cache
+
+        candidatos = [(termo, 1.0)]
+        custo = self.custo_termo(termo)
+        for candidato in self.expansoes(termo):
+            if custo >= MAX_INTERVALOS_PREFIXO:
+                break
+            candidatos.append((candidato, FATOR_PREFIXO))
+            custo += self.custo_termo(candidato)
+
+        # Os termos raros são marcados juntos, em uma máscara por peso, e as
+        # máscaras dos frequentes entram com |
+        raros = [(self.postings[candidato], fator) for candidato, fator in candidatos if candidato in self.postings]
+        bits = {}
+        if raros:
+            tamanho = (max(intervalos[-1][1] for intervalos, _ in raros) + 7) // 8
+            for intervalos, fator in raros:
+                marcar_intervalos(bits, intervalos, tamanho, fator)
+        por_peso = {peso: int.from_bytes(dados, 'little') for peso, dados in bits.items()}
+        for candidato, fator in candidatos:
+            for peso, mascara in self.mascaras.get(candidato, {}).items():
+                peso *= fator
+                por_peso[peso] = por_peso[peso] | mascara if peso in por_peso else mascara
+        # Cada aula fica só na máscara do maior peso com que casa
+        resultado = {}
+        cobertas = 0
+        for peso in sorted(por_peso, reverse=True):
+            mascara = por_peso[peso] & ~cobertas
+            if mascara:
+                resultado[peso] = mascara
+            cobertas |= por_peso[peso]
+
+        # Várias threads podem consultar o mesmo índice; limpar em vez de
+        # remover o mais antigo evita manter uma ordem compartilhada entre elas
+        if len(self.prefixos) >= MAX_PREFIXOS_EM_CACHE:
+            self.prefixos.clear()
+        self.prefixos[termo] = resultado
+        return resultado
+
+    def buscar(self, consulta, semestre=None, limite=20):
+        """
+        Retorna (total, [(pontuação, aula)]) das aulas que casam com todos os
+        termos da consulta; o último termo também casa como prefixo. aula é a
+        tupla (semestre, matéria, tema, subtema, objeto da aula).
+        """
+        termos = extrair_termos(consulta)
+        if not termos:
+            return 0, []
+        if semestre is not None and semestre not in self.intervalos_semestres:
+            return 0, []
+
+        chave = (tuple(termos), semestre, limite)
+        resultado = self.consultas.get(chave)
+        if resultado is None:
+            resultado = self.executar_busca(termos, semestre, limite)
+            if len(self.consultas) >= MAX_CONSULTAS_EM_CACHE:
+                self.consultas.clear()
+            self.consultas[chave] = resultado
+        return resultado
+
+    def executar_busca(self, termos, semestre, limite):
+        """Busca sem passar pelo cache de consultas"""
+        # Termos repetidos contam uma vez; o último é o que está sendo digitado
+        # e só é expandido como prefixo se os demais tiverem aulas em comum
+        digitado = termos[-1]
+        exatos = sorted({termo for termo in termos[:-1] if termo != digitado}, key=self.custo_termo)
+
+        aulas = None
+        if semestre is not None:
+            inicio, fim = self.intervalos_semestres[semestre]
+            aulas = (1 << fim) - (1 << inicio)
+        # Pontuação parcial -> máscara das aulas que a têm
+        parciais = {0.0: aulas}
+        for termo in exatos:
+            parciais = combinar(parciais, self.mascaras_do_termo(termo))
+            if not parciais:
+                return 0, []
+        parciais = combinar(parciais, self.mascaras_do_prefixo(digitado))
+
+        # As máscaras das pontuações são disjuntas
+        encontradas = 0
+        for mascara in parciais.values():
+            encontradas |= mascara
+        total = contar_aulas(encontradas)
+        resultados = []
+        for pontuacao in sorted(parciais, reverse=True):
+            for id_aula in primeiras_aulas(parciais[pontuacao], limite - len(resultados)):
+                resultados.append((pontuacao, self.aulas[id_aula]))
+            if len(resultados) >= limite:
+                break
+        return total, resultados
@@ -0,0 +1,165 @@
+"""
+Cache em memória das respostas montadas a cada requisição (consultas
+parciais e /buscar), com:
+
+- cálculo único por chave: requisições simultâneas à mesma chave esperam o
+  cálculo em andamento em vez de repeti-lo (sem efeito manada quando uma
+  chave muito pedida expira ou ainda não existe)
+- stale-while-revalidate: uma entrada vencida continua sendo servida por
+  até janela_revalidacao segundos enquanto uma thread a recalcula
+- validade com variação aleatória, para que entradas gravadas juntas não
+  vençam todas no mesmo instante
+- LRU limitado pelo total de bytes das respostas guardadas
+
+As chaves incluem a identidade do conteúdo (ETag da IES ou assinatura do
+dataset) e os parâmetros da consulta, então dados novos nunca leem entradas
+antigas. O cache é de cada processo.
+"""
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from logs import NOME_LOGGER
+
+logger = logging.getLogger(NOME_LOGGER)
+
+# Custo aproximado, em bytes, de cada entrada além da resposta (chave e listas)
+CUSTO_ENTRADA = 200
+
+
+class CalculoEmAndamento:
+    """Resultado de um cálculo esperado pelas requisições da mesma chave"""
+
+    __slots__ = ('concluido', 'valor', 'erro')
+
+    def __init__(self):
+        self.concluido = threading.Event()
+        self.valor = None
+        self.erro = None
+
+    def concluir(self, valor=None, erro=None):
+        self.valor = valor
+        self.erro = erro
+        self.concluido.set()
+
+    def aguardar(self):
+        self.concluido.wait()
+        if self.erro is not None:
+            raise self.erro
+        return self.valor
+
+
+class CacheRespostas:
+    """LRU de respostas serializadas (bytes) com cálculo único por chave"""
+
+    def __init__(self, max_bytes, validade, variacao_validade=0.1, janela_revalidacao=60):
+        """
+        max_bytes: total de bytes das respostas guardadas (0 = cache desativado)
+        validade: segundos até uma entrada vencer, com variação aleatória de
+        até variacao_validade (fração) para mais ou para menos
+        janela_revalidacao: segundos, depois de vencida, em que a entrada
+        ainda é servida enquanto é recalculada em segundo plano
+        """
+        self.max_bytes = max_bytes
+        self.validade = validade
+        self.variacao_validade = variacao_validade
+        self.janela_revalidacao = janela_revalidacao
+        self.contagens = {
+            'acerto': 0, 'desatualizado': 0, 'agrupado': 0, 'falha': 0, 'descarte': 0, 'erro_revalidacao': 0,
+        }
+        self.reiniciar_trava()
+
+    def reiniciar_trava(self):
+        """
+        Recria a trava e esvazia o cache (ex.: no processo filho depois de um
+        fork, onde as threads dos cálculos em andamento não existem)
+        """
+        self.trava = threading.Lock()
+        # chave -> [valor, tamanho, vence_em, revalidar_ate]
+        self.entradas = OrderedDict()
+        self.em_andamento = {}
+        self.bytes = 0
+
+    def obter(self, chave, calcular):
+        """
+        Retorna a resposta da chave, chamando calcular() (que retorna bytes)
+        só se ela não estiver no cache nem sendo calculada por outra requisição
+        """
+        if not self.max_bytes:
+            return calcular()
+
+        agora = time.monotonic()
+        with self.trava:
+            entrada = self.entradas.get(chave)
+            if entrada is not None and agora < entrada[3]:
+                self.entradas.move_to_end(chave)
+                if agora < entrada[2]:
+                    self.contagens['acerto'] += 1
+                    return entrada[0]
+                # Vencida mas dentro da janela: serve a versão guardada e
+                # recalcula uma única vez em segundo plano
+                self.contagens['desatualizado'] += 1
+                if chave not in self.em_andamento:
+                    calculo = self.em_andamento[chave] = CalculoEmAndamento()
+                    threading.Thread(target=self.revalidar, args=(chave, calcular, calculo), daemon=True).start()
+                return entrada[0]
+
+            calculo = self.em_andamento.get(chave)
+            if calculo is None:
+                self.contagens['falha'] += 1
+                calculo = self.em_andamento[chave] = CalculoEmAndamento()
+                dono = True
+            else:
+                self.contagens['agrupado'] += 1
+                dono = False
+        if dono:
+            return self.calcular(chave, calcular, calculo)
+        return calculo.aguardar()
+
+    def calcular(self, chave, calcular, calculo):
+        try:
+            valor = calcular()
+        except Exception as erro:
+            with self.trava:
+                self.em_andamento.pop(chave, None)
+            calculo.concluir(erro=erro)
+            raise
+        self.guardar(chave, valor)
+        calculo.concluir(valor)
+        return valor
+
+    def revalidar(self, chave, calcular, calculo):
+        """Recalcula uma entrada vencida; em caso de erro a versão guardada continua até sair da janela"""
+        try:
+            self.calcular(chave, calcular, calculo)
+        except Exception:
+            with self.trava:
+                self.contagens['erro_revalidacao'] += 1
+            logger.exception("Erro ao revalidar a resposta em cache %r; a versão guardada continua em uso", chave)
+
+    def guardar(self, chave, valor):
+        tamanho = len(valor) + CUSTO_ENTRADA
+        validade = self.validade * (1 + random.uniform(-self.variacao_validade, self.variacao_validade))
+        vence_em = time.monotonic() + validade
+        with self.trava:
+            self.em_andamento.pop(chave, None)
+            anterior = self.entradas.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= anterior[1]
+            # Respostas maiores que um oitavo do cache não são guardadas, para
+            # que uma única consulta não esvazie o LRU
+            if tamanho > self.max_bytes // 8:
+                return
+            self.entradas[chave] = [valor, tamanho, vence_em, vence_em + self.janela_revalidacao]
+            self.bytes += tamanho
+            while self.bytes > self.max_bytes:
+                _, (_, tamanho_descartado, _, _) = self.entradas.popitem(last=False)
+                self.bytes -= tamanho_descartado
+                self.contagens['descarte'] += 1
+
+    def estatisticas(self):
+        """Contagens por resultado, entradas e bytes guardados"""
+        with self.trava:
+            return dict(self.contagens, entradas=len(self.entradas), bytes=self.bytes)
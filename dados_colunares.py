@@ -0,0 +1,215 @@
+"""
+Representação colunar e compacta dos dados de uma IES, usada no lugar dos
+dicionários aninhados quando ARMAZENAMENTO_DADOS=colunar.
+
+Os textos distintos da IES (nomes e links) ficam numa única tabela e as
+colunas guardam só a posição de cada texto, em arrays de inteiros. As aulas
+ficam na ordem da resposta da API e cada nível (semestre > matéria > tema)
+guarda o nome e o intervalo dos filhos, então um semestre, uma matéria ou um
+tema é identificado por um número inteiro. Os textos são internados com
+sys.intern, de modo que links repetidos em várias IES ocupam uma única cópia
+no processo.
+
+IESColunar se comporta como o dicionário no formato das respostas montado por
+processar_linhas_ies ({semestre: [{'materia', 'temas': [...]}]}), montando
+as matérias de um semestre só quando ele é acessado, e pode ser comparada com
+ele. O índice de matérias e o índice de busca também guardam só posições nas
+colunas (ver ItensColunares), e as matérias e aulas das respostas paginadas e
+de /buscar são montadas quando a resposta é montada.
+"""
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Sequence
+
+# Posição reservada na tabela de textos para campos vazios (None)
+TEXTO_VAZIO = 0
+
+
+class IESColunar(Mapping):
+    """Dados de uma IES em colunas: {semestre: [matérias]}"""
+
+    __slots__ = (
+        'textos', 'campos', 'semestres',
+        'nomes_materias', 'limites_materias',
+        'nomes_temas', 'limites_temas',
+        'subtemas', 'colunas_aulas',
+    )
+
+    def __init__(self, ies_estruturada, campos):
+        """
+        ies_estruturada: dicionário no formato das respostas, montado por
+        processar_linhas_ies
+        campos: campos do objeto da aula além de 'nome', na ordem de saída
+        """
+        self.textos = [None]
+        posicoes = {None: TEXTO_VAZIO}
+
+        def posicao(texto):
+            if texto not in posicoes:
+                posicoes[texto] = len(self.textos)
+                self.textos.append(sys.intern(texto))
+            return posicoes[texto]
+
+        self.campos = tuple(['nome'] + list(campos))
+        # Semestre -> intervalo das suas matérias; o dicionário mantém a ordem
+        self.semestres = {}
+        self.nomes_materias = array('I')
+        self.limites_materias = array('I', [0])
+        self.nomes_temas = array('I')
+        self.limites_temas = array('I', [0])
+        self.subtemas = array('I')
+        self.colunas_aulas = tuple(array('I') for _ in self.campos)
+
+        for semestre, materias in ies_estruturada.items():
+            inicio_semestre = len(self.nomes_materias)
+            for materia in materias:
+                self.nomes_materias.append(posicao(materia['materia']))
+                for tema in materia['temas']:
+                    self.nomes_temas.append(posicao(tema['tema']))
+                    for subtema in tema['subtemas']:
+                        for aula in subtema['aulas']:
+                            self.subtemas.append(posicao(subtema['subtema']))
+                            for coluna, campo in zip(self.colunas_aulas, self.campos):
+                                coluna.append(posicao(aula.get(campo)))
+                    self.limites_temas.append(len(self.subtemas))
+                self.limites_materias.append(len(self.nomes_temas))
+            self.semestres[sys.intern(semestre)] = (inicio_semestre, len(self.nomes_materias))
+
+    def __getstate__(self):
+        return {nome: getattr(self, nome) for nome in self.__slots__}
+
+    def __setstate__(self, estado):
+        for nome, valor in estado.items():
+            setattr(self, nome, valor)
+        # Um pickle (snapshot ou processo do pool) cria cópias dos textos
+        self.textos = [texto if texto is None else sys.intern(texto) for texto in self.textos]
+
+    def __getitem__(self, semestre):
+        inicio, fim = self.semestres[semestre]
+        return [self.materia(id_materia) for id_materia in range(inicio, fim)]
+
+    def __iter__(self):
+        return iter(self.semestres)
+
+    def __len__(self):
+        return len(self.semestres)
+
+    def __contains__(self, semestre):
+        return semestre in self.semestres
+
+    def __eq__(self, outro):
+        if isinstance(outro, IESColunar):
+            # As posições dependem da ordem dos textos, então compara os textos
+            # de cada coluna e não os arrays
+            return (self.campos == outro.campos and self.semestres == outro.semestres
+                    and self.limites_materias == outro.limites_materias
+                    and self.limites_temas == outro.limites_temas
+                    and self.textos_coluna(self.nomes_materias) == outro.textos_coluna(outro.nomes_materias)
+                    and self.textos_coluna(self.nomes_temas) == outro.textos_coluna(outro.nomes_temas)
+                    and self.textos_coluna(self.subtemas) == outro.textos_coluna(outro.subtemas)
+                    and all(self.textos_coluna(a) == outro.textos_coluna(b)
+                            for a, b in zip(self.colunas_aulas, outro.colunas_aulas)))
+        return Mapping.__eq__(self, outro)
+
+    __hash__ = None
+
+    def textos_coluna(self, coluna):
+        """Textos de uma coluna, na ordem"""
+        textos = self.textos
+        return [textos[posicao] for posicao in coluna]
+
+    def materia(self, id_materia):
+        """Matéria com os seus temas, no formato da resposta"""
+        textos = self.textos
+        return {
+            'materia': textos[self.nomes_materias[id_materia]],
+            'temas': [
+                {'tema': textos[self.nomes_temas[id_tema]], 'subtemas': self.subtemas_tema(id_tema)}
+                for id_tema in range(self.limites_materias[id_materia], self.limites_materias[id_materia + 1])
+            ],
+        }
+
+    def materia_semestre(self, semestre, id_materia):
+        """(semestre, matéria), o item do índice de matérias"""
+        return semestre, self.materia(id_materia)
+
+    def aula_semestre(self, semestre, linha):
+        """(semestre, matéria, tema, subtema, aula) da linha, o item do índice de busca"""
+        textos = self.textos
+        id_tema = bisect_right(self.limites_temas, linha) - 1
+        id_materia = bisect_right(self.limites_materias, id_tema) - 1
+        return (
+            semestre,
+            textos[self.nomes_materias[id_materia]],
+            textos[self.nomes_temas[id_tema]],
+            textos[self.subtemas[linha]],
+            {campo: textos[coluna[linha]] for campo, coluna in zip(self.campos, self.colunas_aulas)},
+        )
+
+    def materias_semestres(self, semestres):
+        """Matérias dos semestres, na ordem dada, como (semestre, matéria) montados na leitura"""
+        return ItensColunares([(semestre, *self.semestres[semestre]) for semestre in semestres], self.materia_semestre)
+
+    def aulas_semestres(self, semestres):
+        """Aulas dos semestres, na ordem dada, como as tuplas do índice de busca montadas na leitura"""
+        blocos = []
+        for semestre in semestres:
+            inicio, fim = self.semestres[semestre]
+            blocos.append((
+                semestre,
+                self.limites_temas[self.limites_materias[inicio]],
+                self.limites_temas[self.limites_materias[fim]],
+            ))
+        return ItensColunares(blocos, self.aula_semestre)
+
+    def subtemas_tema(self, id_tema):
+        """Lista [{'subtema', 'aulas': [aula]}] de um tema, no formato da resposta"""
+        textos = self.textos
+        inicio, fim = self.limites_temas[id_tema], self.limites_temas[id_tema + 1]
+        colunas = [coluna[inicio:fim] for coluna in self.colunas_aulas]
+        return [
+            {'subtema': textos[subtema], 'aulas': [{campo: textos[valor] for campo, valor in zip(self.campos, valores)}]}
+            for subtema, *valores in zip(self.subtemas[inicio:fim], *colunas)
+        ]
+
+
+class ItensColunares(Sequence):
+    """
+    Sequência somente leitura de matérias ou aulas de uma IESColunar,
+    percorridas semestre a semestre. Guarda só onde cada semestre começa nas
+    colunas; o item da posição é montado por montar(semestre, posição na IES)
+    quando é lido.
+    """
+
+    __slots__ = ('inicios', 'blocos', 'tamanho', 'montar')
+
+    def __init__(self, blocos, montar):
+        """blocos: [(semestre, início, fim)] com as posições de cada semestre na IES"""
+        self.inicios = []
+        self.blocos = []
+        self.tamanho = 0
+        for semestre, inicio, fim in blocos:
+            self.inicios.append(self.tamanho)
+            self.blocos.append((semestre, inicio))
+            self.tamanho += fim - inicio
+        self.montar = montar
+
+    def __len__(self):
+        return self.tamanho
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return [self[indice] for indice in range(*posicao.indices(self.tamanho))]
+        if posicao < 0:
+            posicao += self.tamanho
+        if not 0 <= posicao < self.tamanho:
+            raise IndexError(posicao)
+        bloco = bisect_right(self.inicios, posicao) - 1
+        semestre, inicio = self.blocos[bloco]
+        return self.montar(semestre, inicio + posicao - self.inicios[bloco])
+
+    def intervalos(self):
+        """{semestre: (início, fim)} das posições de cada semestre na sequência"""
+        fins = self.inicios[1:] + [self.tamanho]
+        return {semestre: (inicio, fim) for (semestre, _), inicio, fim in zip(self.blocos, self.inicios, fins)}
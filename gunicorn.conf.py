@@ -0,0 +1,47 @@
+"""
+Configuração do gunicorn: gunicorn -c gunicorn.conf.py
+
+Os dados são carregados uma única vez no processo mestre (preload_app) pela
+fábrica criar_app, e os workers os herdam no fork, compartilhando as páginas
+de memória com o mestre enquanto elas não forem escritas (copy-on-write).
+
+As recargas chegam a todos os processos pela geração compartilhada em
+ARQUIVO_GERACAO_DADOS (ver app.py): o processo que recarrega incrementa a
+geração e os demais recarregam ao perceber a mudança.
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+wsgi_app = 'app:criar_app()'
+preload_app = True
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+# Um arquivo de geração por instância do servidor (o pid do mestre), definido
+# antes do app ser importado para que o mestre e os workers usem o mesmo
+os.environ.setdefault(
+    'ARQUIVO_GERACAO_DADOS',
+    os.path.join(tempfile.gettempdir(), f"api_guias_geracao_{os.getpid()}"),
+)
+
+
+def when_ready(server):
+    """
+    Chamado no mestre depois da carga e antes de criar os workers. O gc.freeze
+    move os objetos já carregados para uma geração permanente que o coletor
+    não percorre: sem isso, cada coleta nos workers escreveria nos cabeçalhos
+    de todos os objetos e copiaria as páginas compartilhadas.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def on_exit(server):
+    """Remove o arquivo de geração desta instância e o estado das recargas"""
+    try:
+        os.remove(os.environ['ARQUIVO_GERACAO_DADOS'])
+    except OSError:
+        pass
+    shutil.rmtree(f"{os.environ['ARQUIVO_GERACAO_DADOS']}.recargas", ignore_errors=True)
@@ -0,0 +1,55 @@
+"""
+Configuração dos logs da API (logger 'api_guias'), controlada por variáveis
+de ambiente:
+
+- NIVEL_LOG: DEBUG, INFO (padrão), WARNING ou ERROR. Os detalhes por aba e
+  por cabeçalho da ingestão ficam em DEBUG.
+- FORMATO_LOG: 'texto' (padrão) ou 'json', uma linha JSON por evento com os
+  campos passados em extra (ex.: ies, duracao_ms), para agregadores de logs.
+"""
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+NOME_LOGGER = 'api_guias'
+
+# Atributos que todo LogRecord tem; os demais vieram de extra
+ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class FormatadorJson(logging.Formatter):
+    """Formata cada evento como um objeto JSON em uma linha"""
+
+    def format(self, record):
+        evento = {
+            'momento': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in ATRIBUTOS_PADRAO:
+                evento[chave] = valor
+        if record.exc_info:
+            evento['excecao'] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+def configurar_logs():
+    """Configura o logger da API uma única vez e o retorna"""
+    logger = logging.getLogger(NOME_LOGGER)
+    if logger.handlers:
+        return logger
+
+    # Na saída padrão, como os prints que os logs substituíram
+    handler = logging.StreamHandler(sys.stdout)
+    if os.environ.get('FORMATO_LOG', 'texto') == 'json':
+        handler.setFormatter(FormatadorJson())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get('NIVEL_LOG', 'INFO').upper())
+    logger.propagate = False
+    return logger
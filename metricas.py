@@ -0,0 +1,163 @@
+"""
+Métricas no formato de texto do Prometheus, expostas em /metrics.
+
+Contadores, medidores e histogramas com rótulos, sem dependências externas.
+Os valores são de cada processo: com vários workers do gunicorn cada um
+responde pelas suas requisições (o rótulo processo de api_guias_info
+identifica o worker que respondeu a coleta).
+"""
+import bisect
+import math
+import threading
+
+# Limites padrão dos histogramas de duração, em segundos
+LIMITES_DURACAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Limites dos histogramas de tamanho, em bytes
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def formatar_valor(valor):
+    if valor == math.inf:
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+def formatar_rotulos(nomes, valores):
+    if not nomes:
+        return ''
+    pares = []
+    for nome, valor in zip(nomes, valores):
+        valor = str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pares.append(f'{nome}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+class Metrica:
+    """
+    Base das métricas: nome, texto de ajuda e nomes dos rótulos. Com uma
+    função, os valores são lidos dela a cada coleta, para expor contagens
+    mantidas em outro lugar; ela retorna {rótulos: valor}, um número quando
+    não há rótulos, ou None quando não há o que expor.
+    """
+
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=(), funcao=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.funcao = funcao
+        self.trava = threading.Lock()
+        self.valores = {}
+
+    def reiniciar_trava(self):
+        """Recria a trava (ex.: no processo filho depois de um fork)"""
+        self.trava = threading.Lock()
+
+    def amostras(self):
+        """Linhas (sufixo, rótulos, valores dos rótulos, valor) da métrica"""
+        if self.funcao is not None:
+            valores = self.funcao()
+            if valores is None:
+                return []
+            if not isinstance(valores, dict):
+                valores = {(): valores}
+        else:
+            with self.trava:
+                valores = dict(self.valores)
+        return [('', self.rotulos, chave, valor) for chave, valor in valores.items()]
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        for sufixo, nomes, valores, valor in self.amostras():
+            linhas.append(f'{self.nome}{sufixo}{formatar_rotulos(nomes, valores)} {formatar_valor(valor)}')
+        return linhas
+
+
+class Contador(Metrica):
+    """Valor que só aumenta (ex.: total de requisições)"""
+
+    tipo = 'counter'
+
+    def incrementar(self, *rotulos, valor=1):
+        with self.trava:
+            self.valores[rotulos] = self.valores.get(rotulos, 0) + valor
+
+
+class Medidor(Metrica):
+    """Valor que sobe e desce (ex.: número de IES carregadas)"""
+
+    tipo = 'gauge'
+
+    def definir(self, *rotulos, valor):
+        with self.trava:
+            self.valores[rotulos] = valor
+
+
+class Histograma(Metrica):
+    """Distribuição das observações em faixas acumuladas, com soma e contagem"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), limites=LIMITES_DURACAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(limites)
+
+    def observar(self, *rotulos, valor):
+        posicao = bisect.bisect_left(self.limites, valor)
+        with self.trava:
+            serie = self.valores.get(rotulos)
+            if serie is None:
+                # Contagem por faixa (não acumulada), soma e total
+                serie = self.valores[rotulos] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def amostras(self):
+        with self.trava:
+            series = [(chave, list(faixas), soma, total) for chave, (faixas, soma, total) in self.valores.items()]
+        nomes = self.rotulos + ('le',)
+        linhas = []
+        for chave, faixas, soma, total in series:
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (math.inf,), faixas):
+                acumulado += contagem
+                linhas.append(('_bucket', nomes, chave + (formatar_valor(float(limite)),), acumulado))
+            linhas.append(('_sum', self.rotulos, chave, soma))
+            linhas.append(('_count', self.rotulos, chave, total))
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto das métricas expostas em /metrics"""
+
+    def __init__(self):
+        self.metricas = []
+
+    def registrar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome, ajuda, rotulos=(), funcao=None):
+        return self.registrar(Contador(nome, ajuda, rotulos, funcao))
+
+    def medidor(self, nome, ajuda, rotulos=(), funcao=None):
+        return self.registrar(Medidor(nome, ajuda, rotulos, funcao))
+
+    def histograma(self, nome, ajuda, rotulos=(), limites=LIMITES_DURACAO):
+        return self.registrar(Histograma(nome, ajuda, rotulos, limites))
+
+    def reiniciar_travas(self):
+        for metrica in self.metricas:
+            metrica.reiniciar_trava()
+
+    def exportar(self):
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)"""
+        linhas = []
+        for metrica in self.metricas:
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,143 @@
+"""
+Histórico das versões publicadas dos dados e diferença entre as aulas de uma
+IES em duas versões, para /<nome_ies>/mudancas?desde=<etag>.
+
+O histórico guarda, de cada versão substituída por uma recarga, o ETag da
+resposta completa e os dados de cada IES. São referências aos mesmos objetos
+do dataset: as IES que não mudaram entre versões não ocupam memória a mais.
+A versão anterior é identificada pelo ETag da IES, derivado do conteúdo e
+portanto o mesmo em todos os workers; o número da versão (X-Versao-Dados) é
+contado por processo e não serve para isso.
+
+A identidade de uma aula é (matéria, tema, subtema, nome da aula) dentro do
+semestre; aulas repetidas com a mesma identidade são distinguidas pela ordem
+em que aparecem. Uma aula com a mesma identidade e outros valores nos demais
+campos (ex.: link_pdf) é uma aula modificada.
+"""
+import threading
+from collections import OrderedDict
+
+# Diferenças já calculadas, por par de ETags, mantidas em memória
+MAX_DIFERENCAS = 256
+
+
+def normalizar_etag(valor, codificacoes=()):
+    """
+    ETag sem aspas nem prefixo W/, como em If-None-Match, e sem o sufixo da
+    codificação (ex.: "<etag>-gzip", o ETag da variante comprimida)
+    """
+    valor = valor.strip()
+    if valor.startswith('W/'):
+        valor = valor[2:]
+    valor = valor.strip('"')
+    for codificacao in codificacoes:
+        if valor.endswith(f'-{codificacao}'):
+            return valor[:-len(codificacao) - 1]
+    return valor
+
+
+class HistoricoVersoes:
+    """As últimas versões substituídas: {versao: {ies: (etag, dados)}}"""
+
+    def __init__(self, max_versoes):
+        """max_versoes: número de versões anteriores guardadas (0 = nenhuma)"""
+        self.max_versoes = max_versoes
+        self.versoes = OrderedDict()
+        self.diferencas = OrderedDict()
+        self.reiniciar_trava()
+
+    def reiniciar_trava(self):
+        """Recria a trava (ex.: no processo filho depois de um fork)"""
+        self.trava = threading.Lock()
+
+    def registrar(self, versao, conteudo):
+        """Guarda o conteúdo {ies: (etag, dados)} da versão que saiu de uso"""
+        if not self.max_versoes:
+            return
+        with self.trava:
+            self.versoes[versao] = conteudo
+            while len(self.versoes) > self.max_versoes:
+                self.versoes.popitem(last=False)
+
+    def localizar(self, nome_ies, etag):
+        """
+        (etag, dados) da IES na versão cujo ETag da resposta completa da IES é
+        etag (já normalizado). Retorna None se nenhuma versão do histórico
+        tinha a IES com esse conteúdo.
+        """
+        with self.trava:
+            versoes = list(self.versoes.values())
+        for conteudo in reversed(versoes):
+            if nome_ies in conteudo and conteudo[nome_ies][0] == etag:
+                return conteudo[nome_ies]
+        return None
+
+    def comparar(self, etag_anterior, anterior, etag_atual, atual):
+        """
+        comparar_ies entre as duas versões de uma IES, calculada uma única vez
+        por par de ETags (os clientes de uma mesma versão pedem a mesma
+        diferença)
+        """
+        if etag_anterior == etag_atual:
+            return {}
+        chave = (etag_anterior, etag_atual)
+        with self.trava:
+            if chave in self.diferencas:
+                self.diferencas.move_to_end(chave)
+                return self.diferencas[chave]
+        mudancas = comparar_ies(anterior, atual)
+        with self.trava:
+            self.diferencas[chave] = mudancas
+            while len(self.diferencas) > MAX_DIFERENCAS:
+                self.diferencas.popitem(last=False)
+        return mudancas
+
+
+def aulas_por_identidade(materias):
+    """{(matéria, tema, subtema, nome, ocorrência): aula} de um semestre"""
+    aulas = {}
+    for materia in materias:
+        for tema in materia['temas']:
+            for subtema in tema['subtemas']:
+                for aula in subtema['aulas']:
+                    chave = (materia['materia'], tema['tema'], subtema['subtema'], aula['nome'])
+                    ocorrencia = 0
+                    while chave + (ocorrencia,) in aulas:
+                        ocorrencia += 1
+                    aulas[chave + (ocorrencia,)] = aula
+    return aulas
+
+
+def descrever_aula(chave, aula=None):
+    materia, tema, subtema, nome, _ = chave
+    descricao = {'materia': materia, 'tema': tema, 'subtema': subtema}
+    if aula is None:
+        descricao['nome'] = nome
+    else:
+        descricao['aula'] = aula
+    return descricao
+
+
+def comparar_ies(anterior, atual):
+    """
+    Diferença entre os dados de uma IES em duas versões, por semestre:
+    {semestre: {'adicionadas': [...], 'removidas': [...], 'modificadas': [...]}},
+    só com os semestres que mudaram. Adicionadas e modificadas trazem a aula
+    atual completa; removidas, só a identidade.
+    """
+    mudancas = {}
+    for semestre in list(atual) + [semestre for semestre in anterior if semestre not in atual]:
+        aulas_anteriores = aulas_por_identidade(anterior[semestre]) if semestre in anterior else {}
+        aulas_atuais = aulas_por_identidade(atual[semestre]) if semestre in atual else {}
+        adicionadas = []
+        modificadas = []
+        for chave, aula in aulas_atuais.items():
+            aula_anterior = aulas_anteriores.get(chave)
+            if aula_anterior is None:
+                adicionadas.append(descrever_aula(chave, aula))
+            elif dict(aula_anterior) != dict(aula):
+                modificadas.append(descrever_aula(chave, aula))
+        removidas = [descrever_aula(chave) for chave in aulas_anteriores if chave not in aulas_atuais]
+        if adicionadas or removidas or modificadas:
+            mudancas[semestre] = {'adicionadas': adicionadas, 'removidas': removidas, 'modificadas': modificadas}
+    return mudancas
@@ -0,0 +1,73 @@
+"""
+Relatório de qualidade dos dados de cada IES, montado durante a ingestão e
+exposto em /relatorio-dados.
+
+As verificações acontecem na mesma passada que monta a hierarquia (ver
+processar_linhas_ies), sem uma leitura extra da aba: as linhas boas só pagam
+comparações simples, e o relatório só é atualizado quando há um problema. De
+cada problema ficam a contagem e os números das primeiras linhas, para
+localizá-las na planilha sem que o relatório cresça com o tamanho da aba.
+"""
+from collections import defaultdict
+
+# Números de linha guardados como exemplo de cada problema
+MAX_EXEMPLOS = 5
+
+# Início aceito nos valores das colunas de link
+PREFIXOS_URL = ('http://', 'https://')
+
+
+class RelatorioQualidade:
+    """Contagens e linhas de exemplo dos problemas encontrados em uma IES"""
+
+    __slots__ = ('linhas', 'aulas', 'linhas_vazias', 'colunas_ausentes', 'problemas')
+
+    def __init__(self, colunas_ausentes=()):
+        self.linhas = 0
+        self.aulas = 0
+        self.linhas_vazias = 0
+        self.colunas_ausentes = list(colunas_ausentes)
+        # (tipo, detalhe) -> [total, linhas de exemplo]
+        self.problemas = defaultdict(lambda: [0, []])
+
+    def registrar(self, tipo, linha, detalhe=None):
+        problema = self.problemas[(tipo, detalhe)]
+        problema[0] += 1
+        if len(problema[1]) < MAX_EXEMPLOS:
+            problema[1].append(linha)
+
+    def total(self, tipo):
+        return sum(total for (tipo_problema, _), (total, _) in self.problemas.items() if tipo_problema == tipo)
+
+    def como_dicionario(self):
+        """
+        {'linhas', 'aulas', 'linhas_vazias', 'colunas_ausentes', 'problemas'},
+        com os problemas agrupados por tipo e, quando há, por campo:
+        {'campos_vazios': {'tema': {'total': 2, 'exemplos': [14, 90]}}, ...}
+        """
+        problemas = {}
+        for (tipo, detalhe), (total, exemplos) in self.problemas.items():
+            resumo = {'total': total, 'exemplos': exemplos}
+            if detalhe is None:
+                problemas[tipo] = resumo
+            else:
+                problemas.setdefault(tipo, {})[detalhe] = resumo
+        return {
+            'linhas': self.linhas,
+            'aulas': self.aulas,
+            'linhas_vazias': self.linhas_vazias,
+            'colunas_ausentes': self.colunas_ausentes,
+            'problemas': problemas,
+        }
+
+    def __getstate__(self):
+        # O defaultdict com lambda não é serializável (pool de processos e snapshot)
+        return self.linhas, self.aulas, self.linhas_vazias, self.colunas_ausentes, dict(self.problemas)
+
+    def __setstate__(self, estado):
+        linhas, aulas, linhas_vazias, colunas_ausentes, problemas = estado
+        self.__init__(colunas_ausentes)
+        self.linhas = linhas
+        self.aulas = aulas
+        self.linhas_vazias = linhas_vazias
+        self.problemas.update(problemas)
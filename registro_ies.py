@@ -0,0 +1,113 @@
+"""
+Registro das IES de várias planilhas, carregadas sob demanda
+(CARGA_SOB_DEMANDA=1).
+
+O catálogo diz em qual planilha está cada IES e qual versão do arquivo foi
+catalogada; nada é processado até a IES ser pedida pela primeira vez. As IES
+carregadas ficam num LRU limitado, e as menos usadas são descartadas quando
+o limite é atingido (voltam a ser carregadas se forem pedidas de novo). Um
+catálogo é imutável como o dataset que o contém: uma recarga monta outro
+registro, reaproveitando as IES já carregadas cujo arquivo não mudou.
+
+VisaoRegistro expõe um campo das IES (dados, respostas, índice, busca) como
+um dicionário somente leitura, para que as rotas usem o dataset sob demanda
+da mesma forma que o dataset carregado por inteiro.
+"""
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+class RegistroIES:
+    """Catálogo {ies: (arquivo, identidade)} com as IES carregadas num LRU"""
+
+    def __init__(self, catalogo, carregar, max_carregadas, carregadas=None):
+        """
+        carregar: função (ies, arquivo) que retorna os dados preparados da IES
+        max_carregadas: limite de IES em memória (0 = sem limite)
+        carregadas: IES já carregadas de um registro anterior, reaproveitadas
+        quando estão no catálogo com a mesma identidade
+        """
+        self.catalogo = catalogo
+        self.carregar = carregar
+        self.max_carregadas = max_carregadas
+        self.carregadas = OrderedDict(carregadas or {})
+        self.reiniciar_travas()
+
+    def reiniciar_travas(self):
+        """Recria as travas (ex.: no processo filho depois de um fork)"""
+        self.trava = threading.Lock()
+        # Uma trava por IES em carga, para que requisições simultâneas à mesma
+        # IES esperem a mesma carga em vez de processar a aba várias vezes
+        self.travas_carga = {}
+
+    def __contains__(self, ies):
+        return ies in self.catalogo
+
+    def carregada(self, ies):
+        """Indica se a IES está em memória (obter não vai processar a planilha)"""
+        return ies in self.carregadas
+
+    def obter(self, ies):
+        """Retorna os dados preparados da IES, carregando-a se necessário"""
+        with self.trava:
+            if ies in self.carregadas:
+                self.carregadas.move_to_end(ies)
+                return self.carregadas[ies]
+            arquivo, _ = self.catalogo[ies]
+            trava_ies = self.travas_carga.setdefault(ies, threading.Lock())
+
+        with trava_ies:
+            with self.trava:
+                if ies in self.carregadas:
+                    self.carregadas.move_to_end(ies)
+                    return self.carregadas[ies]
+            preparada = self.carregar(ies, arquivo)
+            with self.trava:
+                self.carregadas[ies] = preparada
+                self.travas_carga.pop(ies, None)
+                while self.max_carregadas and len(self.carregadas) > self.max_carregadas:
+                    self.carregadas.popitem(last=False)
+            return preparada
+
+    def preparadas(self):
+        """Dados preparados das IES em memória no momento"""
+        with self.trava:
+            return list(self.carregadas.values())
+
+    def preparadas_por_ies(self):
+        """Cópia de {ies: dados preparados} das IES em memória no momento"""
+        with self.trava:
+            return dict(self.carregadas)
+
+    def reaproveitaveis(self, catalogo):
+        """IES carregadas que continuam no novo catálogo com o mesmo arquivo"""
+        with self.trava:
+            return OrderedDict(
+                (ies, preparada) for ies, preparada in self.carregadas.items()
+                if catalogo.get(ies) == self.catalogo.get(ies)
+            )
+
+
+class VisaoRegistro(Mapping):
+    """Um campo dos dados preparados de cada IES, como um dicionário {ies: valor}"""
+
+    __slots__ = ('registro', 'campo')
+
+    def __init__(self, registro, campo):
+        self.registro = registro
+        self.campo = campo
+
+    def __getitem__(self, ies):
+        if ies not in self.registro:
+            raise KeyError(ies)
+        return self.registro.obter(ies)[self.campo]
+
+    def __contains__(self, ies):
+        return ies in self.registro
+
+    def __iter__(self):
+        return iter(self.registro.catalogo)
+
+    def __len__(self):
+        return len(self.registro.catalogo)
@@ -0,0 +1,75 @@
+"""
+Arquivo único e imutável com as respostas pré-serializadas de todas as IES,
+mapeado em memória (mmap) somente para leitura. Todos os workers que mapeiam
+o mesmo arquivo compartilham as mesmas páginas do cache do sistema
+operacional, então a memória ocupada pelas respostas não cresce com o número
+de workers.
+
+Formato: os bytes de todas as variantes (corpo, gzip, br) em sequência, depois
+o índice em pickle com a posição e o tamanho de cada uma por IES e semestre, e
+por fim 8 bytes com a posição do índice. Abrir o arquivo devolve as respostas
+no mesmo formato de criar_payload, com memoryviews da área mapeada no lugar
+dos bytes, sem copiá-los.
+"""
+import mmap
+import os
+import pickle
+import struct
+
+# Identifica o formato; incrementar ao mudar a estrutura do arquivo
+ASSINATURA_ARQUIVO = b'APIRESP1'
+
+FORMATO_RODAPE = '<Q'
+
+
+def gravar_arquivo_respostas(caminho, respostas):
+    """
+    Grava {nome_ies: {semestre: payload}} no arquivo de forma atômica: outros
+    processos veem o arquivo anterior ou o novo completo, nunca um parcial
+    """
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    indice = {}
+    with open(temporario, 'wb') as f:
+        f.write(ASSINATURA_ARQUIVO)
+        posicao = len(ASSINATURA_ARQUIVO)
+        for nome_ies, respostas_ies in respostas.items():
+            indice_ies = indice[nome_ies] = {}
+            for semestre, payload in respostas_ies.items():
+                entrada = indice_ies[semestre] = {'etag': payload['etag']}
+                for variante, conteudo in payload.items():
+                    if variante == 'etag':
+                        continue
+                    f.write(conteudo)
+                    entrada[variante] = (posicao, len(conteudo))
+                    posicao += len(conteudo)
+        f.write(pickle.dumps(indice, protocol=pickle.HIGHEST_PROTOCOL))
+        f.write(struct.pack(FORMATO_RODAPE, posicao))
+    os.replace(temporario, caminho)
+
+
+def abrir_arquivo_respostas(caminho):
+    """
+    Mapeia o arquivo e retorna as respostas com memoryviews no lugar dos
+    bytes. O mapeamento fica aberto enquanto alguma resposta for usada.
+    """
+    with open(caminho, 'rb') as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    tamanho_rodape = struct.calcsize(FORMATO_RODAPE)
+    if len(mapa) < len(ASSINATURA_ARQUIVO) + tamanho_rodape or mapa[:len(ASSINATURA_ARQUIVO)] != ASSINATURA_ARQUIVO:
+        mapa.close()
+        raise ValueError(f"Arquivo de respostas inválido: {caminho}")
+
+    posicao_indice, = struct.unpack(FORMATO_RODAPE, mapa[-tamanho_rodape:])
+    indice = pickle.loads(mapa[posicao_indice:-tamanho_rodape])
+
+    area = memoryview(mapa)
+    respostas = {}
+    for nome_ies, indice_ies in indice.items():
+        respostas_ies = respostas[nome_ies] = {}
+        for semestre, entrada in indice_ies.items():
+            payload = respostas_ies[semestre] = {'etag': entrada['etag']}
+            for variante, posicao in entrada.items():
+                if variante != 'etag':
+                    inicio, tamanho = posicao
+                    payload[variante] = area[inicio:inicio + tamanho]
+    return respostas
@@ -0,0 +1,50 @@
+"""
+Configuração comum dos testes: o app é importado sem snapshot, sem arquivo de
+geração e sem observar arquivos, e cada teste monta as planilhas de que precisa
+"""
+import os
+import sys
+
+import openpyxl
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+os.environ['DIRETORIO_SNAPSHOT'] = ''
+os.environ['ARQUIVO_GERACAO_DADOS'] = ''
+os.environ['OBSERVAR_ARQUIVOS'] = '0'
+os.environ.setdefault('NIVEL_LOG', 'WARNING')
+
+CABECALHOS = ['Semestre', 'Materia', 'Tema', 'Subtema', 'Aula', 'Link Aula', 'Link PDF', 'Link Quiz']
+
+
+def gravar_planilha(caminho, abas):
+    """Grava uma planilha com uma aba por IES: {ies: [(semestre, materia, tema, subtema, aula, links...)]}"""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for nome_ies, linhas in abas.items():
+        sheet = wb.create_sheet(nome_ies)
+        sheet.append(CABECALHOS)
+        for linha in linhas:
+            sheet.append(list(linha))
+    wb.save(caminho)
+    return str(caminho)
+
+
+def aula(semestre, materia, nome, link_pdf='https://exemplo.com/a.pdf'):
+    return (semestre, materia, 'Tema', 'Subtema', nome, 'https://exemplo.com/aula', link_pdf, 'https://exemplo.com/quiz')
+
+
+@pytest.fixture
+def aplicacao(monkeypatch):
+    """O app com o dataset publicado e o histórico de versões restaurados ao fim do teste"""
+    import app
+    monkeypatch.setattr(app, 'dataset_atual', app.dataset_atual)
+    monkeypatch.setattr(app, 'historico_versoes', app.HistoricoVersoes(app.HISTORICO_VERSOES))
+    yield app
+
+
+@pytest.fixture
+def cliente(aplicacao):
+    return aplicacao.app.test_client()
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from conftest import aula, gravar_planilha
+
+
+def chamar_asgi(asgi, metodo, caminho, corpo=b'', query=b'', ao_enviar=None):
+    """Executa uma requisição no app ASGI e retorna as mensagens enviadas"""
+    mensagens = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': corpo, 'more_body': False}
+
+    async def send(mensagem):
+        mensagens.append(mensagem)
+        if ao_enviar:
+            ao_enviar(mensagem)
+
+    scope = {
+        'type': 'http', 'method': metodo, 'path': caminho, 'query_string': query,
+        'headers': [(b'content-type', b'application/json')], 'http_version': '1.1',
+    }
+    asyncio.run(asgi.app(scope, receive, send))
+    return mensagens
+
+
+def test_lote_repassado_e_enviado_em_partes(aplicacao, cliente, tmp_path, monkeypatch):
+    import asgi
+
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {
+        'Fame': [aula('1', 'Cálculo', 'Limites'), aula('2', 'Física', 'Ondas')],
+        'Unip': [aula('1', 'Química', 'Átomos')],
+    })
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    consultas = json.dumps([{'ies': 'Fame', 'semestre': '1'}, {'ies': 'Unip'}, {'ies': 'Fame', 'semestre': '2'}]).encode()
+
+    # O lote só continua depois que a primeira parte chegou ao cliente: com o
+    # corpo acumulado antes do envio, a espera esgotaria o tempo
+    primeira_enviada = threading.Event()
+    esperas = []
+    fragmentos_originais = aplicacao.fragmentos_lote
+
+    def fragmentos_observados(*args):
+        for posicao, fragmento in enumerate(fragmentos_originais(*args)):
+            yield fragmento
+            if posicao == 0:
+                esperas.append(primeira_enviada.wait(5))
+
+    monkeypatch.setattr(aplicacao, 'fragmentos_lote', fragmentos_observados)
+
+    def ao_enviar(mensagem):
+        if mensagem['type'] == 'http.response.body' and mensagem['body']:
+            primeira_enviada.set()
+
+    mensagens = chamar_asgi(asgi, 'POST', '/lote', consultas, b'format=ndjson', ao_enviar)
+    assert esperas == [True]
+    assert mensagens[0]['type'] == 'http.response.start' and mensagens[0]['status'] == 200
+    corpos = [mensagem for mensagem in mensagens[1:]]
+    assert len(corpos) > 2
+    assert all(mensagem['more_body'] for mensagem in corpos[:-1])
+    assert not corpos[-1].get('more_body')
+
+    monkeypatch.setattr(aplicacao, 'fragmentos_lote', fragmentos_originais)
+    esperado = cliente.post('/lote?format=ndjson', data=consultas, content_type='application/json').get_data()
+    assert b''.join(mensagem['body'] for mensagem in corpos) == esperado
+    assert len(esperado.splitlines()) == 3
+
+
+def test_erro_no_meio_do_corpo_nao_encerra_a_resposta(aplicacao, tmp_path, monkeypatch):
+    import asgi
+
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+    def fragmentos_com_erro(*args):
+        yield b'['
+        raise RuntimeError('falha no meio do lote')
+
+    monkeypatch.setattr(aplicacao, 'fragmentos_lote', fragmentos_com_erro)
+    mensagens = []
+    with pytest.raises(RuntimeError):
+        chamar_asgi(asgi, 'POST', '/lote', json.dumps([{'ies': 'Fame'}]).encode(), ao_enviar=mensagens.append)
+
+    # O servidor aborta a conexão: nenhuma mensagem encerra o corpo truncado
+    assert mensagens[0]['type'] == 'http.response.start' and mensagens[0]['status'] == 200
+    assert mensagens[1:] and all(mensagem['more_body'] for mensagem in mensagens[1:])
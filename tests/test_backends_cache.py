@@ -0,0 +1,73 @@
+import fnmatch
+import sys
+import types
+
+import pytest
+
+from conftest import aula, gravar_planilha
+
+
+class RedisFalso:
+    """Cliente com as operações do Redis que o RedisCache usa, em memória"""
+
+    def __init__(self):
+        self.valores = {}
+
+    def get(self, name):
+        return self.valores.get(name)
+
+    def setex(self, name, time, value):
+        self.valores[name] = value
+        return True
+
+    def set(self, name, value):
+        self.valores[name] = value
+        return True
+
+    def keys(self, padrao):
+        return [chave for chave in self.valores if fnmatch.fnmatch(chave, padrao)]
+
+    def delete(self, *chaves):
+        return sum(self.valores.pop(chave, None) is not None for chave in chaves)
+
+
+@pytest.fixture
+def cache_redis(aplicacao, monkeypatch):
+    """O cache do app configurado com CACHE_TYPE=redis, com um cliente falso no lugar do servidor"""
+    cliente_redis = RedisFalso()
+    urls = []
+
+    def from_url(url, **kwargs):
+        urls.append(url)
+        return cliente_redis
+
+    monkeypatch.setitem(sys.modules, 'redis', types.SimpleNamespace(from_url=from_url))
+    monkeypatch.setenv('CACHE_TYPE', 'redis')
+    aplicacao.cache.init_app(aplicacao.app, config=aplicacao.configuracao_cache())
+    yield cliente_redis, urls
+    monkeypatch.delenv('CACHE_TYPE')
+    aplicacao.cache.init_app(aplicacao.app, config=aplicacao.configuracao_cache())
+
+
+def test_backend_redis_guarda_e_conta(aplicacao, cliente, cache_redis, tmp_path):
+    cliente_redis, urls = cache_redis
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+    with aplicacao.app.app_context():
+        backend = aplicacao.cache.cache
+    assert type(backend).__name__ == 'RedisCacheInstrumentado'
+    assert urls == ['redis://localhost:6379/0']
+
+    primeira = cliente.get('/listar-ies')
+    segunda = cliente.get('/listar-ies')
+    assert primeira.get_json() == segunda.get_json() == {'ies_disponiveis': ['Fame']}
+    assert [chave.split(':', 1)[0] for chave in cliente_redis.valores] == ['api_guias']
+
+    estatisticas = cliente.get('/estatisticas-cache').get_json()
+    assert estatisticas['backend'] == 'redis'
+    assert (estatisticas['acertos'], estatisticas['falhas'], estatisticas['gravacoes']) == (1, 1, 1)
+
+    # Uma recarga limpa as entradas com o prefixo do app
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    assert cliente_redis.valores == {}
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+import busca
+
+NOMES = ['cardiologia', 'cardiaca', 'carga', 'arritmia', 'arritmias', 'aguda', 'agudo', 'choque', 'sepse', 'rim']
+
+
+def montar_semestres(semente):
+    aleatorio = random.Random(semente)
+
+    def nome():
+        return ' '.join(aleatorio.sample(NOMES, aleatorio.randint(1, 3)))
+
+    return {
+        str(semestre): [
+            {'materia': nome(), 'temas': [
+                {'tema': nome(), 'subtemas': [
+                    {'subtema': nome(), 'aulas': [{'nome': nome()} for _ in range(aleatorio.randint(1, 4))]}
+                    for _ in range(aleatorio.randint(1, 3))
+                ]}
+                for _ in range(aleatorio.randint(1, 3))
+            ]}
+            for _ in range(3)
+        ]
+        for semestre in range(1, 4)
+    }
+
+
+def buscar_sem_indice(semestres, consulta, semestre):
+    """Pontua cada aula diretamente: maior peso por termo, o último também como prefixo"""
+    termos = busca.extrair_termos(consulta)
+    resultados = []
+    for nome_semestre in sorted(semestres):
+        if semestre is not None and nome_semestre != semestre:
+            continue
+        for materia in semestres[nome_semestre]:
+            for tema in materia['temas']:
+                for subtema in tema['subtemas']:
+                    for aula in subtema['aulas']:
+                        niveis = [
+                            (aula['nome'], busca.PESO_AULA), (subtema['subtema'], busca.PESO_SUBTEMA),
+                            (tema['tema'], busca.PESO_TEMA), (materia['materia'], busca.PESO_MATERIA),
+                        ]
+                        pontuacao = 0.0
+                        for posicao, termo in enumerate(dict.fromkeys(termos)):
+                            prefixo = termo == termos[-1]
+                            melhor = 0.0
+                            for texto, peso in niveis:
+                                for palavra in busca.extrair_termos(texto):
+                                    if palavra == termo:
+                                        melhor = max(melhor, peso)
+                                    elif prefixo and palavra.startswith(termo):
+                                        melhor = max(melhor, peso * busca.FATOR_PREFIXO)
+                            if not melhor:
+                                break
+                            pontuacao += melhor
+                        else:
+                            resultados.append((pontuacao, aula['nome']))
+    resultados.sort(key=lambda resultado: -resultado[0])
+    return resultados
+
+
+@pytest.mark.parametrize('limiar', [1, busca.LIMIAR_MASCARA])
+@pytest.mark.parametrize('semente', range(5))
+@pytest.mark.parametrize('consulta', ['car', 'cardiologia arr', 'aguda choque', 'sepse rim a', 'arritmia', 'x'])
+@pytest.mark.parametrize('semestre', [None, '2'])
+def test_busca_igual_a_pontuar_cada_aula(monkeypatch, limiar, semente, consulta, semestre):
+    # limiar 1: todos os termos em máscaras; o padrão: todos em intervalos
+    monkeypatch.setattr(busca, 'LIMIAR_MASCARA', limiar)
+    semestres = montar_semestres(semente)
+    indice = busca.IndiceBusca(semestres)
+    esperados = buscar_sem_indice(semestres, consulta, semestre)
+
+    total, resultados = indice.buscar(consulta, semestre, limite=7)
+
+    assert total == len(esperados)
+    assert [(pontuacao, aula[4]['nome']) for pontuacao, aula in resultados] == esperados[:7]
+
+
+def test_prefixo_curto_reune_expansoes_ate_o_limite(monkeypatch):
+    monkeypatch.setattr(busca, 'MAX_INTERVALOS_PREFIXO', 1)
+    semestres = {'1': [{'materia': 'cardiologia carga', 'temas': [
+        {'tema': 'tema', 'subtemas': [{'subtema': 'subtema', 'aulas': [{'nome': 'cardiaca'}, {'nome': 'outra'}]}]},
+    ]}]}
+    indice = busca.IndiceBusca(semestres)
+
+    # Só a primeira expansão em ordem alfabética ('cardiaca') é reunida
+    total, resultados = indice.buscar('car', limite=5)
+
+    assert total == 1
+    assert resultados[0][1][4]['nome'] == 'cardiaca'
+
+
+def test_prefixo_em_cache_nao_muda_o_resultado(monkeypatch):
+    monkeypatch.setattr(busca, 'MAX_INTERVALOS_PREFIXO', 3)
+    indice = busca.IndiceBusca(montar_semestres(0))
+    frio = indice.buscar('choque a', limite=50)
+
+    # Expande o prefixo sozinho, o que o deixa em cache, e repete a consulta
+    indice.consultas.clear()
+    indice.buscar('a', limite=50)
+    indice.consultas.clear()
+    quente = indice.buscar('choque a', limite=50)
+
+    assert quente == frio
+
+
+def test_primeiras_aulas_da_mascara():
+    mascara = (1 << 3) | (1 << 8) | (1 << 9) | (1 << 700)
+
+    assert busca.primeiras_aulas(mascara, 10) == [3, 8, 9, 700]
+    assert busca.primeiras_aulas(mascara, 2) == [3, 8]
+    assert busca.mascaras_de_intervalos([(0, 2, 4.0), (5, 21, 1.0)]) == {4.0: 0b11, 1.0: ((1 << 16) - 1) << 5}
+
+
+def test_achatar_intervalos_une_vizinhos_de_mesmo_peso():
+    assert busca.achatar_intervalos([(0, 1, 4.0), (1, 2, 4.0), (2, 3, 3.0), (5, 6, 3.0)]) == [
+        (0, 2, 4.0), (2, 3, 3.0), (5, 6, 3.0),
+    ]
+    assert busca.achatar_intervalos([(0, 4, 1.0), (1, 2, 4.0), (2, 3, 4.0)]) == [
+        (0, 1, 1.0), (1, 3, 4.0), (3, 4, 1.0),
+    ]
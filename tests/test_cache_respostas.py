@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from cache_respostas import CacheRespostas
+from logs import NOME_LOGGER
+
+
+@pytest.fixture
+def log_api(caplog, monkeypatch):
+    """
+    Registros do logger da API. Configurado pelo app ele não propaga para a
+    raiz, onde o caplog captura; aqui propaga durante o teste, então cada
+    registro é capturado uma vez, com ou sem o app importado.
+    """
+    monkeypatch.setattr(logging.getLogger(NOME_LOGGER), 'propagate', True)
+    with caplog.at_level(logging.ERROR, logger=NOME_LOGGER):
+        yield lambda: [registro for registro in caplog.records if registro.name == NOME_LOGGER]
+
+
+def test_requisicoes_simultaneas_calculam_uma_vez():
+    cache = CacheRespostas(10_000, 60)
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        time.sleep(0.1)
+        return b'resposta'
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(cache.obter('chave', calcular))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert resultados == [b'resposta'] * 20
+    estatisticas = cache.estatisticas()
+    assert estatisticas['falha'] == 1 and estatisticas['agrupado'] == 19
+
+
+def test_erro_na_revalidacao_e_registrado_e_contado(log_api):
+    cache = CacheRespostas(10_000, 0.05, variacao_validade=0, janela_revalidacao=60)
+    assert cache.obter('chave', lambda: b'antiga') == b'antiga'
+    time.sleep(0.1)
+
+    def falhar():
+        raise RuntimeError('planilha indisponível')
+
+    # Vencida dentro da janela: a versão guardada é servida e o erro do
+    # recálculo em segundo plano não chega à requisição
+    assert cache.obter('chave', falhar) == b'antiga'
+    fim = time.monotonic() + 5
+    while cache.estatisticas()['erro_revalidacao'] == 0:
+        assert time.monotonic() < fim
+        time.sleep(0.01)
+
+    registros = [registro for registro in log_api() if 'revalidar' in registro.getMessage()]
+    assert len(registros) == 1
+    assert registros[0].levelno == logging.ERROR and registros[0].exc_info[0] is RuntimeError
+    assert cache.obter('chave', lambda: b'nova') == b'antiga'
+
+
+def test_lru_respeita_o_limite_de_bytes():
+    cache = CacheRespostas(20_000, 60)
+    for numero in range(100):
+        cache.obter(numero, lambda: b'x' * 1000)
+    estatisticas = cache.estatisticas()
+    assert estatisticas['bytes'] <= 20_000
+    assert estatisticas['descarte'] == 100 - estatisticas['entradas']
@@ -0,0 +1,31 @@
+import threading
+
+from conftest import aula, gravar_planilha
+
+
+def test_requisicoes_recebem_503_ate_a_primeira_carga(aplicacao, cliente, tmp_path, monkeypatch):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')]})
+    liberar = threading.Event()
+    carregar_original = aplicacao.carregar_dataset
+
+    def carregar_lento(*args, **kwargs):
+        liberar.wait(10)
+        return carregar_original(*args, **kwargs)
+
+    monkeypatch.setattr(aplicacao, 'carregar_dataset', carregar_lento)
+    monkeypatch.setattr(aplicacao, 'encontrar_arquivo_excel', lambda: arquivo)
+    monkeypatch.setattr(aplicacao, 'dataset_atual', None)
+    monkeypatch.setattr(aplicacao, 'thread_carga_inicial', None)
+
+    # Durante a carga nenhuma requisição vê uma API vazia nem fica presa nela
+    resposta = cliente.get('/listar-ies')
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After']
+    assert aplicacao.dataset_atual is None
+    assert cliente.get('/metrics').status_code == 200
+
+    liberar.set()
+    aplicacao.thread_carga_inicial.join(10)
+    resposta = cliente.get('/listar-ies')
+    assert resposta.status_code == 200
+    assert resposta.get_json() == {'ies_disponiveis': ['Fame']}
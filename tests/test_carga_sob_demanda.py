@@ -0,0 +1,36 @@
+from conftest import aula, gravar_planilha
+
+
+def test_requisicao_carrega_a_ies_uma_vez_mesmo_com_descarte(aplicacao, cliente, tmp_path, monkeypatch):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {
+        'Fame': [aula('1', 'Cálculo', 'Limites'), aula('2', 'Física', 'Vetores')],
+        'Outra': [aula('1', 'Química', 'Átomos')],
+    })
+    monkeypatch.setattr(aplicacao, 'listar_arquivos_excel', lambda: [arquivo])
+    dataset = aplicacao.montar_dataset_sob_demanda()
+    aplicacao.publicar_dataset(dataset)
+
+    # Cada carga é descartada logo em seguida, como num LRU disputado por
+    # outras requisições: uma segunda consulta ao registro carregaria de novo
+    registro = dataset['registro']
+    obter_original = registro.obter
+    cargas = []
+
+    def obter_e_descartar(ies):
+        cargas.append(ies)
+        preparada = obter_original(ies)
+        registro.carregadas.clear()
+        return preparada
+
+    monkeypatch.setattr(registro, 'obter', obter_e_descartar)
+    for caminho in ['/Fame', '/Fame/2', '/Fame/2?format=html', '/Fame?limit=1', '/Fame/1?depth=1']:
+        cargas.clear()
+        resposta = cliente.get(caminho)
+        assert resposta.status_code == 200, caminho
+        assert cargas == ['Fame'], caminho
+
+    cargas.clear()
+    resposta = cliente.post('/lote', json=[{'ies': 'Fame', 'semestre': '1'}, {'ies': 'Outra'}])
+    assert [next(iter(item)) for item in resposta.get_json()] == ['Fame', 'Outra']
+    assert cargas == ['Fame', 'Outra']
+    assert cliente.get('/Fame/9').status_code == 404
@@ -0,0 +1,76 @@
+import openpyxl
+import pytest
+
+from cache_respostas import CacheRespostas
+from dados_colunares import ItensColunares
+
+
+def linhas_ies():
+    yield ('Semestre', 'Materia', 'Tema', 'Subtema', 'Aula', 'Link Aula', 'Link PDF', 'Link Quiz')
+    for linha in range(120):
+        yield (
+            float(2 - linha % 2), f"Matéria {linha // 20}", f"Tema {linha // 6}", f"Subtema {linha // 3}",
+            f"Aula {linha} cardiologia" if linha % 7 else f"Aula {linha}",
+            f"https://exemplo.com/{linha}", f"https://exemplo.com/{linha}.pdf" if linha % 3 else None, None,
+        )
+
+
+@pytest.fixture
+def datasets(aplicacao, monkeypatch):
+    montados = {}
+    for armazenamento in ('dicionarios', 'colunar'):
+        monkeypatch.setattr(aplicacao, 'ARMAZENAMENTO_DADOS', armazenamento)
+        montados[armazenamento] = aplicacao.montar_dataset({'IES': aplicacao.processar_linhas_ies('IES', linhas_ies())})
+    return montados
+
+
+def test_indices_colunares_guardam_posicoes(datasets):
+    dataset = datasets['colunar']
+
+    assert isinstance(dataset['indices']['IES']['materias'], ItensColunares)
+    assert isinstance(dataset['buscas']['IES'].aulas, ItensColunares)
+
+
+def test_respostas_iguais_nos_dois_modos(aplicacao, datasets):
+    dicionarios, colunar = datasets['dicionarios'], datasets['colunar']
+    assert colunar['respostas']['IES'] == dicionarios['respostas']['IES']
+
+    for semestre in (None, '1', '2'):
+        for parametros in ({'paginar': True, 'offset': 1, 'limit': 2, 'depth': 4, 'fields': None},
+                           {'paginar': False, 'offset': 0, 'limit': None, 'depth': 4, 'fields': ['nome', 'link_pdf']}):
+            consultas = [
+                aplicacao.montar_consulta_parcial(dataset['indices']['IES'], 'IES', semestre, parametros, 'etag')
+                for dataset in (dicionarios, colunar)
+            ]
+            assert consultas[0] == consultas[1]
+
+    for consulta, semestre in (('cardiologia', None), ('aula 1', '2'), ('sub', None)):
+        resultados = [
+            dataset['buscas']['IES'].buscar(consulta, semestre, limite=30)
+            for dataset in (dicionarios, colunar)
+        ]
+        assert resultados[0] == resultados[1]
+        assert resultados[0][0] > 0
+
+
+def test_rotas_respondem_igual_nos_dois_modos(aplicacao, cliente, tmp_path, monkeypatch):
+    arquivo = tmp_path / 'dados.xlsx'
+    planilha = openpyxl.Workbook()
+    aba = planilha.active
+    aba.title = 'IES'
+    for linha in linhas_ies():
+        aba.append(list(linha))
+    planilha.save(arquivo)
+
+    caminhos = ['/IES', '/IES/2', '/IES/1?format=html', '/IES?limit=3&fields=nome', '/buscar?q=cardiologia&limit=30']
+    respostas = {}
+    for armazenamento in ('dicionarios', 'colunar'):
+        monkeypatch.setattr(aplicacao, 'ARMAZENAMENTO_DADOS', armazenamento)
+        # O conteúdo é o mesmo nos dois modos: sem um cache novo, as consultas
+        # parciais e as buscas viriam prontas do primeiro
+        monkeypatch.setattr(aplicacao, 'cache_respostas', CacheRespostas(10_000_000, 60))
+        aplicacao.publicar_dataset(aplicacao.carregar_dataset(str(arquivo)))
+        respostas[armazenamento] = [cliente.get(caminho).get_data() for caminho in caminhos]
+
+    assert isinstance(aplicacao.dataset_atual['dados']['IES'], aplicacao.IESColunar)
+    assert respostas['colunar'] == respostas['dicionarios']
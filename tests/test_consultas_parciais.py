@@ -0,0 +1,52 @@
+from conftest import aula, gravar_planilha
+
+
+def publicar(aplicacao, caminho):
+    linhas = [aula('1', f'Matéria {numero}', f'Aula {numero}') for numero in range(5)]
+    linhas += [aula('2', 'Física', 'Vetores')]
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(gravar_planilha(caminho, {'Fame': linhas})))
+
+
+def test_paginacao_por_cursor_percorre_as_materias(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'dados.xlsx')
+
+    materias = []
+    resposta = cliente.get('/Fame?limit=2').get_json()
+    while True:
+        assert len(resposta['materias']) <= 2 and resposta['paginacao']['total'] == 6
+        materias += [(materia['semestre'], materia['materia']) for materia in resposta['materias']]
+        cursor = resposta['paginacao']['proximo_cursor']
+        if cursor is None:
+            break
+        resposta = cliente.get(f'/Fame?limit=2&cursor={cursor}').get_json()
+
+    assert materias == [('1', f'Matéria {numero}') for numero in range(5)] + [('2', 'Física')]
+    semestre = cliente.get('/Fame/1?offset=4&limit=10').get_json()
+    assert [materia['materia'] for materia in semestre['materias']] == ['Matéria 4']
+    assert semestre['paginacao']['proximo_cursor'] is None
+
+
+def test_projecao_e_profundidade(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'dados.xlsx')
+
+    menu = cliente.get('/Fame/2?depth=1').get_json()
+    assert menu == {'Fame': {'2': [{'materia': 'Física'}]}}
+
+    resposta = cliente.get('/Fame/2?fields=nome,link_pdf').get_json()
+    aulas = resposta['Fame']['2'][0]['temas'][0]['subtemas'][0]['aulas']
+    assert aulas == [{'nome': 'Vetores', 'link_pdf': 'https://exemplo.com/a.pdf'}]
+
+    for consulta in ('limit=0', 'depth=9', 'offset=x', 'fields=senha', 'cursor=invalido'):
+        assert cliente.get(f'/Fame?{consulta}').status_code == 400, consulta
+
+
+def test_cursor_de_outra_versao_e_recusado(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'v1.xlsx')
+    cursor = cliente.get('/Fame?limit=2').get_json()['paginacao']['proximo_cursor']
+
+    gravar_planilha(tmp_path / 'v2.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')] * 3})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(str(tmp_path / 'v2.xlsx')))
+
+    resposta = cliente.get(f'/Fame?limit=2&cursor={cursor}')
+    assert resposta.status_code == 400
+    assert 'recomece' in resposta.get_json()['error']
@@ -0,0 +1,64 @@
+import gc
+
+from conftest import CABECALHOS, aula, gravar_planilha
+
+
+def linhas_observadas(estados):
+    """Linhas de uma aba que anotam se o coletor de ciclos estava ativo ao serem lidas"""
+    for linha in [tuple(CABECALHOS), aula('1', 'Cálculo', 'Limites'), aula('1', 'Cálculo', 'Derivadas')]:
+        estados.append(gc.isenabled())
+        yield linha
+
+
+def test_coletor_pausado_so_na_carga_inicial(aplicacao, monkeypatch):
+    monkeypatch.setattr(aplicacao, 'dataset_atual', None)
+    estados = []
+    dados = aplicacao.processar_linhas_ies('Fame', linhas_observadas(estados))
+    assert not any(estados)
+    assert gc.isenabled()
+    assert [materia['materia'] for materia in dados['1']] == ['Cálculo']
+
+    # Com dados publicados há requisições sendo atendidas: o coletor continua ativo
+    monkeypatch.setattr(aplicacao, 'dataset_atual', aplicacao.montar_dataset({}))
+    estados = []
+    aplicacao.processar_linhas_ies('Fame', linhas_observadas(estados))
+    assert all(estados)
+
+
+def test_coletor_desativado_antes_continua_desativado(aplicacao, monkeypatch):
+    monkeypatch.setattr(aplicacao, 'dataset_atual', None)
+    gc.disable()
+    try:
+        aplicacao.processar_linhas_ies('Fame', linhas_observadas([]))
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_abas_em_paralelo_respondem_como_em_serie(aplicacao, cliente, tmp_path, monkeypatch):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {
+        'Fame': [aula('1', 'Cálculo', 'Limites'), aula('2', 'Física', 'Ondas')],
+        'Unip': [aula('1', 'Química', 'Átomos', link_pdf='atomos.pdf')],
+        'Uniso': [aula('3', 'Biologia', 'Células')],
+    })
+    caminhos = ['/listar-ies', '/Fame', '/Unip', '/Uniso/3', '/relatorio-dados']
+
+    paralelo_original = aplicacao.processar_abas_em_paralelo
+    paralelas = []
+
+    def paralelo_contando(nome_arquivo, modo, mapeamento, workers, *args):
+        paralelas.append(workers)
+        return paralelo_original(nome_arquivo, modo, mapeamento, workers, *args)
+
+    monkeypatch.setattr(aplicacao, 'processar_abas_em_paralelo', paralelo_contando)
+    respostas = {}
+    for workers in (0, 2):
+        monkeypatch.setattr(aplicacao, 'WORKERS_INGESTAO', workers)
+        aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+        respostas[workers] = [cliente.get(caminho).get_json() for caminho in caminhos]
+        # O relatório traz a versão do dataset, que muda a cada publicação
+        respostas[workers][-1].pop('versao')
+
+    assert respostas[2] == respostas[0]
+    assert respostas[2][0] == {'ies_disponiveis': ['Fame', 'Unip', 'Uniso']}
+    assert paralelas == [2]
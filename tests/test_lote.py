@@ -0,0 +1,41 @@
+import json
+
+from conftest import aula, gravar_planilha
+
+
+def publicar(aplicacao, caminho):
+    arquivo = gravar_planilha(caminho, {
+        'Fame': [aula('1', 'Cálculo', 'Limites'), aula('2', 'Física', 'Ondas')],
+        'Unip': [aula('1', 'Química', 'Átomos')],
+    })
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+
+def test_lote_reune_as_respostas_e_os_erros_em_ordem(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'dados.xlsx')
+    consultas = [{'ies': 'Fame', 'semestre': '2'}, {'ies': 'Nenhuma'}, {'ies': 'Unip'}, {'ies': 'Fame', 'semestre': 9}]
+
+    resposta = cliente.post('/lote', json={'consultas': consultas})
+    assert resposta.status_code == 200 and resposta.mimetype == 'application/json'
+    assert resposta.get_json() == [
+        cliente.get('/Fame/2').get_json(),
+        {'error': "IES 'Nenhuma' não encontrada", 'ies': 'Nenhuma', 'semestre': None},
+        cliente.get('/Unip').get_json(),
+        {'error': "Semestre '9' não encontrado para a IES 'Fame'", 'ies': 'Fame', 'semestre': '9'},
+    ]
+
+    # Em NDJSON cada resposta ocupa uma linha, na ordem das consultas
+    ndjson = cliente.post('/lote', json=consultas[:1] + consultas[2:3], headers={'Accept': 'application/x-ndjson'})
+    assert ndjson.mimetype == 'application/x-ndjson'
+    assert [json.loads(linha) for linha in ndjson.get_data().splitlines()] == [
+        cliente.get('/Fame/2').get_json(), cliente.get('/Unip').get_json(),
+    ]
+
+
+def test_lote_invalido(aplicacao, cliente, tmp_path, monkeypatch):
+    publicar(aplicacao, tmp_path / 'dados.xlsx')
+    monkeypatch.setattr(aplicacao, 'LIMITE_LOTE', 2)
+
+    for corpo in ([], {'consultas': 'Fame'}, [{'semestre': '1'}], [{'ies': 'Fame', 'semestre': True}], [{'ies': 'Fame'}] * 3):
+        assert cliente.post('/lote', json=corpo).status_code == 400, corpo
+    assert cliente.post('/lote?format=xml', json=[{'ies': 'Fame'}]).status_code == 400
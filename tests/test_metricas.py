@@ -0,0 +1,42 @@
+from conftest import aula, gravar_planilha
+
+
+def amostras(cliente):
+    """{nome{rótulos}: valor} das amostras de /metrics"""
+    resposta = cliente.get('/metrics')
+    assert resposta.status_code == 200 and resposta.mimetype == 'text/plain'
+    valores = {}
+    for linha in resposta.get_data(as_text=True).splitlines():
+        if linha and not linha.startswith('#'):
+            nome, valor = linha.rsplit(' ', 1)
+            valores[nome] = float(valor)
+    return valores
+
+
+def test_metricas_contam_requisicoes_e_etapas_da_carga(aplicacao, cliente, tmp_path):
+    contagem_ies = 'api_guias_requisicao_duracao_segundos_count{rota="/<string:nome_ies>",metodo="GET",status="%s"}'
+    contagem_aba = 'api_guias_carga_etapa_duracao_segundos_count{etapa="aba"}'
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {
+        'Fame': [aula('1', 'Cálculo', 'Limites', link_pdf='limites.pdf')], 'Unip': [aula('1', 'Química', 'Átomos')],
+    })
+    # Sem dados publicados, a primeira requisição iniciaria a carga inicial
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    antes = amostras(cliente)
+
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    etag = cliente.get('/Fame').headers['ETag']
+    cliente.get('/Fame', headers={'If-None-Match': etag})
+    cliente.get('/Nenhuma')
+    depois = amostras(cliente)
+
+    def aumento(nome):
+        return depois.get(nome, 0) - antes.get(nome, 0)
+
+    # A rota é a regra do Flask, não o caminho, para não criar uma série por IES
+    assert aumento(contagem_ies % '200') == 1
+    assert aumento(contagem_ies % '304') == 1
+    assert aumento(contagem_ies % '404') == 1
+    assert not any('rota="/Fame"' in nome for nome in depois)
+    assert aumento(contagem_aba) == 2
+    assert depois['api_guias_dados_versao'] == aplicacao.dataset_atual['versao']
+    assert depois['api_guias_problemas_dados{tipo="links_invalidos"}'] == 1
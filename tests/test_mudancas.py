@@ -0,0 +1,55 @@
+from conftest import aula, gravar_planilha
+
+from mudancas import normalizar_etag
+
+
+def test_normalizar_etag_remove_aspas_prefixo_fraco_e_codificacao():
+    codificacoes = ['br', 'gzip']
+    assert normalizar_etag('"abc"') == 'abc'
+    assert normalizar_etag('W/"abc"') == 'abc'
+    assert normalizar_etag('"abc-gzip"', codificacoes) == 'abc'
+    assert normalizar_etag('abc-br', codificacoes) == 'abc'
+    assert normalizar_etag('abc-gzip') == 'abc-gzip'
+
+
+def publicar(aplicacao, caminho, link_pdf):
+    arquivo = gravar_planilha(caminho, {'Fame': [
+        aula('1', 'Cálculo', 'Limites', link_pdf),
+        aula('1', 'Cálculo', 'Derivadas'),
+    ]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+
+def test_mudancas_aceita_etag_da_resposta_comprimida(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'v1.xlsx', 'https://exemplo.com/v1.pdf')
+    resposta = cliente.get('/Fame', headers={'Accept-Encoding': 'gzip'})
+    etag_gzip, _ = resposta.get_etag()
+    assert etag_gzip.endswith('-gzip')
+
+    publicar(aplicacao, tmp_path / 'v2.xlsx', 'https://exemplo.com/v2.pdf')
+    resposta = cliente.get(f'/Fame/mudancas?desde="{etag_gzip}"')
+    assert resposta.status_code == 200
+    semestre = resposta.get_json()['semestres']['1']
+    assert [m['aula']['link_pdf'] for m in semestre['modificadas']] == ['https://exemplo.com/v2.pdf']
+    assert semestre['adicionadas'] == [] and semestre['removidas'] == []
+
+    # A mesma versão pedida pelo ETag sem codificação tem a mesma resposta
+    sem_codificacao = cliente.get(f"/Fame/mudancas?desde={etag_gzip[:-len('-gzip')]}")
+    assert sem_codificacao.get_data() == resposta.get_data()
+    assert sem_codificacao.get_etag() == resposta.get_etag()
+
+
+def test_mudancas_nao_aceita_numero_da_versao(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'v1.xlsx', 'https://exemplo.com/v1.pdf')
+    versao = aplicacao.dataset_atual['versao']
+    publicar(aplicacao, tmp_path / 'v2.xlsx', 'https://exemplo.com/v2.pdf')
+
+    # O número da versão é contado por processo: outro worker teria outros dados
+    resposta = cliente.get(f'/Fame/mudancas?desde={versao}')
+    assert resposta.status_code == 410
+    assert resposta.get_json()['etag'] == aplicacao.dataset_atual['respostas']['Fame'][None]['etag']
+
+
+def test_mudancas_sem_desde(cliente, aplicacao, tmp_path):
+    publicar(aplicacao, tmp_path / 'v1.xlsx', 'https://exemplo.com/v1.pdf')
+    assert cliente.get('/Fame/mudancas').status_code == 400
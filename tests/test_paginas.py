@@ -0,0 +1,24 @@
+from conftest import aula, gravar_planilha
+
+
+def test_paginas_html_escapam_os_textos_da_planilha(aplicacao, cliente, tmp_path):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [
+        aula('1', 'Cálculo <b>I</b>', '<script>alert(1)</script>'),
+        aula('2', 'Física', 'Vetores & Escalares'),
+    ]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+    semestre = cliente.get('/Fame/1?format=html')
+    assert semestre.status_code == 200 and semestre.mimetype == 'text/html'
+    html = semestre.get_data(as_text=True)
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;' in html and '<script>' not in html
+    assert 'Cálculo &lt;b&gt;I&lt;/b&gt;' in html
+    assert 'href="https://exemplo.com/a.pdf"' in html
+
+    # As páginas são montadas na carga e servidas como as respostas JSON
+    assert semestre.get_data() == aplicacao.dataset_atual['paginas']['Fame']['1']['corpo']
+    assert cliente.get('/Fame/1?format=html', headers={'If-None-Match': semestre.headers['ETag']}).status_code == 304
+
+    ies = cliente.get('/Fame?format=html').get_data(as_text=True)
+    assert 'href="/Fame/1"' in ies and 'href="/Fame/2"' in ies
+    assert 'IES disponíveis: 1' in cliente.get('/').get_data(as_text=True)
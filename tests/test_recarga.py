@@ -0,0 +1,89 @@
+import threading
+import time
+
+from conftest import aula, gravar_planilha
+
+
+def aguardar(condicao, limite=10):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, "tempo esgotado"
+        time.sleep(0.01)
+
+
+def test_pedido_durante_recarga_gera_recarga_seguinte(aplicacao, tmp_path, monkeypatch):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+    liberar = threading.Event()
+    carregar_original = aplicacao.carregar_dataset
+    chamadas = []
+
+    def carregar_lento(*args, **kwargs):
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            liberar.wait(10)
+        return carregar_original(*args, **kwargs)
+
+    monkeypatch.setattr(aplicacao, 'carregar_dataset', carregar_lento)
+    primeiro = aplicacao.iniciar_recarga(arquivo, propagar=False)
+    aguardar(lambda: chamadas)
+
+    # A planilha muda durante a recarga, que já leu a versão anterior
+    gravar_planilha(arquivo, {'Fame': [aula('1', 'Cálculo', 'Limites'), aula('1', 'Cálculo', 'Derivadas')]})
+    for _ in range(3):
+        assert aplicacao.iniciar_recarga(arquivo, propagar=False)['job_id'] == primeiro['job_id']
+    liberar.set()
+
+    aguardar(lambda: len(chamadas) == 2 and all(
+        trabalho['status'] != 'executando' for trabalho in list(aplicacao.trabalhos_recarga.values())
+    ))
+    time.sleep(0.2)
+    assert len(chamadas) == 2
+    assert aplicacao.recarga_pendente is None
+    assert b'Derivadas' in aplicacao.dataset_atual['respostas']['Fame'][None]['corpo']
+
+
+def test_estado_da_recarga_visivel_em_outro_worker(aplicacao, cliente, tmp_path, monkeypatch):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    monkeypatch.setattr(aplicacao, 'ARQUIVO_GERACAO_DADOS', str(tmp_path / 'geracao'))
+    monkeypatch.setattr(aplicacao, 'encontrar_arquivo_excel', lambda: arquivo)
+
+    job_id = cliente.post('/recarregar-dados').get_json()['job_id']
+    aguardar(lambda: aplicacao.consultar_recarga(job_id)['status'] != 'executando')
+
+    # Outro worker não tem o trabalho em memória
+    monkeypatch.setattr(aplicacao, 'trabalhos_recarga', type(aplicacao.trabalhos_recarga)())
+    resposta = cliente.get(f'/recarregar-dados/{job_id}')
+    assert resposta.status_code == 200
+    assert resposta.get_json()['status'] == 'concluido'
+    assert cliente.get('/recarregar-dados/..%2Fgeracao').status_code == 404
+
+
+def test_recarga_processa_so_as_abas_alteradas(aplicacao, cliente, tmp_path, monkeypatch):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {
+        'Fame': [aula('1', 'Cálculo', 'Limites')], 'Unip': [aula('1', 'Química', 'Átomos')],
+    })
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    monkeypatch.setattr(aplicacao, 'encontrar_arquivo_excel', lambda: arquivo)
+    etag_unip = cliente.get('/Unip').headers['ETag']
+
+    processar_original = aplicacao.processar_linhas_ies
+    processadas = []
+
+    def processar_contando(ies, *args, **kwargs):
+        processadas.append(ies)
+        return processar_original(ies, *args, **kwargs)
+
+    monkeypatch.setattr(aplicacao, 'processar_linhas_ies', processar_contando)
+    gravar_planilha(arquivo, {
+        'Fame': [aula('1', 'Cálculo', 'Limites'), aula('1', 'Cálculo', 'Derivadas')], 'Unip': [aula('1', 'Química', 'Átomos')],
+    })
+    job_id = cliente.post('/recarregar-dados').get_json()['job_id']
+    aguardar(lambda: aplicacao.consultar_recarga(job_id)['status'] != 'executando')
+
+    assert aplicacao.consultar_recarga(job_id)['status'] == 'concluido'
+    assert processadas == ['Fame']
+    assert b'Derivadas' in cliente.get('/Fame').get_data()
+    assert cliente.get('/Unip', headers={'If-None-Match': etag_unip}).status_code == 304
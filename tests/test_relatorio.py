@@ -0,0 +1,33 @@
+from conftest import aula, gravar_planilha
+
+
+def test_relatorio_conta_os_problemas_de_cada_ies(aplicacao, cliente, tmp_path):
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {
+        'Fame': [
+            aula('1', 'Cálculo', 'Limites'),
+            aula('1', 'Cálculo', 'Limites'),
+            aula('1', 'Cálculo', 'Derivadas', link_pdf='arquivo.pdf'),
+            ('1', 'Cálculo', None, 'Subtema', 'Integrais', None, None, None),
+            (None,) * 8,
+        ],
+        'Unip': [aula('1', 'Química', 'Átomos')],
+    })
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+
+    relatorio = cliente.get('/relatorio-dados').get_json()
+    fame = relatorio['ies']['Fame']
+    # As linhas contam a partir da 2, depois do cabeçalho
+    assert fame['aulas'] == 3
+    assert fame['problemas']['aulas_duplicadas'] == {'total': 1, 'exemplos': [3]}
+    assert fame['problemas']['links_invalidos'] == {'link_pdf': {'total': 1, 'exemplos': [4]}}
+    assert fame['problemas']['campos_vazios'] == {'tema': {'total': 1, 'exemplos': [5]}}
+    assert relatorio['ies']['Unip']['problemas'] == {}
+    assert relatorio['totais']['ies'] == 2 and relatorio['totais']['aulas'] == 4
+
+    # A linha incompleta fica fora da resposta; duplicadas e links inválidos
+    # só entram no relatório
+    subtemas = cliente.get('/Fame/1').get_json()['Fame']['1'][0]['temas'][0]['subtemas']
+    assert [item['nome'] for subtema in subtemas for item in subtema['aulas']] == ['Limites', 'Limites', 'Derivadas']
+
+    assert list(cliente.get('/relatorio-dados?ies=Unip').get_json()['ies']) == ['Unip']
+    assert cliente.get('/relatorio-dados?ies=Nenhuma').status_code == 404
@@ -0,0 +1,65 @@
+import gzip
+
+import pytest
+
+from conftest import aula, gravar_planilha
+
+
+def publicar(aplicacao, caminho, nome_primeira='Limites'):
+    """Publica uma planilha com a IES Fame em dois semestres, com aulas suficientes para valer comprimir"""
+    linhas = [aula('1', 'Cálculo', nome_primeira)]
+    linhas += [aula('1', 'Cálculo', f'Aula {numero}') for numero in range(30)]
+    linhas += [aula('2', 'Física', f'Aula {numero}') for numero in range(30)]
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(gravar_planilha(caminho, {'Fame': linhas})))
+
+
+def test_resposta_pre_serializada_com_get_condicional(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'v1.xlsx')
+    payload = aplicacao.dataset_atual['respostas']['Fame'][None]
+
+    resposta = cliente.get('/Fame')
+    assert resposta.status_code == 200
+    assert resposta.get_data() == payload['corpo']
+    assert resposta.get_etag() == (payload['etag'], False)
+    assert resposta.last_modified is not None
+    assert 'Accept-Encoding' in resposta.headers['Vary']
+
+    etag = resposta.headers['ETag']
+    revalidada = cliente.get('/Fame', headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304 and revalidada.get_data() == b''
+    assert revalidada.headers['ETag'] == etag
+    assert cliente.get('/Fame', headers={'If-Modified-Since': resposta.headers['Last-Modified']}).status_code == 304
+    assert cliente.get('/Fame', headers={'If-None-Match': '"outro"'}).status_code == 200
+
+    # O ETag vem do conteúdo: só as respostas que mudaram ganham outro
+    etag_semestre_2 = cliente.get('/Fame/2').headers['ETag']
+    publicar(aplicacao, tmp_path / 'v2.xlsx', nome_primeira='Derivadas')
+    assert cliente.get('/Fame', headers={'If-None-Match': etag}).status_code == 200
+    assert cliente.get('/Fame/2', headers={'If-None-Match': etag_semestre_2}).status_code == 304
+
+
+def test_variante_gzip_negociada_pelo_accept_encoding(aplicacao, cliente, tmp_path):
+    publicar(aplicacao, tmp_path / 'dados.xlsx')
+    identidade = cliente.get('/Fame/1')
+
+    resposta = cliente.get('/Fame/1', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert resposta.headers['Content-Encoding'] == 'gzip'
+    assert int(resposta.headers['Content-Length']) < len(identidade.get_data())
+    assert gzip.decompress(resposta.get_data()) == identidade.get_data()
+    # Cada representação tem o seu ETag, revalidado com a mesma codificação
+    assert resposta.headers['ETag'] == identidade.headers['ETag'][:-1] + '-gzip"'
+    revalidada = cliente.get('/Fame/1', headers={'Accept-Encoding': 'gzip', 'If-None-Match': resposta.headers['ETag']})
+    assert revalidada.status_code == 304
+
+    recusada = cliente.get('/Fame/1', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in recusada.headers
+    assert recusada.get_data() == identidade.get_data()
+
+
+def test_variante_brotli_quando_disponivel(aplicacao, cliente, tmp_path):
+    brotli = pytest.importorskip('brotli')
+    publicar(aplicacao, tmp_path / 'dados.xlsx')
+
+    resposta = cliente.get('/Fame', headers={'Accept-Encoding': 'br'})
+    assert resposta.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(resposta.get_data()) == cliente.get('/Fame').get_data()
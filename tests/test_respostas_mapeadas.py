@@ -0,0 +1,32 @@
+from werkzeug.test import EnvironBuilder
+
+from conftest import aula, gravar_planilha
+
+
+def partes_do_corpo(aplicacao, *args, **kwargs):
+    """Executa o app como um servidor WSGI e retorna os itens do iterável da resposta"""
+    environ = EnvironBuilder(*args, **kwargs).get_environ()
+    resposta = aplicacao.app(environ, lambda status, cabecalhos, exc_info=None: None)
+    try:
+        return list(resposta)
+    finally:
+        if hasattr(resposta, 'close'):
+            resposta.close()
+
+
+def test_respostas_mapeadas_chegam_ao_servidor_como_bytes(aplicacao, tmp_path, monkeypatch):
+    monkeypatch.setattr(aplicacao, 'DIRETORIO_RESPOSTAS_MAPEADAS', str(tmp_path / 'respostas'))
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [aula('1', 'Cálculo', 'Limites')]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    assert isinstance(aplicacao.dataset_atual['respostas']['Fame'][None]['corpo'], memoryview)
+
+    # O worker síncrono do gunicorn recusa itens que não sejam bytes
+    pedidos = [
+        {'path': '/Fame'},
+        {'path': '/Fame/1', 'headers': {'Accept-Encoding': 'gzip'}},
+        {'path': '/lote', 'method': 'POST', 'json': [{'ies': 'Fame'}, {'ies': 'Fame', 'semestre': '1'}]},
+    ]
+    for pedido in pedidos:
+        partes = partes_do_corpo(aplicacao, **pedido)
+        assert partes and all(type(parte) is bytes for parte in partes), pedido['path']
+    assert b'Limites' in b''.join(partes_do_corpo(aplicacao, '/Fame'))
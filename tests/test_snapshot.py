@@ -0,0 +1,34 @@
+import os
+
+from conftest import aula, gravar_planilha
+
+
+def test_snapshot_dispensa_processar_a_planilha_de_novo(aplicacao, cliente, tmp_path, monkeypatch):
+    monkeypatch.setattr(aplicacao, 'DIRETORIO_SNAPSHOT', str(tmp_path / 'snapshot'))
+    arquivo = gravar_planilha(tmp_path / 'dados.xlsx', {'Fame': [
+        aula('1', 'Cálculo', 'Limites'), aula('1', 'Cálculo', 'Derivadas', link_pdf='derivadas.pdf'),
+    ]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    assert os.path.exists(aplicacao.caminho_snapshot())
+    esperado = cliente.get('/Fame').get_data()
+    relatorio = cliente.get('/relatorio-dados').get_json()['ies']
+
+    # Outro worker com o mesmo arquivo carrega o snapshot sem abrir a planilha
+    processar_original = aplicacao.processar_arquivo_excel
+    processadas = []
+
+    def processar_contando(*args, **kwargs):
+        processadas.append(args[0])
+        return processar_original(*args, **kwargs)
+
+    monkeypatch.setattr(aplicacao, 'processar_arquivo_excel', processar_contando)
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    assert processadas == []
+    assert cliente.get('/Fame').get_data() == esperado
+    assert cliente.get('/relatorio-dados').get_json()['ies'] == relatorio
+
+    # Uma planilha alterada tem outra chave e é processada de novo
+    gravar_planilha(arquivo, {'Fame': [aula('1', 'Cálculo', 'Integrais')]})
+    aplicacao.publicar_dataset(aplicacao.carregar_dataset(arquivo))
+    assert processadas == [arquivo]
+    assert b'Integrais' in cliente.get('/Fame').get_data()